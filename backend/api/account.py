@@ -5,25 +5,25 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Request
 
 from backend.schemas import AccountResponse, OpenOrdersResponse
-from backend.api.deps import require_admin
+from backend.api.deps import get_user_exchange_client, require_admin
+from backend.services.rate_limiter import ExchangeBusy
 
 log = logging.getLogger(__name__)
 router = APIRouter(prefix="/account", tags=["Account"])
 
 
 def _get_client(request: Request):
-    client = request.app.state.exchange_client
+    client = getattr(request.app.state, "async_exchange_client", None)
     if client is None:
         raise HTTPException(status_code=503, detail="Exchange client not ready")
     return client
 
 
-@router.get("", response_model=AccountResponse, dependencies=[Depends(require_admin)])
-def get_account(request: Request):
-    """Get account balances (non-zero only)."""
-    client = _get_client(request)
+async def _balances(client) -> AccountResponse:
     try:
-        acc = client.get_account()
+        acc = await client.get_account()
+    except ExchangeBusy:
+        raise       # 503 + Retry-After via the app handler
     except Exception as exc:
         log.exception("get_account failed")
         raise HTTPException(status_code=502, detail=str(exc))
@@ -35,12 +35,39 @@ def get_account(request: Request):
     return AccountResponse(balances=balances, raw=acc)
 
 
+@router.get("", response_model=AccountResponse, dependencies=[Depends(require_admin)])
+async def get_account(request: Request):
+    """Get account balances (non-zero only)."""
+    return await _balances(_get_client(request))
+
+
+@router.get("/me", response_model=AccountResponse)
+async def get_my_account(client=Depends(get_user_exchange_client)):
+    """Balances for the caller's own exchange keys (JWT)."""
+    return await _balances(client)
+
+
+@router.get("/me/orders/open", response_model=OpenOrdersResponse)
+async def my_open_orders(symbol: Optional[str] = None, client=Depends(get_user_exchange_client)):
+    """Open orders on the caller's own exchange account (JWT)."""
+    try:
+        orders = await client.get_open_orders(symbol=symbol)
+    except ExchangeBusy:
+        raise
+    except Exception as exc:
+        log.exception("get_open_orders failed")
+        raise HTTPException(status_code=502, detail=str(exc))
+    return OpenOrdersResponse(value=orders, count=len(orders))
+
+
 @router.get("/orders/open", response_model=OpenOrdersResponse, dependencies=[Depends(require_admin)])
-def open_orders(request: Request, symbol: Optional[str] = None):
+async def open_orders(request: Request, symbol: Optional[str] = None):
     """Get all open orders, optionally filtered by symbol."""
     client = _get_client(request)
     try:
-        orders = client.get_open_orders(symbol=symbol)
+        orders = await client.get_open_orders(symbol=symbol)
+    except ExchangeBusy:
+        raise
     except Exception as exc:
         log.exception("get_open_orders failed")
         raise HTTPException(status_code=502, detail=str(exc))
@@ -48,33 +75,39 @@ def open_orders(request: Request, symbol: Optional[str] = None):
 
 
 @router.get("/orders/{symbol}/{order_id}", dependencies=[Depends(require_admin)])
-def get_order(symbol: str, order_id: int, request: Request):
+async def get_order(symbol: str, order_id: int, request: Request):
     """Get a specific order by symbol and order ID."""
     client = _get_client(request)
     try:
-        return client.get_order(symbol.upper(), order_id)
+        return await client.get_order(symbol.upper(), order_id)
+    except ExchangeBusy:
+        raise
     except Exception as exc:
         log.exception("get_order failed")
         raise HTTPException(status_code=502, detail=str(exc))
 
 
 @router.delete("/orders/{symbol}/{order_id}", dependencies=[Depends(require_admin)])
-def cancel_order(symbol: str, order_id: int, request: Request):
+async def cancel_order(symbol: str, order_id: int, request: Request):
     """Cancel an open order."""
     client = _get_client(request)
     try:
-        return client.cancel_order(symbol.upper(), order_id)
+        return await client.cancel_order(symbol.upper(), order_id)
+    except ExchangeBusy:
+        raise
     except Exception as exc:
         log.exception("cancel_order failed")
         raise HTTPException(status_code=502, detail=str(exc))
 
 
 @router.get("/trades/{symbol}", dependencies=[Depends(require_admin)])
-def trade_history_exchange(symbol: str, request: Request, limit: int = 50):
+async def trade_history_exchange(symbol: str, request: Request, limit: int = 50):
     """Get trade history from the exchange for a symbol."""
     client = _get_client(request)
     try:
-        return client.get_trade_history(symbol.upper(), limit)
+        return await client.get_trade_history(symbol.upper(), limit)
+    except ExchangeBusy:
+        raise
     except Exception as exc:
         log.exception("get_trade_history failed")
         raise HTTPException(status_code=502, detail=str(exc))
@@ -0,0 +1,45 @@
+# backend/api/analytics.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from backend.api.deps import require_admin
+from backend.models.db import get_db
+from backend.services import analytics
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/summary")
+def summary(db: Session = Depends(get_db)):
+    """All-time totals, today, trades in the last 24h and per-symbol rollups."""
+    return analytics.summary(db)
+
+
+@router.get("/daily")
+def daily(days: int = 30, symbol: Optional[str] = None, db: Session = Depends(get_db)):
+    """Per-day volume / PnL / fees, optionally for one symbol."""
+    return analytics.daily(db, max(1, min(days, 3660)), symbol)
+
+
+@router.get("/rollups/{scope}")
+def rollups(scope: str, start: Optional[str] = None, end: Optional[str] = None,
+            prefix: Optional[str] = None, db: Session = Depends(get_db)):
+    """Raw rollup rows for one scope (symbol, day, hour, user, symbol_day), keys in [start, end]."""
+    try:
+        return analytics.rollups(db, scope, start, end, prefix)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get("/positions")
+def positions(user_id: Optional[int] = None, open_only: bool = False, db: Session = Depends(get_db)):
+    """Average-cost positions with realized PnL and fees."""
+    return analytics.positions(db, user_id, open_only)
+
+
+@router.post("/rebuild")
+def rebuild(db: Session = Depends(get_db)):
+    """Recompute all rollups and positions from the trades table."""
+    return {"trades": analytics.rebuild(db)}
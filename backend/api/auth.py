@@ -7,13 +7,17 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr, Field, validator
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from backend.models.db import get_db, User
 from backend.services.auth_service import (
-    authenticate_user, create_user, create_access_token, create_refresh_token,
+    create_user, create_access_token, create_refresh_token,
     decode_token, get_user_by_email, get_user_by_id, get_user_by_username,
-    generate_reset_token, reset_password, encrypt, decrypt,
+    generate_reset_token, get_user_by_reset_token, reset_password, encrypt, decrypt,
 )
+from backend.services.auth_cache import Principal, decode_token_cached, get_principal
+from backend.services.password_hasher import password_hasher
+from backend.services.user_clients import check_base_url, user_clients
 from backend.config import settings
 
 log = logging.getLogger(__name__)
@@ -74,6 +78,10 @@ class ApiKeysRequest(BaseModel):
     api_secret: str = Field(..., min_length=10)
     api_base_url: str = "https://testnet.binance.vision"
 
+    @validator("api_base_url")
+    def allowed_url(cls, v):
+        return check_base_url(v)
+
 
 class GeminiKeyRequest(BaseModel):
     gemini_api_key: str = Field(..., min_length=10)
@@ -86,36 +94,53 @@ class RefreshRequest(BaseModel):
 
 # ── Dependency: get current user from JWT ─────────────────────────────────────
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    payload = decode_token(token)
+def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    """Cached principal — no DB round-trip while the user's cache entry is fresh."""
+    payload = decode_token_cached(token)
     if not payload or payload.get("type") != "access":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail="Invalid or expired token",
                             headers={"WWW-Authenticate": "Bearer"})
-    user = get_user_by_id(db, int(payload.get("sub", 0)))
+    user = get_principal(int(payload.get("sub", 0)))
+    if not user or not user.is_active:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
+    return user
+
+
+def get_current_user_for_update(principal: Principal = Depends(get_current_user),
+                                db: Session = Depends(get_db)) -> User:
+    """The authenticated user as a row in this request's session, for handlers that modify it."""
+    user = get_user_by_id(db, principal.id)
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
     return user
 
 
-def get_current_admin(user: User = Depends(get_current_user)) -> User:
+def get_current_admin(user: Principal = Depends(get_current_user)) -> Principal:
     if not user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     return user
 
 
 # ── Endpoints ─────────────────────────────────────────────────────────────────
+# Password routes are async: DB work goes to the threadpool, bcrypt to the
+# password_hasher executor (503 via HashingBusy when it is saturated).
 
-@router.post("/register", response_model=TokenResponse, status_code=201)
-def register(req: RegisterRequest, db: Session = Depends(get_db)):
+def _check_new_user(db: Session, req: RegisterRequest) -> bool:
+    """Validate uniqueness; returns whether the new user becomes admin."""
     if get_user_by_email(db, req.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     if get_user_by_username(db, req.username):
         raise HTTPException(status_code=400, detail="Username already taken")
-
     # First user becomes admin
-    is_admin = db.query(User).count() == 0
-    user = create_user(db, req.email, req.username, req.password, is_admin=is_admin)
+    return db.query(User).count() == 0
+
+
+@router.post("/register", response_model=TokenResponse, status_code=201)
+async def register(req: RegisterRequest, db: Session = Depends(get_db)):
+    is_admin = await run_in_threadpool(_check_new_user, db, req)
+    password_hash = await password_hasher.hash(req.password)
+    user = await run_in_threadpool(create_user, db, req.email, req.username, password_hash, is_admin)
     log.info("New user registered: %s (admin=%s)", user.email, is_admin)
 
     access  = create_access_token({"sub": str(user.id)})
@@ -126,14 +151,19 @@ def register(req: RegisterRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form.username, form.password)
-    if not user:
+async def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(get_user_by_email, db, form.username)
+    ok, new_hash = await password_hasher.verify(form.password, user.hashed_password) if user else (False, None)
+    if not ok:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail="Incorrect email or password",
                             headers={"WWW-Authenticate": "Bearer"})
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Account disabled")
+    if new_hash:
+        user.hashed_password = new_hash
+        await run_in_threadpool(db.commit)
+        log.info("Rehashed password for %s at %d rounds", user.email, settings.BCRYPT_ROUNDS)
 
     access  = create_access_token({"sub": str(user.id)})
     refresh = create_refresh_token({"sub": str(user.id)})
@@ -159,7 +189,7 @@ def refresh_token(req: RefreshRequest, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserOut)
-def me(user: User = Depends(get_current_user)):
+def me(user: Principal = Depends(get_current_user)):
     return UserOut(id=user.id, email=user.email, username=user.username,
                    is_admin=user.is_admin,
                    has_exchange_keys=bool(user.enc_api_key),
@@ -180,22 +210,24 @@ def forgot_password(req: ForgotPasswordRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/reset-password")
-def reset_pwd(req: ResetPasswordRequest, db: Session = Depends(get_db)):
-    ok = reset_password(db, req.token, req.new_password)
-    if not ok:
+async def reset_pwd(req: ResetPasswordRequest, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(get_user_by_reset_token, db, req.token)
+    if not user:
         raise HTTPException(status_code=400, detail="Invalid or expired reset token")
+    password_hash = await password_hasher.hash(req.new_password)
+    await run_in_threadpool(reset_password, db, user, password_hash)
     return {"message": "Password reset successfully"}
 
 
 @router.post("/change-password")
-def change_password(req: ChangePasswordRequest,
-                    user: User = Depends(get_current_user),
-                    db: Session = Depends(get_db)):
-    from backend.services.auth_service import verify_password, hash_password
-    if not verify_password(req.current_password, user.hashed_password):
+async def change_password(req: ChangePasswordRequest,
+                          user: User = Depends(get_current_user_for_update),
+                          db: Session = Depends(get_db)):
+    ok, _ = await password_hasher.verify(req.current_password, user.hashed_password)
+    if not ok:
         raise HTTPException(status_code=400, detail="Current password is incorrect")
-    user.hashed_password = hash_password(req.new_password)
-    db.commit()
+    user.hashed_password = await password_hasher.hash(req.new_password)
+    await run_in_threadpool(db.commit)
     return {"message": "Password changed successfully"}
 
 
@@ -203,7 +235,7 @@ def change_password(req: ChangePasswordRequest,
 
 @router.post("/keys/exchange")
 def save_exchange_keys(req: ApiKeysRequest,
-                       user: User = Depends(get_current_user),
+                       user: User = Depends(get_current_user_for_update),
                        db: Session = Depends(get_db)):
     """Save encrypted Binance API keys for the current user."""
     try:
@@ -213,20 +245,22 @@ def save_exchange_keys(req: ApiKeysRequest,
         db.commit()
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Encryption failed: {exc}")
+    user_clients.invalidate(user.id)
     return {"message": "Exchange keys saved securely"}
 
 
 @router.delete("/keys/exchange")
-def delete_exchange_keys(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def delete_exchange_keys(user: User = Depends(get_current_user_for_update), db: Session = Depends(get_db)):
     user.enc_api_key = None
     user.enc_api_secret = None
     db.commit()
+    user_clients.invalidate(user.id)
     return {"message": "Exchange keys removed"}
 
 
 @router.post("/keys/gemini")
 def save_gemini_key(req: GeminiKeyRequest,
-                    user: User = Depends(get_current_user),
+                    user: User = Depends(get_current_user_for_update),
                     db: Session = Depends(get_db)):
     """Save encrypted Gemini API key for the current user."""
     try:
@@ -239,14 +273,14 @@ def save_gemini_key(req: GeminiKeyRequest,
 
 
 @router.delete("/keys/gemini")
-def delete_gemini_key(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def delete_gemini_key(user: User = Depends(get_current_user_for_update), db: Session = Depends(get_db)):
     user.enc_gemini_key = None
     db.commit()
     return {"message": "Gemini key removed"}
 
 
 @router.get("/keys/status")
-def keys_status(user: User = Depends(get_current_user)):
+def keys_status(user: Principal = Depends(get_current_user)):
     """Check which keys the user has stored."""
     return {
         "has_exchange_keys": bool(user.enc_api_key and user.enc_api_secret),
@@ -6,15 +6,19 @@ scheduled strategy runs, and risk management controls.
 import logging
 from typing import Any, Dict, List, Optional
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from backend.api.deps import require_admin
 from backend.config import settings
 from backend.models.db import get_db
-from backend.services.strategy_service import get_signal
+from backend.services import gemini
+from backend.services.model_router import model_router
+from backend.services.indicator_engine import engine
+from backend.services.kline_cache import kline_cache
+from backend.services.scanner import scan_symbols
 from backend.services.trader_service import run_signal_and_place, save_trade
 
 log = logging.getLogger(__name__)
@@ -59,34 +63,46 @@ def _get_client(request: Request):
     return c
 
 
-async def _ask_gemini(prompt: str) -> str:
-    """Call Gemini with fallback — returns plain text answer."""
-    if not settings.GEMINI_API_KEY:
-        return "AI analysis unavailable — GEMINI_API_KEY not set."
+def _get_async_client(request: Request):
+    c = getattr(request.app.state, "async_exchange_client", None)
+    if c is None:
+        raise HTTPException(status_code=503, detail="Exchange client not ready")
+    return c
+
+
+_ANALYST_PROMPT = ("You are a professional crypto trading analyst. Analyze the live market data you are given "
+                   "and provide a concise trading recommendation.")
 
-    models = [
+
+def _analyst_models() -> List[str]:
+    return list(dict.fromkeys([
         settings.GEMINI_MODEL or "gemini-2.5-flash-lite",
         "gemini-2.5-flash-lite",
         "gemini-2.0-flash",
         "gemini-2.5-flash",
-    ]
-    messages = [{"role": "user", "parts": [{"text": prompt}]}]
+    ]))
 
-    async with httpx.AsyncClient(timeout=30.0) as http:
-        for model in models:
-            try:
-                r = await http.post(
-                    f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent",
-                    json={"contents": messages},
-                    params={"key": settings.GEMINI_API_KEY},
-                )
-                if r.status_code == 200:
-                    data = r.json()
-                    parts = data["candidates"][0]["content"]["parts"]
-                    return " ".join(p["text"] for p in parts if "text" in p)
-            except Exception:
-                continue
-    return "AI analysis temporarily unavailable."
+
+async def _generate_text(model: str, contents: List[Dict[str, Any]], system: Optional[str]) -> str:
+    """Router transport that parses the reply, so a blocked or malformed answer counts as a failure."""
+    data = await model_router.transport(model, contents, system)
+    try:
+        parts = data["candidates"][0]["content"]["parts"]
+    except (KeyError, IndexError, TypeError):
+        reason = (data.get("promptFeedback") or {}).get("blockReason") if isinstance(data, dict) else None
+        raise ValueError(f"Unusable reply from {model}" + (f" (blocked: {reason})" if reason else ""))
+    text = " ".join(p["text"] for p in parts if "text" in p).strip()
+    if not text:
+        raise ValueError(f"Empty reply from {model}")
+    return text
+
+
+async def _ask_gemini(prompt: str) -> str:
+    """Call Gemini through the model router — returns plain text answer; raises if every model fails."""
+    messages = [{"role": "user", "parts": [{"text": prompt}]}]
+    text, _ = await model_router.call(_analyst_models(), messages, system=_ANALYST_PROMPT,
+                                      transport=_generate_text)
+    return text
 
 
 # ── Endpoints ─────────────────────────────────────────────────────────────────
@@ -97,24 +113,18 @@ async def multi_symbol_scan(req: MultiSignalRequest, request: Request):
     Scan multiple symbols at once and return signals for all.
     Useful for finding the best opportunity across your watchlist.
     """
-    client = _get_client(request)
-    results = []
-    for sym in req.symbols[:20]:  # cap at 20
-        try:
-            klines = client.get_klines(sym, req.interval, 100)
-            sig = get_signal(klines)
-            results.append({"symbol": sym, **sig})
-        except Exception as exc:
-            results.append({"symbol": sym, "signal": "ERROR", "reason": str(exc)})
+    client = _get_async_client(request)
+    results = await scan_symbols(client, req.symbols[:20], req.interval, 100)  # cap at 20
 
     # Sort: BUY first, then SELL, then HOLD
-    order = {"BUY": 0, "SELL": 1, "HOLD": 2, "ERROR": 3}
+    order = {"BUY": 0, "SELL": 1, "HOLD": 2, "ERROR": 3, "TIMEOUT": 4}
     results.sort(key=lambda x: order.get(x["signal"], 3))
-    return {"interval": req.interval, "count": len(results), "results": results}
+    partial = any(r["signal"] == "TIMEOUT" for r in results)
+    return {"interval": req.interval, "count": len(results), "partial": partial, "results": results}
 
 
 @router.post("/auto-trade", dependencies=[Depends(require_admin)])
-async def auto_trade(cfg: AutoTradeConfig, request: Request, db: Session = Depends(get_db)):
+async def auto_trade(cfg: AutoTradeConfig, request: Request):
     """
     Run strategy signal and auto-place order if signal is BUY or SELL.
     Respects DRY_RUN unless dry_run_override is set.
@@ -127,8 +137,9 @@ async def auto_trade(cfg: AutoTradeConfig, request: Request, db: Session = Depen
         settings.DRY_RUN = cfg.dry_run_override  # type: ignore
 
     try:
-        result = run_signal_and_place(
-            db=db,
+        result = await run_in_threadpool(
+            run_signal_and_place,
+            db=None,
             client=client,
             symbol=cfg.symbol,
             interval=cfg.interval,
@@ -146,20 +157,18 @@ async def ai_analysis(req: AIAnalysisRequest, request: Request):
     Get AI-powered market analysis for a symbol.
     Combines live signal data with Gemini's market insight.
     """
-    client = _get_client(request)
+    client = _get_async_client(request)
 
     signal_data: Dict[str, Any] = {}
     if req.include_signal:
         try:
-            klines = client.get_klines(req.symbol, req.interval, 100)
-            signal_data = get_signal(klines)
+            klines = await kline_cache.aget_klines(client, req.symbol, req.interval, 100)
+            signal_data = engine.get_signal(req.symbol, req.interval, klines)
         except Exception as exc:
             signal_data = {"error": str(exc)}
 
     # Build a rich prompt with live data
-    prompt = f"""You are a professional crypto trading analyst. Analyze the following live market data and provide a concise trading recommendation.
-
-Symbol: {req.symbol}
+    prompt = f"""Symbol: {req.symbol}
 Interval: {req.interval}
 Current Signal: {signal_data.get('signal', 'N/A')}
 Current Price: {signal_data.get('price', 'N/A')}
@@ -179,7 +188,16 @@ Provide:
 
 Keep response under 200 words. Be direct and actionable."""
 
-    analysis = await _ask_gemini(prompt)
+    if not settings.GEMINI_API_KEY:
+        analysis = "AI analysis unavailable — GEMINI_API_KEY not set."
+    else:
+        # The signal values are in the prompt; within one candle they repeat, so the answer is reused
+        key = gemini.cache_key(_analyst_models()[0], prompt)
+        try:
+            analysis, _ = await gemini.response_cache.get_or_call(key, lambda: _ask_gemini(prompt))
+        except Exception as exc:
+            log.warning("AI analysis failed: %s", exc)
+            analysis = "AI analysis temporarily unavailable."
 
     return {
         "symbol": req.symbol,
@@ -244,24 +262,15 @@ async def automation_summary(request: Request, db: Session = Depends(get_db)):
     """
     Dashboard summary: scan top 5 symbols + poller status + recent trade count.
     """
-    client = _get_client(request)
+    client = _get_async_client(request)
     poller = request.app.state.poller
 
     # Quick scan of top 5
     top_symbols = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT", "XRPUSDT"]
-    signals = []
-    for sym in top_symbols:
-        try:
-            klines = client.get_klines(sym, "1m", 100)
-            sig = get_signal(klines)
-            signals.append({"symbol": sym, **sig})
-        except Exception:
-            signals.append({"symbol": sym, "signal": "ERROR"})
-
-    from backend.models.db import Trade
-    from datetime import datetime, timedelta
-    since = datetime.utcnow() - timedelta(hours=24)
-    recent_trades = db.query(Trade).filter(Trade.timestamp >= since).count()
+    signals = await scan_symbols(client, top_symbols, "1m", 100)
+
+    from backend.services.analytics import recent_trades as count_recent
+    recent_trades = count_recent(db, 24)
 
     return {
         "poller_running": poller.is_running if poller else False,
@@ -1,17 +1,18 @@
 # backend/api/chat.py
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List
 
-import httpx
 from fastapi import APIRouter, HTTPException
 
 from backend.schemas import ChatRequest, ChatResponse
 from backend.config import settings
+from backend.services import gemini
+from backend.services.model_router import AllModelsFailed, model_router
 
 log = logging.getLogger(__name__)
 router = APIRouter(prefix="/chat", tags=["AI Assistant"])
 
-# Fallback chain — tried in order until one succeeds
+# Fallback chain in preference order — the model router skips unhealthy models and hedges slow ones
 _MODEL_FALLBACKS = [
     "gemini-2.5-flash-lite",
     "gemini-2.0-flash",
@@ -53,67 +54,38 @@ def _extract_text(resp_json: Dict[str, Any]) -> str:
     return str(resp_json)
 
 
-async def _call_model(model: str, messages: List[Dict], api_key: str) -> Dict[str, Any]:
-    """Call a specific Gemini model. Key goes as query param."""
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
-    payload = {"contents": messages}
-    async with httpx.AsyncClient(timeout=30.0) as http:
-        r = await http.post(url, json=payload, params={"key": api_key})
-        r.raise_for_status()
-        return r.json()
+def _models() -> List[str]:
+    """Configured model first, then fallbacks."""
+    configured = settings.GEMINI_MODEL or "gemini-2.5-flash"
+    return [configured] + [m for m in _MODEL_FALLBACKS if m != configured]
 
 
 async def _call_gemini_with_fallback(prompt: str) -> tuple[Dict[str, Any], str]:
-    """Try each model in the fallback chain, return (response, model_used)."""
+    """Route across the fallback chain (health-ordered, hedged); return (response, model_used)."""
     if not settings.GEMINI_API_KEY:
         raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
 
-    # Build message list with system context injected as first user turn
-    messages = [
-        {"role": "user",  "parts": [{"text": _SYSTEM_PROMPT}]},
-        {"role": "model", "parts": [{"text": "Understood. I'm ready to assist with crypto trading analysis and strategy."}]},
-        {"role": "user",  "parts": [{"text": prompt}]},
-    ]
-
-    # Build model list: configured model first, then fallbacks
-    configured = settings.GEMINI_MODEL or "gemini-2.5-flash"
-    models = [configured] + [m for m in _MODEL_FALLBACKS if m != configured]
-
-    last_error: Optional[Exception] = None
-    for model in models:
-        try:
-            log.info("Trying Gemini model: %s", model)
-            resp = await _call_model(model, messages, settings.GEMINI_API_KEY)
-            log.info("Gemini success with model: %s", model)
-            return resp, model
-        except httpx.HTTPStatusError as exc:
-            status = exc.response.status_code
-            log.warning("Model %s failed with HTTP %d", model, status)
-            last_error = exc
-            if status == 429:
-                # Rate limited — try next model immediately
-                continue
-            if status in (404, 400):
-                # Model not found or bad request — try next
-                continue
-            # Other errors (5xx) — try next
-            continue
-        except Exception as exc:
-            log.warning("Model %s failed: %s", model, exc)
-            last_error = exc
-            continue
-
-    raise HTTPException(
-        status_code=502,
-        detail=f"All Gemini models failed. Last error: {last_error}"
-    )
+    messages = [{"role": "user", "parts": [{"text": prompt}]}]
+    try:
+        return await model_router.call(_models(), messages, system=_SYSTEM_PROMPT)
+    except AllModelsFailed as exc:
+        raise HTTPException(status_code=502, detail=str(exc))
 
 
 @router.post("", response_model=ChatResponse)
 async def chat(req: ChatRequest):
-    """Send a question to the Gemini AI assistant with automatic model fallback."""
+    """
+    Send a question to the Gemini AI assistant with automatic model fallback.
+    Repeated questions (same wording up to case/whitespace) are answered from
+    the response cache; ``raw.cached`` says which.
+    """
+    if not settings.GEMINI_API_KEY:
+        raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
+    prompt = req.q.strip()
+    key = gemini.cache_key(_models()[0], prompt)
     try:
-        resp, model_used = await _call_gemini_with_fallback(req.q.strip())
+        (resp, model_used), cached = await gemini.response_cache.get_or_call(
+            key, lambda: _call_gemini_with_fallback(prompt))
     except HTTPException:
         raise
     except Exception as exc:
@@ -121,7 +93,7 @@ async def chat(req: ChatRequest):
         raise HTTPException(status_code=500, detail=str(exc))
 
     answer = _extract_text(resp)
-    return ChatResponse(answer=answer, raw={"model_used": model_used, **resp})
+    return ChatResponse(answer=answer, raw={"model_used": model_used, "cached": cached, **resp})
 
 
 @router.get("/models", tags=["AI Assistant"])
@@ -129,13 +101,7 @@ async def list_models():
     """List available Gemini models for this API key."""
     if not settings.GEMINI_API_KEY:
         raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
-    async with httpx.AsyncClient(timeout=10.0) as http:
-        r = await http.get(
-            "https://generativelanguage.googleapis.com/v1beta/models",
-            params={"key": settings.GEMINI_API_KEY}
-        )
-        r.raise_for_status()
-        data = r.json()
+    data = await gemini.list_models()
     # Return only text-generation capable models
     models = [
         {"name": m["name"].replace("models/", ""), "displayName": m.get("displayName", "")}
@@ -143,3 +109,15 @@ async def list_models():
         if "generateContent" in m.get("supportedGenerationMethods", [])
     ]
     return {"models": models, "count": len(models)}
+
+
+@router.get("/cache/stats", tags=["AI Assistant"])
+def cache_stats():
+    """Gemini response cache hit/miss/coalesced counters (shared with /automation/ai-analysis)."""
+    return gemini.response_cache.stats()
+
+
+@router.get("/models/health", tags=["AI Assistant"])
+def models_health():
+    """Per-model latency percentiles, error rate and circuit state as seen by the router."""
+    return model_router.stats()
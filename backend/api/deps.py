@@ -2,10 +2,11 @@
 from typing import Optional
 from fastapi import Header, HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
 
 from backend.config import settings
-from backend.models.db import get_db, User
+from backend.services.auth_cache import Principal, principal_from_token
+from backend.services.async_exchange_client import AsyncExchangeClient
+from backend.services.user_clients import NoExchangeKeys, user_clients
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
@@ -16,26 +17,14 @@ def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
         raise HTTPException(status_code=401, detail="Unauthorized — invalid or missing X-Admin-Token")
 
 
-def get_current_user_optional(
-    token: Optional[str] = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> Optional[User]:
-    """Returns user if JWT valid, else None (for optional auth)."""
-    if not token:
-        return None
-    from backend.services.auth_service import decode_token, get_user_by_id
-    payload = decode_token(token)
-    if not payload or payload.get("type") != "access":
-        return None
-    return get_user_by_id(db, int(payload.get("sub", 0)))
-
-
-def require_user(
-    token: Optional[str] = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme)) -> Optional[Principal]:
+    """Returns user if JWT valid, else None (for optional auth). Served from the auth cache."""
+    return principal_from_token(token)
+
+
+def require_user(token: Optional[str] = Depends(oauth2_scheme)) -> Principal:
     """Require a valid JWT — raises 401 if not authenticated."""
-    user = get_current_user_optional(token, db)
+    user = get_current_user_optional(token)
     if not user:
         raise HTTPException(status_code=401, detail="Authentication required")
     if not user.is_active:
@@ -43,8 +32,18 @@ def require_user(
     return user
 
 
-def require_jwt_admin(user: User = Depends(require_user)) -> User:
+def require_jwt_admin(user: Principal = Depends(require_user)) -> Principal:
     """Require JWT + admin role."""
     if not user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     return user
+
+
+async def get_user_exchange_client(user: Principal = Depends(require_user)) -> AsyncExchangeClient:
+    """The caller's own pooled exchange client (keys decrypted once per client build)."""
+    try:
+        return user_clients.get(user)
+    except NoExchangeKeys as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Could not load exchange keys: {exc}")
@@ -0,0 +1,56 @@
+# backend/api/downloads.py
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from backend.api.deps import require_admin
+from backend.schemas import DownloadRequest
+
+router = APIRouter(prefix="/downloads", tags=["Downloads"], dependencies=[Depends(require_admin)])
+
+
+def _get_downloader(request: Request):
+    dl = getattr(request.app.state, "downloader", None)
+    if dl is None:
+        raise HTTPException(status_code=503, detail="Downloader not initialized")
+    return dl
+
+
+@router.post("")
+def start_download(req: DownloadRequest, request: Request):
+    """Start a bulk kline download into the local candle store."""
+    dl = _get_downloader(request)
+    try:
+        job = dl.submit(req.symbol, req.interval, req.start, req.end)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return job.progress()
+
+
+@router.get("")
+def list_downloads(request: Request):
+    """All download jobs, newest first, with progress."""
+    return _get_downloader(request).status()
+
+
+@router.get("/{job_id}")
+def download_status(job_id: str, request: Request):
+    job = _get_downloader(request).jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Download job not found")
+    return job.progress()
+
+
+@router.post("/{job_id}/cancel")
+def cancel_download(job_id: str, request: Request):
+    try:
+        return _get_downloader(request).cancel(job_id).progress()
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Download job not found")
+
+
+@router.post("/{job_id}/resume")
+def resume_download(job_id: str, request: Request):
+    """Resume a cancelled, failed or interrupted job from its checkpoint."""
+    try:
+        return _get_downloader(request).resume(job_id).progress()
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Download job not found")
@@ -0,0 +1,109 @@
+# backend/api/live.py
+import asyncio
+import json
+import logging
+from typing import Optional, Set
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from backend.config import settings
+from backend.services.broadcaster import broadcaster, parse_topics
+
+log = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/live", tags=["Live"])
+
+SEND_TIMEOUT = 10.0     # a client that can't take a frame for this long is disconnected
+
+
+def _topics(spec: Optional[str], admin_token: Optional[str]) -> Set[str]:
+    """Parse ``a,b,c``; trade events carry order details, so they need the admin token."""
+    topics = parse_topics((spec or "").split(","))
+    if any(t.split(":")[0] == "trade" for t in topics) and admin_token != settings.ADMIN_TOKEN:
+        raise PermissionError("Trade topics require the admin token")
+    return topics
+
+
+def _encode(event) -> str:
+    return json.dumps(event, separators=(",", ":"), default=str)
+
+
+@router.websocket("/ws")
+async def live_ws(ws: WebSocket, topics: Optional[str] = None, token: Optional[str] = None):
+    """
+    Push channel. Connect with ``?topics=ticker:BTCUSDT,signal,trade`` (and
+    ``token=<admin token>`` for trade events); send
+    ``{"subscribe": [...]}`` / ``{"unsubscribe": [...]}`` to change topics.
+    """
+    token = token or ws.headers.get("x-admin-token")
+    await ws.accept()
+    try:
+        sub = broadcaster.subscribe(_topics(topics, token))
+    except (ValueError, PermissionError) as exc:
+        await ws.send_text(_encode({"kind": "error", "detail": str(exc)}))
+        await ws.close(code=1008)
+        return
+
+    async def send() -> None:
+        async for event in sub.events():
+            await asyncio.wait_for(ws.send_text(_encode(event)), SEND_TIMEOUT)
+
+    async def receive() -> None:
+        while True:
+            msg = await ws.receive_json()
+            try:
+                add = _topics(",".join(msg.get("subscribe", [])), token)
+                sub.update(add, msg.get("unsubscribe", []))
+                await ws.send_text(_encode({"kind": "subscribed", "topics": sorted(sub.topics)}))
+            except (ValueError, PermissionError, AttributeError, TypeError) as exc:
+                await ws.send_text(_encode({"kind": "error", "detail": str(exc)}))
+
+    tasks = [asyncio.ensure_future(send()), asyncio.ensure_future(receive())]
+    try:
+        await ws.send_text(_encode({"kind": "subscribed", "topics": sorted(sub.topics)}))
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            exc = task.exception()
+            if exc is not None and not isinstance(exc, WebSocketDisconnect):
+                log.info("Live client %d closed: %r", sub.id, exc)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        broadcaster.unsubscribe(sub)
+
+
+@router.get("/sse")
+async def live_sse(request: Request, topics: Optional[str] = None, token: Optional[str] = None):
+    """Server-Sent Events variant of /live/ws for EventSource clients (topics fixed per connection)."""
+    try:
+        sub = broadcaster.subscribe(_topics(topics, token or request.headers.get("x-admin-token")))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except PermissionError as exc:
+        raise HTTPException(status_code=401, detail=str(exc))
+
+    async def stream():
+        try:
+            yield f"event: subscribed\ndata: {_encode(sorted(sub.topics))}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(sub.get(), settings.LIVE_PING_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                sub.sent += 1
+                yield f"event: {event['kind']}\ndata: {_encode(event)}\n\n"
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.get("/stats")
+def live_stats():
+    """Connected clients, shared upstreams and per-client drop counters."""
+    return broadcaster.stats()
@@ -1,53 +1,118 @@
 # backend/api/market.py
 from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+from typing import Optional
 
 from backend.schemas import KlinesResponse, TickerResponse, OrderBookResponse, SignalResponse
-from backend.services.strategy_service import get_signal
+from backend.services.candle_store import candle_store, closed_only
+from backend.services.indicator_engine import engine
+from backend.services.kline_cache import kline_cache
+from backend.services.rate_limiter import limiter
 
 router = APIRouter(prefix="/market", tags=["Market Data"])
 
 
 def _get_client(request: Request):
-    client = request.app.state.exchange_client
+    client = getattr(request.app.state, "async_exchange_client", None)
     if client is None:
         raise HTTPException(status_code=503, detail="Exchange client not ready")
     return client
 
 
 @router.get("/klines", response_model=KlinesResponse)
-def klines(request: Request, symbol: str, interval: str, limit: int = 50):
-    """Fetch OHLCV candlestick data."""
+async def klines(request: Request, symbol: str, interval: str, limit: int = 50,
+                 start_time: Optional[int] = None, end_time: Optional[int] = None):
+    """Fetch OHLCV candlestick data — from the local candle store when it covers the request."""
     client = _get_client(request)
-    data = client.get_klines(symbol, interval, limit)
+    try:
+        symbol, interval = candle_store.validate(symbol, interval)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if start_time is None and end_time is None:
+        data = await candle_store.aget_klines(client, symbol, interval, limit)
+    else:
+        series = candle_store.existing(symbol, interval)
+        data = None
+        if series is not None and end_time is not None:
+            data = await run_in_threadpool(series.covering, start_time, end_time, limit, start_time is None)
+        if data is None:
+            data = await client.get_klines(symbol, interval, limit, start_time=start_time, end_time=end_time)
+            await run_in_threadpool(candle_store.ingest, symbol, interval, closed_only(data))
     return KlinesResponse(symbol=symbol, interval=interval, count=len(data), data=data)
 
 
 @router.get("/ticker", response_model=TickerResponse)
-def ticker(request: Request, symbol: str):
+async def ticker(request: Request, symbol: str):
     """Get latest price for a symbol."""
     client = _get_client(request)
-    result = client.get_ticker_price(symbol)
+    result = await client.get_ticker_price(symbol)
     return TickerResponse(symbol=result["symbol"], price=result["price"])
 
 
 @router.get("/orderbook", response_model=OrderBookResponse)
-def order_book(request: Request, symbol: str, limit: int = 20):
-    """Get current order book depth."""
+async def order_book(request: Request, symbol: str, limit: int = 20):
+    """Get current order book depth — from the local book once it is in sync, REST until then."""
+    books = getattr(request.app.state, "order_books", None)
+    local = books.book(symbol) if books is not None else None
+    if local is not None and limit <= books.depth:
+        bids, asks = local.top(limit)
+        return OrderBookResponse(symbol=local.symbol, bids=bids, asks=asks)
     client = _get_client(request)
-    book = client.get_order_book(symbol, limit)
+    book = await client.get_order_book(symbol, limit)
     return OrderBookResponse(symbol=symbol, bids=book["bids"], asks=book["asks"])
 
 
+@router.get("/orderbook/features")
+async def order_book_features(request: Request, symbol: str, levels: int = 10):
+    """Best bid/ask, spread and top-``levels`` imbalance from the local book."""
+    books = getattr(request.app.state, "order_books", None)
+    if books is None:
+        raise HTTPException(status_code=503, detail="Order books not initialized")
+    local = books.book(symbol)
+    feats = local.features(levels) if local is not None else None
+    if feats is None:
+        # Not in sync yet, or one side of the book is empty
+        raise HTTPException(status_code=503, detail=f"{symbol.upper()} book is syncing — retry shortly")
+    return {"symbol": local.symbol, **feats}
+
+
+@router.get("/orderbook/status")
+def order_book_status(request: Request):
+    """Tracked books: sync state, level counts, resyncs."""
+    books = getattr(request.app.state, "order_books", None)
+    return books.stats() if books is not None else {}
+
+
 @router.get("/signal", response_model=SignalResponse)
-def signal(request: Request, symbol: str = "BTCUSDT", interval: str = "1m"):
+async def signal(request: Request, symbol: str = "BTCUSDT", interval: str = "1m"):
     """Run strategy and return current signal."""
     client = _get_client(request)
-    data = client.get_klines(symbol, interval, 100)
-    return get_signal(data)
+    data = await candle_store.aget_klines(client, symbol, interval, 100)
+    return engine.get_signal(symbol, interval, data)
 
 
 @router.get("/exchange-info")
-def exchange_info(request: Request, symbol: str = None):
+async def exchange_info(request: Request, symbol: str = None):
     """Get exchange/symbol trading rules."""
     client = _get_client(request)
-    return client.get_exchange_info(symbol)
+    return await client.get_exchange_info(symbol)
+
+
+@router.get("/cache/stats")
+def cache_stats():
+    """Kline cache hit/miss counters and occupancy."""
+    return kline_cache.stats()
+
+
+@router.get("/store")
+def store_stats(request: Request):
+    """Local candle store series and background sync state."""
+    sync = getattr(request.app.state, "candle_sync", None)
+    return sync.status() if sync else {"running": False, "store": candle_store.stats()}
+
+
+@router.get("/rate-limit")
+def rate_limit():
+    """Exchange request-weight / order-rate budget usage."""
+    return limiter.metrics()
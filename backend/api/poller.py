@@ -23,9 +23,21 @@ def poller_status(request: Request):
         running=p.is_running,
         symbol=settings.SYMBOL,
         interval_seconds=settings.POLL_INTERVAL,
+        source=p.source,
+        last_signal=p.last_signal,
+        jobs=p.status(),
     )
 
 
+@router.get("/stream")
+def stream_status(request: Request):
+    """Get websocket market-stream status and buffer sizes."""
+    stream = getattr(request.app.state, "market_stream", None)
+    if stream is None:
+        return {"enabled": False}
+    return {"enabled": True, **stream.status()}
+
+
 @router.post("/start", dependencies=[Depends(require_admin)])
 def poller_start(request: Request):
     """Start the background strategy poller."""
@@ -1,9 +1,13 @@
 # backend/api/trading.py
+import json
 import logging
+from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from backend.models.db import get_db, Trade
 from backend.schemas import (
@@ -11,10 +15,16 @@ from backend.schemas import (
     TradeHistoryResponse, TradeOut,
     SignalResponse,
 )
+from backend.services import trade_export, trade_history as trade_history_svc
+from backend.services.intervals import parse_time
 from backend.services.strategy_service import get_signal
+from backend.services.trade_journal import trade_journal
 from backend.services.trader_service import run_signal_and_place, save_trade
+from backend.services.async_exchange_client import AsyncExchangeClient
+from backend.services.rate_limiter import ExchangeBusy
+from backend.services.auth_cache import Principal
 from backend.config import settings
-from backend.api.deps import require_admin
+from backend.api.deps import get_user_exchange_client, require_admin, require_user
 
 log = logging.getLogger(__name__)
 router = APIRouter(prefix="/trading", tags=["Trading"])
@@ -27,11 +37,8 @@ def _get_client(request: Request):
     return client
 
 
-@router.post("/order", response_model=TradeResponse, dependencies=[Depends(require_admin)])
-def place_order(req: TradeRequest, request: Request, db: Session = Depends(get_db)):
-    """Place a market or limit order."""
-    client = _get_client(request)
-
+def _order_gate(req: TradeRequest):
+    """The order payload, plus the dry-run response to return instead of placing it (if any)."""
     payload = {
         "symbol": req.symbol,
         "side": req.side,
@@ -42,14 +49,24 @@ def place_order(req: TradeRequest, request: Request, db: Session = Depends(get_d
     }
 
     if not settings.USE_TEST_ORDER:
-        return TradeResponse(
+        return payload, TradeResponse(
             executed=False, dry_run=True, intended_payload=payload,
             exchange_result={"error": "USE_TEST_ORDER is False — live orders disabled"},
         )
 
     do_execute = (not settings.DRY_RUN) or req.force_execute
     if not do_execute:
-        return TradeResponse(executed=False, dry_run=True, intended_payload=payload)
+        return payload, TradeResponse(executed=False, dry_run=True, intended_payload=payload)
+    return payload, None
+
+
+@router.post("/order", response_model=TradeResponse, dependencies=[Depends(require_admin)])
+def place_order(req: TradeRequest, request: Request):
+    """Place a market or limit order."""
+    client = _get_client(request)
+    payload, skipped = _order_gate(req)
+    if skipped:
+        return skipped
 
     try:
         order_resp = client.create_order(
@@ -61,19 +78,66 @@ def place_order(req: TradeRequest, request: Request, db: Session = Depends(get_d
             time_in_force=req.timeInForce,
             test=True,
         )
+    except ExchangeBusy:
+        raise
     except Exception as exc:
         log.exception("Order placement failed")
         raise HTTPException(status_code=502, detail=str(exc))
 
     save_trade(
-        db,
+        None,
         symbol=req.symbol,
         side=req.side,
         quantity=req.quantity or 0,
         price=req.price,
         status="submitted",
         order_id=str(order_resp.get("orderId", "")),
-        details=str(order_resp),
+        details=json.dumps(order_resp),
+    )
+
+    return TradeResponse(
+        executed=True, dry_run=False,
+        intended_payload=payload, exchange_result=order_resp,
+    )
+
+
+@router.post("/me/order", response_model=TradeResponse)
+async def place_my_order(req: TradeRequest,
+                         user: Principal = Depends(require_user),
+                         client: AsyncExchangeClient = Depends(get_user_exchange_client)):
+    """Place an order with the caller's own exchange keys; the trade is journaled under their user id."""
+    payload, skipped = _order_gate(req)
+    if skipped:
+        return skipped
+
+    try:
+        order_resp = await client.create_order(
+            symbol=req.symbol,
+            side=req.side,
+            type=req.type,
+            quantity=req.quantity,
+            price=req.price,
+            time_in_force=req.timeInForce,
+            test=True,
+        )
+    except ExchangeBusy:
+        raise
+    except Exception as exc:
+        log.exception("Order placement failed for user %s", user.id)
+        raise HTTPException(status_code=502, detail=str(exc))
+
+    # Journal append (+ fsync) is blocking file IO — keep it off the event loop
+    await run_in_threadpool(
+        save_trade,
+        None,
+        symbol=req.symbol,
+        side=req.side,
+        quantity=req.quantity or 0,
+        price=req.price,
+        status="submitted",
+        order_id=str(order_resp.get("orderId", "")),
+        details=json.dumps(order_resp),
+        user_id=user.id,
     )
 
     return TradeResponse(
@@ -83,10 +147,10 @@ def place_order(req: TradeRequest, request: Request, db: Session = Depends(get_d
 
 
 @router.post("/run-now", response_model=SignalResponse, dependencies=[Depends(require_admin)])
-def run_now(request: Request, db: Session = Depends(get_db)):
+def run_now(request: Request):
     """Run strategy signal and optionally place order."""
     client = _get_client(request)
-    result = run_signal_and_place(db, client, symbol=settings.SYMBOL)
+    result = run_signal_and_place(None, client, symbol=settings.SYMBOL)
     return result
 
 
@@ -95,19 +159,34 @@ def trade_history(
     db: Session = Depends(get_db),
     symbol: Optional[str] = None,
     status: Optional[str] = None,
+    user_id: Optional[int] = None,
+    cursor: Optional[str] = None,
     page: int = 1,
     page_size: int = 20,
+    with_total: bool = True,
 ):
-    """Paginated trade history from the database."""
-    page_size = min(page_size, 100)
-    query = db.query(Trade)
-    if symbol:
-        query = query.filter(Trade.symbol == symbol.upper())
-    if status:
-        query = query.filter(Trade.status == status)
-    total = query.count()
-    items = query.order_by(Trade.timestamp.desc()).offset((page - 1) * page_size).limit(page_size).all()
-    return TradeHistoryResponse(total=total, page=page, page_size=page_size, items=items)
+    """
+    Trade history, newest first. Pass the previous response's ``next_cursor``
+    to continue; ``page`` without a cursor still works but falls back to OFFSET.
+    """
+    page_size = max(1, min(page_size, 100))
+    query = trade_history_svc.filtered(db, symbol, status, user_id)
+    if cursor:
+        try:
+            after = trade_history_svc.decode_cursor(cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        items, next_cursor = trade_history_svc.page(query, page_size, after)
+    elif page > 1:
+        items, next_cursor = trade_history_svc.page(query.offset((page - 1) * page_size), page_size)
+    else:
+        items, next_cursor = trade_history_svc.page(query, page_size)
+    total = None
+    if with_total:
+        key = (symbol.upper() if symbol else None, status, user_id)
+        total = trade_history_svc.count_cache.get(query, key)
+    return TradeHistoryResponse(total=total, page=page, page_size=page_size,
+                                items=items, next_cursor=next_cursor)
 
 
 @router.get("/history/{trade_id}", response_model=TradeOut, dependencies=[Depends(require_admin)])
@@ -117,3 +196,49 @@ def get_trade(trade_id: int, db: Session = Depends(get_db)):
     if not trade:
         raise HTTPException(status_code=404, detail="Trade not found")
     return trade
+
+
+@router.get("/history/receipt/{receipt}", response_model=TradeOut, dependencies=[Depends(require_admin)])
+def get_trade_by_receipt(receipt: str, db: Session = Depends(get_db)):
+    """Look up a trade by the journal receipt returned when it was placed — works before it is committed."""
+    trade = db.query(Trade).filter(Trade.receipt == receipt).first() or trade_journal.get(receipt)
+    if not trade:
+        raise HTTPException(status_code=404, detail="Trade not found")
+    return trade
+
+
+@router.get("/journal", dependencies=[Depends(require_admin)])
+def journal_stats():
+    """Write-behind trade journal: queue depth and flush stats."""
+    return trade_journal.stats()
+
+
+@router.get("/export", dependencies=[Depends(require_admin)])
+def export_trades(
+    format: str = "csv",
+    symbol: Optional[str] = None,
+    status: Optional[str] = None,
+    user_id: Optional[int] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+):
+    """
+    Stream the full (filtered) trade history as CSV, NDJSON or Parquet, newest
+    first. ``start`` / ``end`` take an ISO date/datetime (UTC) or ms epoch.
+    """
+    fmt = format.lower()
+    try:
+        body = trade_export.export(fmt, symbol, status, user_id, _utc(start), _utc(end))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except RuntimeError as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
+    filename = f"trades{'-' + symbol.upper() if symbol else ''}.{fmt}"
+    return StreamingResponse(body, media_type=trade_export.FORMATS[fmt],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+def _utc(value: Optional[str]) -> Optional[datetime]:
+    # Trade timestamps are stored as naive UTC
+    ms = parse_time(value)
+    return None if ms is None else datetime.fromtimestamp(ms / 1000, timezone.utc).replace(tzinfo=None)
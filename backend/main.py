@@ -1,8 +1,9 @@
 # backend/main.py
 import logging
+import time
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
@@ -10,6 +11,11 @@ from backend.config import settings
 from backend.logging_config import setup_logging
 from backend.models.db import init_db
 from backend.schemas import HealthResponse
+from backend.services.kline_cache import kline_cache
+from backend.services.metrics import HTTP_LATENCY, registry
+from backend.services.password_hasher import HashingBusy, password_hasher
+from backend.services.rate_limiter import ExchangeBusy, limiter as exchange_limiter
+from backend.services.trade_journal import trade_journal
 
 setup_logging()
 log = logging.getLogger(__name__)
@@ -25,10 +31,25 @@ app.add_middleware(CORSMiddleware, allow_origins=settings.ALLOWED_ORIGINS,
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
+    started = time.perf_counter()
     response = await call_next(request)
+    # Label by route template (/orders/{order_id}) so path params don't explode cardinality
+    route = request.scope.get("route")
+    HTTP_LATENCY.observe(time.perf_counter() - started, request.method,
+                         getattr(route, "path", "unmatched"), str(response.status_code))
     log.info("%s %s → %d", request.method, request.url.path, response.status_code)
     return response
 
+@app.exception_handler(ExchangeBusy)
+async def exchange_busy_handler(request: Request, exc: ExchangeBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)},
+                        headers={"Retry-After": str(max(1, int(exc.retry_after + 0.5)))})
+
+@app.exception_handler(HashingBusy)
+async def hashing_busy_handler(request: Request, exc: HashingBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)},
+                        headers={"Retry-After": str(max(1, int(exc.retry_after + 0.5)))})
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     log.exception("Unhandled exception on %s %s", request.method, request.url.path)
@@ -41,6 +62,9 @@ from backend.api.poller     import router as poller_router
 from backend.api.chat       import router as chat_router
 from backend.api.automation import router as automation_router
 from backend.api.auth       import router as auth_router
+from backend.api.downloads  import router as downloads_router
+from backend.api.analytics  import router as analytics_router
+from backend.api.live       import router as live_router
 
 app.include_router(auth_router,       prefix="/api/v1")
 app.include_router(market_router,     prefix="/api/v1")
@@ -49,32 +73,108 @@ app.include_router(account_router,    prefix="/api/v1")
 app.include_router(poller_router,     prefix="/api/v1")
 app.include_router(chat_router,       prefix="/api/v1")
 app.include_router(automation_router, prefix="/api/v1")
+app.include_router(downloads_router,  prefix="/api/v1")
+app.include_router(analytics_router,  prefix="/api/v1")
+app.include_router(live_router,       prefix="/api/v1")
 
 
 @app.on_event("startup")
 async def on_startup():
     init_db()
     log.info("Database initialized")
+    try:
+        from backend.models.db import SessionLocal
+        from backend.services.analytics import ensure_backfilled
+        with SessionLocal() as db:
+            ensure_backfilled(db)
+    except Exception:
+        log.exception("Analytics backfill failed")
+    trade_journal.start()
     try:
         from backend.services.exchange_client import ExchangeClient
         app.state.exchange_client = ExchangeClient()
     except Exception:
         log.exception("Failed to init ExchangeClient")
         app.state.exchange_client = None
+    try:
+        from backend.services.async_exchange_client import AsyncExchangeClient
+        app.state.async_exchange_client = AsyncExchangeClient()
+    except Exception:
+        log.exception("Failed to init AsyncExchangeClient")
+        app.state.async_exchange_client = None
+    app.state.order_books = None
+    if app.state.async_exchange_client:
+        try:
+            from backend.services.order_book import OrderBookManager
+            app.state.order_books = OrderBookManager(app.state.async_exchange_client)
+            for symbol in (settings.ORDERBOOK_SYMBOLS or "").split(","):
+                if symbol.strip():
+                    app.state.order_books.track(symbol.strip(), pinned=True)
+        except Exception:
+            log.exception("Failed to init OrderBookManager")
     try:
         from backend.services.poller import Poller
         app.state.poller = Poller(app.state.exchange_client) if app.state.exchange_client else None
+        if app.state.poller:
+            app.state.poller.order_books = app.state.order_books
     except Exception:
         log.exception("Failed to init Poller")
         app.state.poller = None
-    log.info("Startup complete — exchange=%s poller=%s env=%s",
-             app.state.exchange_client is not None, app.state.poller is not None, settings.ENV)
+    app.state.candle_sync = None
+    if settings.CANDLE_SYNC_ENABLED and app.state.exchange_client:
+        try:
+            from backend.services.candle_store import CandleSync, candle_store
+            app.state.candle_sync = CandleSync(app.state.exchange_client, candle_store)
+            app.state.candle_sync.start()
+        except Exception:
+            log.exception("Failed to start CandleSync")
+    app.state.downloader = None
+    if app.state.exchange_client:
+        try:
+            from backend.services.downloader import Downloader
+            app.state.downloader = Downloader(app.state.exchange_client)
+        except Exception:
+            log.exception("Failed to init Downloader")
+    app.state.market_stream = None
+    if settings.STREAM_ENABLED and app.state.exchange_client:
+        try:
+            from backend.services.market_stream import MarketStream
+            symbols = [s.strip() for s in (settings.STREAM_SYMBOLS or settings.SYMBOL).split(",") if s.strip()]
+            intervals = [i.strip() for i in settings.STREAM_INTERVALS.split(",") if i.strip()]
+            poller = app.state.poller
+            stream = MarketStream(app.state.exchange_client, symbols, intervals,
+                                  on_candle_close=poller.on_candle_close if poller else None)
+            if poller:
+                poller.stream = stream
+            stream.start()
+            app.state.market_stream = stream
+        except Exception:
+            log.exception("Failed to start MarketStream")
+    log.info("Startup complete — exchange=%s poller=%s stream=%s env=%s",
+             app.state.exchange_client is not None, app.state.poller is not None,
+             app.state.market_stream is not None, settings.ENV)
 
 
 @app.on_event("shutdown")
 async def on_shutdown():
     if getattr(app.state, "poller", None):
         app.state.poller.stop()
+    if getattr(app.state, "candle_sync", None):
+        app.state.candle_sync.stop()
+    if getattr(app.state, "market_stream", None):
+        await app.state.market_stream.stop()
+    if getattr(app.state, "order_books", None):
+        await app.state.order_books.stop()
+    from backend.services.broadcaster import broadcaster
+    await broadcaster.stop()
+    if getattr(app.state, "async_exchange_client", None):
+        await app.state.async_exchange_client.aclose()
+    from backend.services.user_clients import user_clients
+    await user_clients.close()
+    from backend.services import gemini
+    await gemini.aclose()
+    trade_journal.stop()
+    password_hasher.shutdown()
     log.info("Shutdown complete")
 
 
@@ -97,6 +197,19 @@ def health(request: Request):
                           db_connected=db_ok)
 
 
+registry.gauge("kline_cache", "Kline cache state and counters", ("field",),
+               lambda: {(k,): v for k, v in kline_cache.stats().items()})
+registry.gauge("exchange_rate_limit", "Exchange weight/order budget state", ("field",),
+               lambda: {(k,): v for k, v in exchange_limiter.metrics().items()})
+registry.gauge("poller_in_flight", "Poller jobs currently running", (),
+               lambda: {(): getattr(getattr(app.state, "poller", None), "_in_flight", None)})
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/", tags=["Health"])
 def root():
     return {"status": "ok", "docs": "/docs", "version": "2.0.0"}
@@ -1,18 +1,88 @@
 # backend/models/db.py
 import os
+import time
 from datetime import datetime
-from typing import Generator
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, Boolean
+from typing import Any, Dict, Generator
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, Float, DateTime, Text, Boolean, Index
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
+from sqlalchemy.pool import QueuePool, StaticPool
 from backend.config import settings
+from backend.services.metrics import DB_QUERY_LATENCY, DB_SESSION_LATENCY
 
-os.makedirs(os.path.join(os.path.abspath(os.getcwd()), "data"), exist_ok=True)
 
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False}, pool_pre_ping=True)
+def _database_url() -> str:
+    url = settings.DATABASE_URL
+    # Heroku/Render hand out postgres:// URLs, which SQLAlchemy 1.4 no longer accepts
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def _engine_kwargs(url: str) -> Dict[str, Any]:
+    """Pool settings per backend: a local SQLite file vs a networked server."""
+    u = make_url(url)
+    if u.get_backend_name() == "sqlite":
+        kwargs: Dict[str, Any] = {
+            "connect_args": {"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+        }
+        if not u.database or u.database == ":memory:":
+            # One shared connection, otherwise every checkout sees a fresh empty DB
+            kwargs["poolclass"] = StaticPool
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(u.database)), exist_ok=True)
+            # pysqlite defaults to NullPool for files, which reconnects (and re-runs the
+            # pragmas) on every session. Keep connections; no pre-ping for a local file.
+            kwargs.update(poolclass=QueuePool, pool_size=settings.DB_POOL_SIZE,
+                          max_overflow=settings.DB_MAX_OVERFLOW, pool_timeout=settings.DB_POOL_TIMEOUT)
+        return kwargs
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+engine = create_engine(_database_url(), **_engine_kwargs(_database_url()))
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, connection_record):
+        cur = dbapi_conn.cursor()
+        # WAL lets readers proceed while the journal flusher writes
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cur.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_MB * 1024}")
+        cur.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_MB * 1024 * 1024}")
+        cur.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.close()
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "?"
+    DB_QUERY_LATENCY.observe(time.perf_counter() - started, operation)
+
+
+@event.listens_for(engine, "handle_error")
+def _handle_error(context):
+    conn = context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
 class User(Base):
     __tablename__ = "users"
     id            = Column(Integer, primary_key=True, index=True)
@@ -46,15 +116,65 @@ class Trade(Base):
     status    = Column(String(32), default="submitted", index=True)
     order_id  = Column(String(64), nullable=True, index=True)
     details   = Column(Text, nullable=True)
+    receipt   = Column(String(32), nullable=True)    # trade journal's id for the record, for idempotent replay
+
+    # Keyset pagination walks (timestamp, id) descending, optionally within one filter
+    __table_args__ = (
+        Index("ix_trades_timestamp_id", "timestamp", "id"),
+        Index("ix_trades_symbol_timestamp_id", "symbol", "timestamp", "id"),
+        Index("ix_trades_status_timestamp_id", "status", "timestamp", "id"),
+        Index("ix_trades_user_timestamp_id", "user_id", "timestamp", "id"),
+        Index("ix_trades_receipt", "receipt", unique=True),
+    )
+
+
+class TradeRollup(Base):
+    """Running totals per scope/key, maintained by backend.services.analytics as trades are written."""
+    __tablename__ = "trade_rollups"
+    scope         = Column(String(16), primary_key=True)    # symbol | day | hour | user | symbol_day
+    key           = Column(String(64), primary_key=True)    # e.g. "BTCUSDT", "2025-01-31", "BTCUSDT|2025-01-31"
+    trades        = Column(Integer, default=0, nullable=False)
+    buys          = Column(Integer, default=0, nullable=False)
+    sells         = Column(Integer, default=0, nullable=False)
+    base_volume   = Column(Float, default=0.0, nullable=False)
+    quote_volume  = Column(Float, default=0.0, nullable=False)
+    realized_pnl  = Column(Float, default=0.0, nullable=False)
+    fees          = Column(Float, default=0.0, nullable=False)
+    first_trade_at = Column(DateTime, nullable=True)
+    last_trade_at  = Column(DateTime, nullable=True)
+
+
+class Position(Base):
+    """Average-cost spot position per user (0 = unattributed) and symbol."""
+    __tablename__ = "positions"
+    user_id       = Column(Integer, primary_key=True)
+    symbol        = Column(String(32), primary_key=True)
+    quantity      = Column(Float, default=0.0, nullable=False)
+    avg_price     = Column(Float, default=0.0, nullable=False)
+    realized_pnl  = Column(Float, default=0.0, nullable=False)
+    fees          = Column(Float, default=0.0, nullable=False)
+    updated_at    = Column(DateTime, nullable=True)
 
 
 def init_db() -> None:
     Base.metadata.create_all(bind=engine)
+    # create_all skips existing tables entirely, so add nullable columns and indexes introduced since
+    existing = {t: {c["name"] for c in inspect(engine).get_columns(t.name)} for t in Base.metadata.sorted_tables}
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            if column.name not in existing[table] and column.nullable:
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                                      f"{column.type.compile(engine.dialect)}"))
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
+    started = time.perf_counter()
     try:
         yield db
     finally:
         db.close()
+        DB_SESSION_LATENCY.observe(time.perf_counter() - started)
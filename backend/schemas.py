@@ -61,7 +61,8 @@ class TradeResponse(BaseModel):
 
 
 class TradeOut(BaseModel):
-    id: int
+    id: Optional[int]           # None until the journal has committed the trade
+    receipt: Optional[str]
     timestamp: datetime
     symbol: str
     side: str
@@ -76,10 +77,11 @@ class TradeOut(BaseModel):
 
 
 class TradeHistoryResponse(BaseModel):
-    total: int
+    total: Optional[int]            # cached for HISTORY_COUNT_TTL_SECONDS; None when with_total=false
     page: int
     page_size: int
     items: List[TradeOut]
+    next_cursor: Optional[str] = None
 
 
 class AccountResponse(BaseModel):
@@ -96,6 +98,16 @@ class PollerStatusResponse(BaseModel):
     running: bool
     symbol: str
     interval_seconds: int
+    source: str = "rest"
+    last_signal: Optional[Dict[str, Any]] = None
+    jobs: List[Dict[str, Any]] = []
+
+
+class DownloadRequest(BaseModel):
+    symbol: str
+    interval: str = "1m"
+    start: str = Field(..., description="ISO date/datetime or ms epoch")
+    end: Optional[str] = Field(None, description="ISO date/datetime or ms epoch; defaults to now")
 
 
 class ChatRequest(BaseModel):
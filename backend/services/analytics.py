@@ -0,0 +1,289 @@
+# backend/services/analytics.py
+"""
+Trade analytics from incrementally maintained rollups.
+
+Every batch the trade journal commits is folded into trade_rollups (per symbol,
+day, hour, user and symbol+day: counts, volume, realized PnL, fees) and into
+average-cost positions, inside the same transaction as the trade rows — so a
+rollup can never count a trade the trades table doesn't have, or count it
+twice on replay. Dashboard reads are primary-key lookups or scans over a
+handful of rollup rows; nothing here reads the trades table except rebuild().
+
+Writes are safe with several writer processes: rollups are upserted with
+``SET x = x + :delta`` in SQL, and positions (average cost depends on order)
+are read ``FOR UPDATE`` after an insert-if-missing, which also takes SQLite's
+write lock before anything is read.
+
+Fees come from the order's fills when the exchange reported them in the quote
+or base asset, otherwise they are estimated at TRADE_FEE_BPS of notional.
+"""
+import ast
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from backend.config import settings
+from backend.models.db import Position, Trade, TradeRollup
+
+log = logging.getLogger(__name__)
+
+SCOPES = ("symbol", "day", "hour", "user", "symbol_day")
+EXCLUDED_STATUSES = {"rejected", "canceled", "cancelled", "expired", "error", "failed"}
+_DUST = 1e-12
+
+write_lock = threading.RLock()  # keeps this process's flushes out of rebuild(); other writers are safe via SQL
+_SUMS = ("trades", "buys", "sells", "base_volume", "quote_volume", "realized_pnl", "fees")
+
+
+def _keys(trade: Mapping[str, Any]) -> List[Tuple[str, str]]:
+    ts: datetime = trade["timestamp"]
+    day = ts.strftime("%Y-%m-%d")
+    symbol = trade["symbol"]
+    return [
+        ("symbol", symbol),
+        ("day", day),
+        ("hour", ts.strftime("%Y-%m-%dT%H")),
+        ("user", str(trade.get("user_id") or 0)),
+        ("symbol_day", f"{symbol}|{day}"),
+    ]
+
+
+def _details(details: str) -> Any:
+    try:
+        return json.loads(details)
+    except ValueError:
+        # Older manual orders stored str(order_resp), a Python repr
+        return ast.literal_eval(details)
+
+
+def _fee(trade: Mapping[str, Any], notional: float) -> float:
+    details = trade.get("details")
+    if details and "fills" in details:
+        try:
+            fills = _details(details).get("fills") or []
+            symbol = trade["symbol"]
+            fee = 0.0
+            for f in fills:
+                asset, commission = f.get("commissionAsset", ""), float(f.get("commission", 0))
+                if asset and symbol.endswith(asset):
+                    fee += commission
+                elif asset and symbol.startswith(asset):
+                    fee += commission * float(f.get("price", 0))
+                else:
+                    break       # e.g. paid in BNB — no price to convert with
+            else:
+                return fee
+        except (ValueError, TypeError, AttributeError, SyntaxError):
+            pass
+    return notional * settings.TRADE_FEE_BPS / 10_000
+
+
+def _insert(db: Session):
+    """The dialect's INSERT with ON CONFLICT support."""
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        return postgresql.insert
+    if name == "sqlite":
+        return sqlite.insert
+    raise RuntimeError(f"Analytics rollups need an upsert-capable database, not {name}")
+
+
+class _Batch:
+    """Locked positions and summed rollup deltas for one apply() call."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.insert = _insert(db)
+        self.rollups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.positions: Dict[Tuple[int, str], Position] = {}
+
+    def rollup(self, scope: str, key: str) -> Dict[str, Any]:
+        delta = self.rollups.get((scope, key))
+        if delta is None:
+            delta = self.rollups[(scope, key)] = {f: 0 for f in _SUMS}
+            delta.update(scope=scope, key=key, first_trade_at=None, last_trade_at=None)
+        return delta
+
+    def position(self, user_id: int, symbol: str) -> Position:
+        pos = self.positions.get((user_id, symbol))
+        if pos is None:
+            self.db.execute(self.insert(Position.__table__).values(
+                user_id=user_id, symbol=symbol, quantity=0.0, avg_price=0.0, realized_pnl=0.0, fees=0.0,
+            ).on_conflict_do_nothing(index_elements=["user_id", "symbol"]))
+            pos = (self.db.query(Position).filter_by(user_id=user_id, symbol=symbol)
+                   .with_for_update().populate_existing().one())
+            self.positions[(user_id, symbol)] = pos
+        return pos
+
+    def write_rollups(self) -> None:
+        table = TradeRollup.__table__
+        least = func.least if self.db.get_bind().dialect.name == "postgresql" else func.min
+        greatest = func.greatest if self.db.get_bind().dialect.name == "postgresql" else func.max
+        for delta in self.rollups.values():
+            stmt = self.insert(table).values(**delta)
+            self.db.execute(stmt.on_conflict_do_update(
+                index_elements=["scope", "key"],
+                set_={
+                    **{f: table.c[f] + stmt.excluded[f] for f in _SUMS},
+                    "first_trade_at": least(func.coalesce(table.c.first_trade_at, stmt.excluded.first_trade_at),
+                                            stmt.excluded.first_trade_at),
+                    "last_trade_at": greatest(func.coalesce(table.c.last_trade_at, stmt.excluded.last_trade_at),
+                                              stmt.excluded.last_trade_at),
+                },
+            ))
+
+
+def apply(db: Session, trades: Iterable[Mapping[str, Any]]) -> None:
+    """Fold newly inserted trades, in the order they happened, into the rollups; the caller commits."""
+    with write_lock:
+        batch = _Batch(db)
+        for t in trades:
+            if (t.get("status") or "").lower() in EXCLUDED_STATUSES:
+                continue
+            _apply_one(batch, t)
+        db.flush()
+        batch.write_rollups()
+
+
+def _apply_one(batch: _Batch, t: Mapping[str, Any]) -> None:
+    side = (t.get("side") or "").upper()
+    qty = float(t.get("quantity") or 0)
+    price = t.get("price")
+    notional = qty * price if price else 0.0
+    fee = _fee(t, notional) if price else 0.0
+
+    realized = 0.0
+    pos = batch.position(t.get("user_id") or 0, t["symbol"])
+    if price:
+        if side == "BUY":
+            held = pos.quantity + qty
+            pos.avg_price = (pos.avg_price * pos.quantity + notional) / held if held > _DUST else 0.0
+            pos.quantity = held
+        elif side == "SELL":
+            # Spot only: a sell beyond the tracked position closes what is there
+            closed = min(qty, pos.quantity)
+            realized = (price - pos.avg_price) * closed
+            pos.quantity -= closed
+            if pos.quantity <= _DUST:
+                pos.quantity, pos.avg_price = 0.0, 0.0
+    pos.realized_pnl += realized
+    pos.fees += fee
+    pos.updated_at = t["timestamp"]
+
+    for scope, key in _keys(t):
+        r = batch.rollup(scope, key)
+        r["trades"] += 1
+        r["buys"] += side == "BUY"
+        r["sells"] += side == "SELL"
+        r["base_volume"] += qty
+        r["quote_volume"] += notional
+        r["realized_pnl"] += realized
+        r["fees"] += fee
+        r["first_trade_at"] = min(r["first_trade_at"] or t["timestamp"], t["timestamp"])
+        r["last_trade_at"] = max(r["last_trade_at"] or t["timestamp"], t["timestamp"])
+
+
+# ── Maintenance ──────────────────────────────────────────────────────────────
+
+def rebuild(db: Session, chunk_size: int = 5000) -> int:
+    """Recompute every rollup and position from the trades table. Returns trades folded in."""
+    columns = ("id", "user_id", "timestamp", "symbol", "side", "quantity", "price", "status", "details")
+    with write_lock:
+        db.query(TradeRollup).delete()
+        db.query(Position).delete()
+        count, last_id = 0, 0
+        while True:
+            rows = (db.query(*(getattr(Trade, c) for c in columns))
+                    .filter(Trade.id > last_id).order_by(Trade.id).limit(chunk_size).all())
+            if not rows:
+                break
+            apply(db, [dict(zip(columns, r)) for r in rows])
+            db.flush()
+            count += len(rows)
+            last_id = rows[-1].id
+        db.commit()
+    log.info("Analytics rebuilt from %d trades", count)
+    return count
+
+
+def ensure_backfilled(db: Session) -> None:
+    """First run after upgrading: trades exist but no rollups yet."""
+    if db.query(TradeRollup.scope).first() is None and db.query(Trade.id).first() is not None:
+        rebuild(db)
+
+
+# ── Reads ────────────────────────────────────────────────────────────────────
+
+def _out(r: TradeRollup) -> Dict[str, Any]:
+    return {
+        "key": r.key, "trades": r.trades, "buys": r.buys, "sells": r.sells,
+        "base_volume": r.base_volume, "quote_volume": round(r.quote_volume, 8),
+        "realized_pnl": round(r.realized_pnl, 8), "fees": round(r.fees, 8),
+        "net_pnl": round(r.realized_pnl - r.fees, 8),
+        "first_trade_at": r.first_trade_at, "last_trade_at": r.last_trade_at,
+    }
+
+
+def rollups(db: Session, scope: str, start: Optional[str] = None, end: Optional[str] = None,
+            prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Rows of one scope, keys in [start, end] and/or starting with ``prefix``, ordered by key."""
+    if scope not in SCOPES:
+        raise ValueError(f"Unknown scope {scope!r}; choose from {list(SCOPES)}")
+    query = db.query(TradeRollup).filter(TradeRollup.scope == scope)
+    if prefix:
+        query = query.filter(TradeRollup.key.startswith(prefix, autoescape=True))
+    if start:
+        query = query.filter(TradeRollup.key >= start)
+    if end:
+        query = query.filter(TradeRollup.key <= end)
+    return [_out(r) for r in query.order_by(TradeRollup.key)]
+
+
+def daily(db: Session, days: int = 30, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+    since = (datetime.utcnow() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    if symbol:
+        symbol = symbol.upper()
+        rows = rollups(db, "symbol_day", start=f"{symbol}|{since}", prefix=f"{symbol}|")
+        for r in rows:
+            r["key"] = r["key"].split("|", 1)[1]
+        return rows
+    return rollups(db, "day", start=since)
+
+
+def recent_trades(db: Session, hours: int = 24) -> int:
+    """Trades in the trailing window, at hour granularity (sums ≤ hours+1 rollup rows)."""
+    since = (datetime.utcnow() - timedelta(hours=hours)).strftime("%Y-%m-%dT%H")
+    return sum(r["trades"] for r in rollups(db, "hour", start=since))
+
+
+def summary(db: Session) -> Dict[str, Any]:
+    per_symbol = rollups(db, "symbol")
+    today = db.get(TradeRollup, ("day", datetime.utcnow().strftime("%Y-%m-%d")))
+    totals = {f: sum(r[f] for r in per_symbol)
+              for f in ("trades", "buys", "sells", "quote_volume", "realized_pnl", "fees")}
+    totals["net_pnl"] = totals["realized_pnl"] - totals["fees"]
+    return {
+        "totals": totals,
+        "today": _out(today) if today else None,
+        "trades_24h": recent_trades(db, 24),
+        "symbols": per_symbol,
+    }
+
+
+def positions(db: Session, user_id: Optional[int] = None, open_only: bool = False) -> List[Dict[str, Any]]:
+    query = db.query(Position)
+    if user_id is not None:
+        query = query.filter(Position.user_id == user_id)
+    if open_only:
+        query = query.filter(Position.quantity > _DUST)
+    return [
+        {"user_id": p.user_id, "symbol": p.symbol, "quantity": p.quantity, "avg_price": p.avg_price,
+         "realized_pnl": round(p.realized_pnl, 8), "fees": round(p.fees, 8), "updated_at": p.updated_at}
+        for p in query.order_by(Position.user_id, Position.symbol)
+    ]
@@ -0,0 +1,152 @@
+# backend/services/async_exchange_client.py
+"""
+Async Binance REST client with the same method surface as ExchangeClient.
+
+All calls share one pooled keep-alive httpx.AsyncClient, so async routes can
+await exchange data without occupying threadpool workers. Errors are raised as
+python-binance exceptions to keep handling identical to the sync client.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+import httpx
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+
+from backend.config import settings
+from backend.services.metrics import EXCHANGE_ERRORS, EXCHANGE_LATENCY
+from backend.services.rate_limiter import ExchangeBusy, WeightLimiter, limiter as shared_limiter, request_weight
+
+log = logging.getLogger(__name__)
+_MAX_RETRIES = 3
+# Failures where the request provably never reached the exchange — the only ones
+# safe to retry for non-idempotent calls (a read timeout on POST order may have filled)
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class AsyncExchangeClient:
+    def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None,
+                 base_url: Optional[str] = None, limiter: Optional[WeightLimiter] = None) -> None:
+        self.limiter = limiter or shared_limiter
+        self.api_key = api_key if api_key is not None else (settings.API_KEY or "")
+        self.api_secret = api_secret if api_secret is not None else (settings.API_SECRET or "")
+        self.base_url = (base_url or settings.API_BASE_URL).rstrip("/")
+        if not self.api_key or not self.api_secret:
+            log.warning("AsyncExchangeClient: empty API_KEY / API_SECRET")
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"X-MBX-APIKEY": self.api_key},
+            timeout=httpx.Timeout(settings.EXCHANGE_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=settings.EXCHANGE_MAX_CONNECTIONS,
+                                max_keepalive_connections=settings.EXCHANGE_MAX_KEEPALIVE),
+        )
+        log.info("AsyncExchangeClient ready — base_url=%s", self.base_url)
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    # ── Transport ──
+
+    def _sign(self, params: Dict[str, Any]) -> str:
+        params = {k: v for k, v in params.items() if v is not None}
+        params["timestamp"] = int(time.time() * 1000)
+        query = urlencode(params)
+        signature = hmac.new(self.api_secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+        return f"{query}&signature={signature}"
+
+    async def _request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                       signed: bool = False, orders: int = 0) -> Any:
+        params = params or {}
+        weight = request_weight(path, params, method)
+        last_exc: Optional[Exception] = None
+        for attempt in range(_MAX_RETRIES):
+            wait = self.limiter.reserve(weight, orders)
+            if wait:
+                await asyncio.sleep(wait)
+            # Signed requests get a fresh timestamp on each attempt
+            query = self._sign(params) if signed else urlencode({k: v for k, v in params.items() if v is not None})
+            url = f"/api/v3/{path}" + (f"?{query}" if query else "")
+            started = time.perf_counter()
+            try:
+                r = await self._http.request(method, url)
+            except httpx.TransportError as exc:
+                EXCHANGE_ERRORS.inc("async", path, "transport")
+                last_exc = BinanceRequestException(str(exc))
+                if method != "GET" and not isinstance(exc, _NOT_SENT):
+                    raise last_exc from exc
+                await asyncio.sleep(self.limiter.backoff(attempt))
+                continue
+            EXCHANGE_LATENCY.observe(time.perf_counter() - started, "async", path)
+            self.limiter.observe(r.headers, r.status_code)
+            if r.status_code >= 400:
+                EXCHANGE_ERRORS.inc("async", path, str(r.status_code))
+            if r.status_code in (418, 429):
+                last_exc = BinanceAPIException(r, r.status_code, r.text)
+                continue
+            if r.status_code >= 400:
+                raise BinanceAPIException(r, r.status_code, r.text)
+            try:
+                return r.json()
+            except ValueError:
+                raise BinanceRequestException(f"Invalid Response: {r.text}")
+        if isinstance(last_exc, BinanceAPIException):
+            raise ExchangeBusy(self.limiter.metrics()["blocked_for_seconds"], "rate limited") from last_exc
+        raise last_exc  # type: ignore
+
+    # ── Market data ──
+
+    async def get_klines(self, symbol: str, interval: str, limit: int = 100,
+                         start_time: Optional[int] = None, end_time: Optional[int] = None) -> List[Any]:
+        return await self._request("GET", "klines", {"symbol": symbol, "interval": interval, "limit": limit,
+                                                     "startTime": start_time, "endTime": end_time})
+
+    async def get_ticker_price(self, symbol: str) -> Dict[str, Any]:
+        return await self._request("GET", "ticker/price", {"symbol": symbol})
+
+    async def get_order_book(self, symbol: str, limit: int = 20) -> Dict[str, Any]:
+        return await self._request("GET", "depth", {"symbol": symbol, "limit": limit})
+
+    async def get_exchange_info(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+        if symbol:
+            info = await self._request("GET", "exchangeInfo", {"symbol": symbol})
+            for item in info.get("symbols", []):
+                if item["symbol"] == symbol.upper():
+                    return item
+            return None  # type: ignore
+        return await self._request("GET", "exchangeInfo")
+
+    # ── Account / orders ──
+
+    async def get_account(self) -> Dict[str, Any]:
+        return await self._request("GET", "account", signed=True)
+
+    async def get_open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await self._request("GET", "openOrders", {"symbol": symbol}, signed=True)
+
+    async def get_order(self, symbol: str, order_id: int) -> Dict[str, Any]:
+        return await self._request("GET", "order", {"symbol": symbol, "orderId": order_id}, signed=True)
+
+    async def cancel_order(self, symbol: str, order_id: int) -> Dict[str, Any]:
+        return await self._request("DELETE", "order", {"symbol": symbol, "orderId": order_id}, signed=True)
+
+    async def get_trade_history(self, symbol: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return await self._request("GET", "myTrades", {"symbol": symbol, "limit": limit}, signed=True)
+
+    async def create_order(self, *, symbol: str, side: str, type: str,
+                           quantity: Optional[float] = None, price: Optional[float] = None,
+                           time_in_force: Optional[str] = None, test: bool = True) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"symbol": symbol, "side": side, "type": type}
+        if quantity is not None:
+            payload["quantity"] = quantity
+        if price is not None:
+            payload["price"] = price
+        if time_in_force is not None:
+            payload["timeInForce"] = time_in_force
+        log.info("create_order test=%s payload=%s", test, payload)
+        if test:
+            return await self._request("POST", "order/test", payload, signed=True)
+        return await self._request("POST", "order", payload, signed=True, orders=1)
@@ -0,0 +1,162 @@
+# backend/services/auth_cache.py
+"""
+Caches on the JWT authentication path.
+
+Verified token payloads are memoized until the token's own ``exp``, and the
+user each token names is served from a per-user-id principal cache with a
+short TTL (AUTH_USER_CACHE_TTL), so an authenticated request normally costs
+neither a signature check nor a DB round-trip. Any committed ORM change to a
+User row (password, is_active, is_admin, stored keys, ...) invalidates that
+user's entry, via session events; the TTL bounds staleness for writes that
+bypass the ORM.
+
+Principals are frozen snapshots, not session-bound User rows — handlers that
+modify the user load it for update instead (see api/auth.py).
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.config import settings
+from backend.models.db import SessionLocal, User
+from backend.services.metrics import registry
+
+AUTH_CACHE = registry.counter("auth_cache_total", "Auth cache lookups", ("cache", "result"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Read-only view of a User row (no password hash or reset token)."""
+    id: int
+    email: str
+    username: str
+    is_active: bool
+    is_admin: bool
+    created_at: Optional[datetime]
+    enc_api_key: Optional[str]
+    enc_api_secret: Optional[str]
+    api_base_url: Optional[str]
+    enc_gemini_key: Optional[str]
+    gemini_model: Optional[str]
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(**{f.name: getattr(user, f.name) for f in fields(cls)})
+
+
+class _LRU:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            if hit[0] <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return hit[1]
+
+    def put(self, key: Any, value: Any, expires: float) -> None:
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_tokens = _LRU(settings.AUTH_TOKEN_CACHE_SIZE)
+_users = _LRU(settings.AUTH_USER_CACHE_SIZE)
+
+
+def decode_token_cached(token: str) -> Optional[Dict[str, Any]]:
+    """auth_service.decode_token, memoized until the token expires. Invalid tokens are not cached."""
+    payload = _tokens.get(token)
+    if payload is not None:
+        AUTH_CACHE.inc("token", "hit")
+        return payload
+    AUTH_CACHE.inc("token", "miss")
+    from backend.services.auth_service import decode_token
+    payload = decode_token(token)
+    if payload is not None and payload.get("exp"):
+        _tokens.put(token, payload, float(payload["exp"]))
+    return payload
+
+
+def get_principal(user_id: int) -> Optional[Principal]:
+    principal = _users.get(user_id)
+    if principal is not None:
+        AUTH_CACHE.inc("user", "hit")
+        return principal
+    AUTH_CACHE.inc("user", "miss")
+    with SessionLocal() as db:
+        user = db.get(User, user_id)
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+    _users.put(user_id, principal, time.time() + settings.AUTH_USER_CACHE_TTL)
+    return principal
+
+
+def principal_from_token(token: Optional[str]) -> Optional[Principal]:
+    """The access token's user, or None if the token is missing, invalid or not an access token."""
+    if not token:
+        return None
+    payload = decode_token_cached(token)
+    if not payload or payload.get("type") != "access":
+        return None
+    try:
+        return get_principal(int(payload.get("sub", 0)))
+    except (TypeError, ValueError):
+        return None
+
+
+def invalidate_user(user_id: int) -> None:
+    _users.pop(user_id)
+
+
+def stats() -> Dict[str, int]:
+    return {"tokens": len(_tokens), "users": len(_users)}
+
+
+# ── Invalidation on commit ───────────────────────────────────────────────────
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_changes(session, flush_context) -> None:
+    changed: Set[int] = session.info.setdefault("auth_changed_users", set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session) -> None:
+    for user_id in session.info.pop("auth_changed_users", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session) -> None:
+    session.info.pop("auth_changed_users", None)
@@ -1,7 +1,8 @@
 # backend/services/auth_service.py
 import secrets
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -10,7 +11,11 @@ from sqlalchemy.orm import Session
 from backend.config import settings
 from backend.models.db import User
 
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12, bcrypt__ident="2b")
+# min/max pin the cost: hashes made at any other BCRYPT_ROUNDS are flagged for rehash on login
+pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__ident="2b",
+                       bcrypt__rounds=settings.BCRYPT_ROUNDS,
+                       bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+                       bcrypt__max_rounds=settings.BCRYPT_ROUNDS)
 
 
 # ── Password ──────────────────────────────────────────────────────────────────
@@ -23,6 +28,11 @@ def verify_password(plain: str, hashed: str) -> bool:
     return pwd_ctx.verify(plain[:72], hashed)
 
 
+def verify_and_update(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """Verify, plus a replacement hash if the stored one was made with a different cost."""
+    return pwd_ctx.verify_and_update(plain[:72], hashed)
+
+
 # ── JWT ───────────────────────────────────────────────────────────────────────
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -48,12 +58,17 @@ def decode_token(token: str) -> Optional[dict]:
 
 # ── Encryption for stored API keys ────────────────────────────────────────────
 
-def _fernet():
+@lru_cache(maxsize=4)
+def _fernet_for(key: str):
     from cryptography.fernet import Fernet
+    return Fernet(key.encode())
+
+
+def _fernet():
     key = settings.ENCRYPTION_KEY
     if not key:
         raise ValueError("ENCRYPTION_KEY not set in .env")
-    return Fernet(key.encode() if isinstance(key, str) else key)
+    return _fernet_for(key if isinstance(key, str) else key.decode())
 
 
 def encrypt(value: str) -> str:
@@ -78,11 +93,12 @@ def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
 
 
-def create_user(db: Session, email: str, username: str, password: str, is_admin: bool = False) -> User:
+def create_user(db: Session, email: str, username: str, password_hash: str, is_admin: bool = False) -> User:
+    """``password_hash`` comes from hash_password (routes hash on the password_hasher executor)."""
     user = User(
         email=email.lower(),
         username=username.lower(),
-        hashed_password=hash_password(password),
+        hashed_password=password_hash,
         is_admin=is_admin,
     )
     db.add(user)
@@ -91,13 +107,6 @@ def create_user(db: Session, email: str, username: str, password: str, is_admin:
     return user
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
-    user = get_user_by_email(db, email)
-    if not user or not verify_password(password, user.hashed_password):
-        return None
-    return user
-
-
 def generate_reset_token(db: Session, user: User) -> str:
     token = secrets.token_urlsafe(32)
     user.reset_token = token
@@ -106,14 +115,15 @@ def generate_reset_token(db: Session, user: User) -> str:
     return token
 
 
-def reset_password(db: Session, token: str, new_password: str) -> bool:
+def get_user_by_reset_token(db: Session, token: str) -> Optional[User]:
     user = db.query(User).filter(User.reset_token == token).first()
-    if not user:
-        return False
-    if user.reset_token_expires < datetime.utcnow():
-        return False
-    user.hashed_password = hash_password(new_password)
+    if not user or user.reset_token_expires < datetime.utcnow():
+        return None
+    return user
+
+
+def reset_password(db: Session, user: User, password_hash: str) -> None:
+    user.hashed_password = password_hash
     user.reset_token = None
     user.reset_token_expires = None
     db.commit()
-    return True
@@ -0,0 +1,313 @@
+# backend/services/backtest.py
+"""
+Offline backtester for the EMA/RSI strategy.
+
+Replays local OHLCV files (Binance kline CSV dumps, or any CSV/Parquet with
+open_time/open/close columns) through the same EMA/RSI rules as
+strategy_service.get_signal. Indicators, signals, fills and the equity curve
+are all computed as array operations over the whole series — there is no
+per-bar Python loop. Signals fire on a candle's close and fill at the next
+candle's open, long-only like the live spot trader, with fees and slippage in
+basis points.
+
+    python -m backend.services.backtest data/BTCUSDT-1m.csv data/ETHUSDT-1m.parquet
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+
+from backend.config import settings
+
+log = logging.getLogger(__name__)
+
+KLINE_COLUMNS = [
+    "open_time", "open", "high", "low", "close", "volume",
+    "close_time", "quote_vol", "num_trades", "taker_base", "taker_quote", "ignore",
+]
+_ALIASES = {"timestamp": "open_time", "time": "open_time", "date": "open_time", "datetime": "open_time"}
+
+
+# ── Loading ───────────────────────────────────────────────────────────────────
+
+def load_ohlcv(path: str) -> pd.DataFrame:
+    """Load a CSV or Parquet OHLCV file into open_time (ms) / open / high / low / close / volume."""
+    if path.endswith((".parquet", ".pq")):
+        try:
+            df = pd.read_parquet(path)
+        except ImportError as exc:
+            raise RuntimeError("Reading Parquet requires pyarrow (pip install pyarrow)") from exc
+        df.columns = [_ALIASES.get(str(c).lower(), str(c).lower()) for c in df.columns]
+    else:
+        with open(path) as fh:
+            first = fh.readline().split(",")[0].strip()
+        if first.replace(".", "", 1).isdigit():
+            # Headerless Binance dump (data.binance.vision)
+            df = pd.read_csv(path, header=None, usecols=range(6), names=KLINE_COLUMNS[:6])
+        else:
+            df = pd.read_csv(path)
+            df.columns = [_ALIASES.get(str(c).lower(), str(c).lower()) for c in df.columns]
+
+    missing = {"open_time", "open", "close"} - set(df.columns)
+    if missing:
+        raise ValueError(f"{path}: missing columns {sorted(missing)}")
+    for col in ("high", "low", "volume"):
+        if col not in df.columns:
+            df[col] = df["close"] if col != "volume" else 0.0
+
+    ts = df["open_time"]
+    if pd.api.types.is_numeric_dtype(ts):
+        ts = ts.astype("int64")
+        ts = np.where(ts > 10**14, ts // 1000, ts)   # newer spot dumps are in microseconds
+    else:
+        ts = pd.to_datetime(ts, utc=True).astype("int64") // 10**6
+    out = pd.DataFrame({
+        "open_time": np.asarray(ts, dtype="int64"),
+        **{c: pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float)
+           for c in ("open", "high", "low", "close", "volume")},
+    })
+    out = out.dropna(subset=["open", "close"]).drop_duplicates("open_time")
+    return out.sort_values("open_time", kind="stable").reset_index(drop=True)
+
+
+def symbol_from_path(path: str) -> str:
+    """BTCUSDT-1m-2024-01.csv -> BTCUSDT."""
+    stem = os.path.basename(path).split(".")[0]
+    return stem.replace("_", "-").split("-")[0].upper()
+
+
+# ── Indicators & signals ──────────────────────────────────────────────────────
+
+def ema(close: np.ndarray, span: int) -> np.ndarray:
+    return pd.Series(close, dtype=float).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def rsi(close: np.ndarray, window: int) -> np.ndarray:
+    return RSIIndicator(pd.Series(close, dtype=float), window=window).rsi().to_numpy()
+
+
+def indicators(close: np.ndarray, ema_span: int, rsi_window: int) -> Dict[str, np.ndarray]:
+    """EMA and RSI over the full series, computed exactly as strategy_service does."""
+    return {"ema": ema(close, ema_span), "rsi": rsi(close, rsi_window)}
+
+
+def crossovers(close: np.ndarray, ema: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Masks (for bars 1..n-1) where close crosses above / below the EMA."""
+    prev_c, prev_e = close[:-1], ema[:-1]
+    c, e = close[1:], ema[1:]
+    return (prev_c < prev_e) & (c > e), (prev_c > prev_e) & (c < e)
+
+
+def signals(close: np.ndarray, ema: np.ndarray, rsi: np.ndarray,
+            oversold: float, overbought: float, warmup: int = 0,
+            crosses: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> np.ndarray:
+    """+1 BUY / -1 SELL / 0 HOLD per bar, mirroring get_signal's crossover rules."""
+    sig = np.zeros(len(close), dtype=np.int8)
+    if len(close) < 2:
+        return sig
+    up, down = crosses if crosses is not None else crossovers(close, ema)
+    r = rsi[1:]
+    with np.errstate(invalid="ignore"):
+        sig[1:][up & (r < oversold)] = 1
+        sig[1:][down & (r > overbought)] = -1
+    sig[:warmup] = 0
+    return sig
+
+
+# ── Simulation ────────────────────────────────────────────────────────────────
+
+@dataclass
+class BacktestResult:
+    symbol: str
+    bars: int
+    start: Optional[int]
+    end: Optional[int]
+    initial_capital: float
+    final_equity: float
+    fees_paid: float
+    max_drawdown: float
+    exposure: float
+    buy_and_hold_return: float
+    trades: pd.DataFrame = field(default_factory=pd.DataFrame)
+    open_position: Optional[Dict[str, Any]] = None
+    elapsed: float = 0.0
+
+    def trade_list(self) -> List[Dict[str, Any]]:
+        return self.trades.to_dict("records")
+
+    def summary(self) -> Dict[str, Any]:
+        pnl_arr = self.trades["pnl"].to_numpy() if len(self.trades) else np.empty(0)
+        gross_win = float(pnl_arr[pnl_arr > 0].sum())
+        gross_loss = float(-pnl_arr[pnl_arr <= 0].sum())
+        n = len(pnl_arr)
+        pnl = self.final_equity - self.initial_capital
+        return {
+            "symbol": self.symbol,
+            "bars": self.bars,
+            "start": self.start,
+            "end": self.end,
+            "trades": n,
+            "pnl": round(pnl, 2),
+            "return_pct": round(100 * pnl / self.initial_capital, 3),
+            "max_drawdown_pct": round(100 * self.max_drawdown, 3),
+            "win_rate": round(float(np.count_nonzero(pnl_arr > 0)) / n, 4) if n else None,
+            "profit_factor": round(gross_win / gross_loss, 3) if gross_loss else None,
+            "avg_trade_return_pct": round(100 * float(self.trades["return"].mean()), 4) if n else None,
+            "fees_paid": round(self.fees_paid, 2),
+            "exposure": round(self.exposure, 4),
+            "buy_and_hold_return_pct": round(100 * self.buy_and_hold_return, 3),
+            "open_position": self.open_position is not None,
+            "elapsed_seconds": round(self.elapsed, 4),
+        }
+
+
+def simulate(df: pd.DataFrame, sig: np.ndarray, symbol: str = "", initial_capital: float = 10_000.0,
+             fee_bps: float = 10.0, slippage_bps: float = 2.0, position_fraction: float = 1.0) -> BacktestResult:
+    """
+    Long-only fill simulation: BUY opens when flat, SELL closes; fills at the
+    next bar's open. Each entry commits ``position_fraction`` of current equity,
+    so returns compound across trades.
+    """
+    started = time.perf_counter()
+    # ``df`` may also be a plain mapping of column arrays (the optimizer passes shared-memory views)
+    opens = np.asarray(df["open"], dtype=float)
+    closes = np.asarray(df["close"], dtype=float)
+    times = np.asarray(df["open_time"], dtype="int64")
+    n = len(closes)
+    fee = fee_bps / 10_000
+    slip = slippage_bps / 10_000
+    f = position_fraction
+
+    # After each signal the position is simply "long if it was a BUY", so
+    # entries/exits are the 0->1 / 1->0 transitions of that state.
+    events = np.flatnonzero(sig[:-1]) if n else np.empty(0, dtype=np.int64)
+    state = (sig[events] > 0).astype(np.int8)
+    prior = np.concatenate(([0], state[:-1])).astype(np.int8)
+    entry_bar = events[(state == 1) & (prior == 0)] + 1
+    exit_bar = events[(state == 0) & (prior == 1)] + 1
+    k = len(exit_bar)
+
+    entry_px = opens[entry_bar] * (1 + slip)
+    exit_px = opens[exit_bar] * (1 - slip)
+    ret = exit_px * (1 - fee) / (entry_px[:k] * (1 + fee)) - 1
+    # Equity before each entry (and after the last closed trade)
+    equity_before = initial_capital * np.concatenate(([1.0], np.cumprod(1 + f * ret)))
+    spend = f * equity_before[:len(entry_bar)]
+    units = spend / (entry_px * (1 + fee))
+    pnl = spend[:k] * ret
+    fees_paid = float((units * entry_px * fee).sum() + (units[:k] * exit_px * fee).sum())
+
+    # Mark-to-market equity curve
+    bars = np.arange(n)
+    tid = np.searchsorted(entry_bar, bars, side="right") - 1
+    done = np.searchsorted(exit_bar, bars, side="right")
+    in_pos = tid >= done
+    safe = np.clip(tid, 0, None)
+    if len(entry_bar):
+        held = equity_before[safe] * (1 - f) + units[safe] * closes
+    else:
+        held = np.zeros(n)
+    equity = np.where(in_pos, held, equity_before[done])
+    peak = np.maximum.accumulate(equity) if n else equity
+    max_dd = float(np.max(1 - equity / peak)) if n else 0.0
+
+    trades = pd.DataFrame({
+        "entry_time": times[entry_bar[:k]], "exit_time": times[exit_bar],
+        "entry_price": entry_px[:k], "exit_price": exit_px, "quantity": units[:k],
+        "pnl": pnl, "return": ret, "bars_held": exit_bar - entry_bar[:k],
+    })
+    open_position = None
+    if len(entry_bar) > k:
+        mark = units[-1] * closes[-1] * (1 - fee)
+        open_position = {"entry_time": int(times[entry_bar[-1]]), "entry_price": float(entry_px[-1]),
+                         "quantity": float(units[-1]), "unrealized_pnl": float(mark - spend[-1])}
+
+    return BacktestResult(
+        symbol=symbol, bars=n,
+        start=int(times[0]) if n else None, end=int(times[-1]) if n else None,
+        initial_capital=initial_capital,
+        final_equity=float(equity[-1]) if n else initial_capital,
+        fees_paid=fees_paid, max_drawdown=max_dd,
+        exposure=float(np.count_nonzero(in_pos) / n) if n else 0.0,
+        buy_and_hold_return=float(closes[-1] / opens[0] - 1) if n else 0.0,
+        trades=trades, open_position=open_position,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+# ── Entry points ──────────────────────────────────────────────────────────────
+
+def backtest(df: pd.DataFrame, symbol: str = "", ema_span: Optional[int] = None,
+             rsi_window: Optional[int] = None, oversold: Optional[float] = None,
+             overbought: Optional[float] = None, **sim_kwargs) -> BacktestResult:
+    """Backtest one symbol's OHLCV frame; strategy parameters default to settings."""
+    started = time.perf_counter()
+    ema_span = ema_span or settings.EMA_SPAN
+    rsi_window = rsi_window or settings.RSI_WINDOW
+    close = df["close"].to_numpy(dtype=float)
+    ind = indicators(close, ema_span, rsi_window)
+    sig = signals(close, ind["ema"], ind["rsi"],
+                  settings.RSI_OVERSOLD if oversold is None else oversold,
+                  settings.RSI_OVERBOUGHT if overbought is None else overbought,
+                  warmup=max(ema_span, rsi_window) + 1)
+    result = simulate(df, sig, symbol=symbol, **sim_kwargs)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def run_backtests(datasets: Dict[str, Union[str, pd.DataFrame]], **kwargs) -> Dict[str, BacktestResult]:
+    """Backtest several symbols; values may be file paths or already-loaded frames."""
+    results: Dict[str, BacktestResult] = {}
+    for symbol, data in datasets.items():
+        df = load_ohlcv(data) if isinstance(data, str) else data
+        results[symbol] = backtest(df, symbol=symbol, **kwargs)
+        log.info("Backtest %s: %s", symbol, results[symbol].summary())
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Backtest the EMA/RSI strategy on local OHLCV files")
+    p.add_argument("files", nargs="+", help="CSV or Parquet files; symbol is taken from the file name")
+    p.add_argument("--ema-span", type=int)
+    p.add_argument("--rsi-window", type=int)
+    p.add_argument("--oversold", type=float)
+    p.add_argument("--overbought", type=float)
+    p.add_argument("--capital", type=float, default=10_000.0)
+    p.add_argument("--fee-bps", type=float, default=10.0)
+    p.add_argument("--slippage-bps", type=float, default=2.0)
+    p.add_argument("--fraction", type=float, default=1.0, help="Fraction of equity per entry")
+    p.add_argument("--trades", action="store_true", help="Include the trade list in the output")
+    args = p.parse_args(argv)
+
+    datasets: Dict[str, Union[str, pd.DataFrame]] = {}
+    for path in args.files:
+        symbol = symbol_from_path(path)
+        df = load_ohlcv(path)
+        prev = datasets.get(symbol)
+        # Monthly dumps for the same symbol are concatenated
+        datasets[symbol] = df if prev is None else (
+            pd.concat([prev, df]).drop_duplicates("open_time").sort_values("open_time").reset_index(drop=True))
+
+    started = time.perf_counter()
+    results = run_backtests(datasets, ema_span=args.ema_span, rsi_window=args.rsi_window,
+                            oversold=args.oversold, overbought=args.overbought,
+                            initial_capital=args.capital, fee_bps=args.fee_bps,
+                            slippage_bps=args.slippage_bps, position_fraction=args.fraction)
+    out = []
+    for r in results.values():
+        row = r.summary()
+        if args.trades:
+            row["trade_list"] = r.trade_list()
+        out.append(row)
+    print(json.dumps({"results": out, "elapsed_seconds": round(time.perf_counter() - started, 3)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+# backend/services/broadcaster.py
+"""
+In-process pub/sub hub behind the /live WebSocket and SSE endpoints.
+
+Topics are "kind:SYMBOL" — ticker:BTCUSDT, signal:BTCUSDT, trade:BTCUSDT. A
+subscription to "signal" or "trade" matches every symbol; tickers must name
+one. Symbols must look like exchange symbols and a client may hold at most
+LIVE_MAX_TOPICS topics. Every ticker symbol rides on ONE combined-stream
+connection: symbols are added and removed with SUBSCRIBE / UNSUBSCRIBE as the
+first client arrives and LIVE_UPSTREAM_GRACE seconds after the last leaves.
+The connection closes when no symbol is left.
+
+Each client owns a bounded mailbox. Ticker updates coalesce per topic (a slow
+client just sees the latest price); other events queue up to LIVE_QUEUE_SIZE
+and the oldest are dropped beyond that. publish() is safe to call from any
+thread — the poller and trade journal publish from their worker threads.
+"""
+import asyncio
+import itertools
+import logging
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, Optional, Set
+
+from backend.config import settings
+from backend.services.market_stream import WebSocketTransport
+from backend.services.metrics import registry
+
+log = logging.getLogger(__name__)
+
+LIVE_DROPPED = registry.counter("live_dropped_total", "Live events dropped for slow clients", ("kind",))
+LIVE_PUBLISHED = registry.counter("live_published_total", "Live events published", ("kind",))
+
+Event = Dict[str, Any]
+COALESCED_KINDS = {"ticker"}
+KINDS = {"ticker", "signal", "trade"}
+
+_SYMBOL_RE = re.compile(r"^[A-Z0-9]{2,20}$")
+_MAX_STREAMS = 1024             # Binance's per-connection stream limit
+_CONTROL_INTERVAL = 0.25        # Binance allows 5 control messages per second per connection
+
+
+def parse_topics(spec: Iterable[str]) -> Set[str]:
+    """Normalise topic names; raises ValueError on unknown kinds, bad symbols or a bare "ticker"."""
+    topics: Set[str] = set()
+    for raw in spec:
+        raw = raw.strip()
+        if not raw:
+            continue
+        kind, _, symbol = raw.partition(":")
+        kind = kind.lower()
+        if kind not in KINDS:
+            raise ValueError(f"Unknown topic {raw!r}; kinds are {sorted(KINDS)}")
+        if kind == "ticker" and not symbol:
+            raise ValueError("Ticker topics need a symbol, e.g. ticker:BTCUSDT")
+        if symbol and not _SYMBOL_RE.match(symbol.upper()):
+            raise ValueError(f"Invalid symbol in topic {raw!r}")
+        topics.add(f"{kind}:{symbol.upper()}" if symbol else kind)
+    return topics
+
+
+class Subscriber:
+    _ids = itertools.count(1)
+
+    def __init__(self, hub: "Broadcaster", topics: Set[str], maxsize: int) -> None:
+        self.id = next(self._ids)
+        self.hub = hub
+        self.topics = topics
+        self.maxsize = maxsize
+        self._latest: "OrderedDict[str, Event]" = OrderedDict()    # coalesced, by topic
+        self._queue: Deque[Event] = deque()
+        self._ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+        self.connected_at = time.time()
+
+    def matches(self, topic: str) -> bool:
+        return topic in self.topics or topic.partition(":")[0] in self.topics
+
+    def offer(self, event: Event) -> None:
+        if event["kind"] in COALESCED_KINDS:
+            if event["topic"] in self._latest:
+                self.dropped += 1
+                LIVE_DROPPED.inc(event["kind"])
+            self._latest[event["topic"]] = event
+            self._latest.move_to_end(event["topic"])
+        else:
+            if len(self._queue) >= self.maxsize:
+                old = self._queue.popleft()
+                self.dropped += 1
+                LIVE_DROPPED.inc(old["kind"])
+            self._queue.append(event)
+        self._ready.set()
+
+    async def get(self) -> Event:
+        while True:
+            if self._queue:
+                return self._queue.popleft()
+            if self._latest:
+                return self._latest.popitem(last=False)[1]
+            self._ready.clear()
+            await self._ready.wait()
+
+    async def events(self) -> AsyncIterator[Event]:
+        while True:
+            event = await self.get()
+            self.sent += 1
+            yield event
+
+    def update(self, subscribe: Iterable[str] = (), unsubscribe: Iterable[str] = ()) -> None:
+        self.hub.update(self, parse_topics(subscribe), parse_topics(unsubscribe))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"id": self.id, "topics": sorted(self.topics), "sent": self.sent, "dropped": self.dropped,
+                "pending": len(self._queue) + len(self._latest), "connected_at": self.connected_at}
+
+
+class _TickerUpstream:
+    """The single combined-stream connection carrying every live ticker symbol."""
+
+    def __init__(self, hub: "Broadcaster") -> None:
+        self.hub = hub
+        self.task: Optional[asyncio.Task] = None
+        self.subscribed: Set[str] = set()
+        self.connected = False
+        self.messages = 0
+        self.reconnects = 0
+        self._changed = asyncio.Event()
+
+    def changed(self) -> None:
+        self._changed.set()
+
+    async def run(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                async with self.hub.transport.session() as session:
+                    self.connected = True
+                    self._changed.set()
+                    control = asyncio.ensure_future(self._control(session))
+                    try:
+                        async for payload in session.messages():
+                            backoff = 1.0
+                            if payload.get("e") != "24hrMiniTicker":
+                                continue
+                            self.messages += 1
+                            self.hub.publish("ticker", payload["s"], _ticker_from_event(payload))
+                    finally:
+                        control.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                log.warning("Live ticker upstream disconnected: %s — retrying in %.0fs", exc, backoff)
+            self.connected = False
+            self.subscribed = set()
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    async def _control(self, session) -> None:
+        """Bring the connection's subscriptions in line with the hub, batching changes."""
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+            wanted = set(self.hub.live_symbols)
+            add, drop = wanted - self.subscribed, self.subscribed - wanted
+            if drop:
+                await session.unsubscribe([f"{s.lower()}@miniTicker" for s in sorted(drop)])
+            if add:
+                await session.subscribe([f"{s.lower()}@miniTicker" for s in sorted(add)])
+            self.subscribed = wanted
+            await asyncio.sleep(_CONTROL_INTERVAL)
+
+
+def _ticker_from_event(p: Dict[str, Any]) -> Dict[str, Any]:
+    return {"symbol": p["s"], "price": float(p["c"]), "open": float(p["o"]), "high": float(p["h"]),
+            "low": float(p["l"]), "volume": float(p["v"]), "quote_volume": float(p["q"]),
+            "event_time": p.get("E")}
+
+
+class Broadcaster:
+    def __init__(self, transport=None, queue_size: Optional[int] = None,
+                 upstream_grace: Optional[float] = None) -> None:
+        self.transport = transport or WebSocketTransport()
+        self.queue_size = queue_size or settings.LIVE_QUEUE_SIZE
+        self.upstream_grace = settings.LIVE_UPSTREAM_GRACE if upstream_grace is None else upstream_grace
+        self.subscribers: Dict[int, Subscriber] = {}
+        self.upstream: Optional[_TickerUpstream] = None
+        self.live_symbols: Set[str] = set()        # wanted, or inside their release grace
+        self._releasing: Dict[str, asyncio.TimerHandle] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+
+    # ── Publishing ──
+
+    def publish(self, kind: str, symbol: str, data: Dict[str, Any]) -> None:
+        """Fan an event out to matching subscribers. Callable from any thread."""
+        if self.loop is None or not self.subscribers:
+            return
+        event = {"kind": kind, "topic": f"{kind}:{symbol.upper()}", "ts": int(time.time() * 1000), "data": data}
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._dispatch(event)
+        else:
+            try:
+                self.loop.call_soon_threadsafe(self._dispatch, event)
+            except RuntimeError:
+                pass    # loop closed during shutdown
+
+    def _dispatch(self, event: Event) -> None:
+        self.published += 1
+        LIVE_PUBLISHED.inc(event["kind"])
+        for sub in list(self.subscribers.values()):
+            if sub.matches(event["topic"]):
+                sub.offer(event)
+
+    # ── Subscriptions ──
+
+    def subscribe(self, topics: Iterable[str]) -> Subscriber:
+        """Register a client; call from the event loop. Raises ValueError on bad or too many topics."""
+        topics = parse_topics(topics)
+        self._check(set(), topics)
+        self.loop = asyncio.get_running_loop()
+        sub = Subscriber(self, set(), self.queue_size)
+        self.subscribers[sub.id] = sub
+        self.update(sub, topics, set())
+        return sub
+
+    def update(self, sub: Subscriber, add: Set[str], remove: Set[str]) -> None:
+        topics = (sub.topics | add) - remove
+        self._check(sub.topics, topics)
+        sub.topics = topics
+        self._sync_upstream()
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self.subscribers.pop(sub.id, None)
+        self._sync_upstream()
+
+    def _check(self, current: Set[str], topics: Set[str]) -> None:
+        if len(topics) > settings.LIVE_MAX_TOPICS:
+            raise ValueError(f"At most {settings.LIVE_MAX_TOPICS} topics per client")
+        new = {t.partition(":")[2] for t in topics - current if t.startswith("ticker:")}
+        if len(self.live_symbols | new) > _MAX_STREAMS:
+            raise ValueError("Too many live ticker symbols — try again later")
+
+    def _wanted(self) -> Set[str]:
+        return {t.partition(":")[2] for s in self.subscribers.values() for t in s.topics if t.startswith("ticker:")}
+
+    def _sync_upstream(self) -> None:
+        wanted = self._wanted()
+        for symbol in wanted & set(self._releasing):
+            self._releasing.pop(symbol).cancel()
+        for symbol in self.live_symbols - wanted - set(self._releasing):
+            self._releasing[symbol] = self.loop.call_later(self.upstream_grace, self._release, symbol)
+        before = self.live_symbols
+        self.live_symbols = wanted | set(self._releasing)
+        if self.live_symbols and self.upstream is None:
+            self.upstream = _TickerUpstream(self)
+            self.upstream.task = self.loop.create_task(self.upstream.run())
+            log.info("Live ticker upstream started")
+        if self.upstream is not None and self.live_symbols != before:
+            self.upstream.changed()
+
+    def _release(self, symbol: str) -> None:
+        self._releasing.pop(symbol, None)
+        if symbol in self._wanted():
+            return
+        self.live_symbols = self.live_symbols - {symbol}
+        if self.upstream is None:
+            return
+        if self.live_symbols:
+            self.upstream.changed()
+        else:
+            self.upstream.task.cancel()
+            self.upstream = None
+            log.info("Live ticker upstream stopped")
+
+    async def stop(self) -> None:
+        for handle in self._releasing.values():
+            handle.cancel()
+        self._releasing.clear()
+        self.live_symbols = set()
+        up, self.upstream = self.upstream, None
+        if up is not None and up.task is not None:
+            up.task.cancel()
+            try:
+                await up.task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self.subscribers),
+            "published": self.published,
+            "upstream": None if self.upstream is None else {
+                "connected": self.upstream.connected, "messages": self.upstream.messages,
+                "reconnects": self.upstream.reconnects, "symbols": sorted(self.upstream.subscribed),
+                "releasing": sorted(self._releasing)},
+            "subscribers": [s.stats() for s in self.subscribers.values()],
+        }
+
+
+broadcaster = Broadcaster()
+
+registry.gauge("live_clients", "Connected live (WebSocket/SSE) clients", (),
+               lambda: {(): len(broadcaster.subscribers)})
+registry.gauge("live_upstreams", "Ticker symbols on the shared upstream connection", (),
+               lambda: {(): len(broadcaster.live_symbols)})
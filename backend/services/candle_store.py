@@ -0,0 +1,421 @@
+# backend/services/candle_store.py
+"""
+Local on-disk candle history, one append-only columnar series per (symbol, interval).
+
+Each series is a directory of raw little-endian column files
+(data/candles/BTCUSDT/1m/open_time.i8, close.f8, ...) holding closed candles in
+open_time order. Readers map the files with np.memmap and get zero-copy slices,
+so multi-million-row histories never have to be loaded into RAM. New candles
+are appended; the rare out-of-order write (older history) rewrites the series
+into temp files and swaps them in, leaving existing maps valid.
+
+A background CandleSync thread keeps configured series caught up from the
+exchange, and get_klines/aget_klines serve strategy and API reads from the
+store, topped up with the live candle from the kline cache.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from backend.config import settings
+from backend.services.intervals import candle_open, interval_ms, next_candle_close, now_ms
+from backend.services.kline_cache import kline_cache
+
+log = logging.getLogger(__name__)
+
+# REST kline layout (minus the trailing "ignore" field) and on-disk dtypes
+COLUMNS: List[Tuple[str, str]] = [
+    ("open_time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+    ("volume", "<f8"), ("close_time", "<i8"), ("quote_vol", "<f8"), ("num_trades", "<i8"),
+    ("taker_base", "<f8"), ("taker_quote", "<f8"),
+]
+_INT_COLUMNS = {name for name, dtype in COLUMNS if dtype == "<i8"}
+_PAGE = 1000        # Binance max klines per request
+_SYMBOL_RE = re.compile(r"^[A-Z0-9]{2,20}$")
+
+
+def _file(name: str, dtype: str) -> str:
+    return f"{name}.{dtype[1:]}"
+
+
+def contiguous(interval: str, open_times: np.ndarray) -> bool:
+    """True if consecutive open times are exactly one candle apart (no gaps)."""
+    if len(open_times) < 2:
+        return True
+    if interval == "1M":
+        return all(next_candle_close(interval, int(a)) == int(b) for a, b in zip(open_times[:-1], open_times[1:]))
+    return bool(np.all(np.diff(open_times) == interval_ms(interval)))
+
+
+def closed_only(klines: List[Any], ts_ms: Optional[int] = None) -> List[Any]:
+    """Drop the still-open candle(s) from a REST/stream kline list."""
+    ts_ms = now_ms() if ts_ms is None else ts_ms
+    return [k for k in klines if int(k[6]) < ts_ms]
+
+
+class CandleSeries:
+    """Append-only columnar history for one (symbol, interval)."""
+
+    def __init__(self, root: str, symbol: str, interval: str) -> None:
+        self.symbol = symbol.upper()
+        self.interval = interval
+        self.path = os.path.join(root, self.symbol, interval)
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.RLock()
+        self._maps: Dict[str, np.ndarray] = {}
+        self._mapped = -1
+        self.rows = self._recover()
+
+    def _recover(self) -> int:
+        """Row count is the shortest column; trim columns left longer by a torn append."""
+        sizes = {}
+        for name, dtype in COLUMNS:
+            fpath = os.path.join(self.path, _file(name, dtype))
+            if not os.path.exists(fpath):
+                open(fpath, "wb").close()
+            sizes[name] = os.path.getsize(fpath) // 8
+        rows = min(sizes.values())
+        for name, dtype in COLUMNS:
+            if sizes[name] != rows:
+                log.warning("CandleSeries %s/%s: truncating torn column %s (%d -> %d rows)",
+                            self.symbol, self.interval, name, sizes[name], rows)
+                with open(os.path.join(self.path, _file(name, dtype)), "r+b") as fh:
+                    fh.truncate(rows * 8)
+        return rows
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        """Current read-only maps, remapped if the series has grown or been rewritten."""
+        with self._lock:
+            if self._mapped != self.rows:
+                if self.rows == 0:
+                    self._maps = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+                else:
+                    self._maps = {
+                        name: np.memmap(os.path.join(self.path, _file(name, dtype)), dtype=dtype,
+                                        mode="r", shape=(self.rows,))
+                        for name, dtype in COLUMNS
+                    }
+                self._mapped = self.rows
+            return self._maps
+
+    # ── Reads ──
+
+    @property
+    def first_open_time(self) -> Optional[int]:
+        return int(self._columns()["open_time"][0]) if self.rows else None
+
+    @property
+    def last_open_time(self) -> Optional[int]:
+        return int(self._columns()["open_time"][-1]) if self.rows else None
+
+    def range(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy column views for candles with start_ms <= open_time <= end_ms."""
+        cols = self._columns()
+        ot = cols["open_time"]
+        lo = 0 if start_ms is None else int(np.searchsorted(ot, start_ms, side="left"))
+        hi = len(ot) if end_ms is None else int(np.searchsorted(ot, end_ms, side="right"))
+        return {name: arr[lo:hi] for name, arr in cols.items()}
+
+    def tail(self, n: int, end_ms: Optional[int] = None) -> Dict[str, np.ndarray]:
+        cols = self.range(None, end_ms)
+        return {name: arr[-n:] if n else arr[:0] for name, arr in cols.items()}
+
+    def klines(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None,
+               limit: Optional[int] = None, from_end: bool = False) -> List[List[Any]]:
+        """REST-layout kline rows (prices as strings, like Binance)."""
+        cols = self.range(start_ms, end_ms)
+        if limit is not None:
+            cols = {k: (v[-limit:] if from_end else v[:limit]) for k, v in cols.items()}
+        return to_klines(cols)
+
+    def covering(self, start_ms: Optional[int], end_ms: int, limit: int,
+                 from_end: bool = False) -> Optional[List[List[Any]]]:
+        """
+        Like klines(), but only if the store holds every candle the exchange
+        would return — no internal gaps (partial downloads, merges) and no
+        missing head or tail. None means "ask the exchange instead".
+        """
+        cols = self.range(start_ms, end_ms)
+        cols = {k: (v[-limit:] if from_end else v[:limit]) for k, v in cols.items()}
+        ot = cols["open_time"]
+        if not len(ot) or not contiguous(self.interval, ot):
+            return None
+        first, last = int(ot[0]), int(ot[-1])
+        if start_ms is not None and candle_open(self.interval, first - 1) >= start_ms:
+            return None          # a candle between start_ms and our first row is missing
+        if from_end or start_ms is None:
+            if len(ot) < limit or next_candle_close(self.interval, last) <= end_ms:
+                return None
+        elif len(ot) < limit and next_candle_close(self.interval, last) <= end_ms:
+            return None
+        return to_klines(cols)
+
+    # ── Writes ──
+
+    def write(self, klines: List[Any]) -> int:
+        """Store closed candles; returns the number of new rows."""
+        if not klines:
+            return 0
+        return self.write_columns(_to_columns(klines))
+
+    def write_columns(self, new: Dict[str, np.ndarray]) -> int:
+        """Store column arrays already sorted and de-duplicated by open_time."""
+        if not len(new["open_time"]):
+            return 0
+        with self._lock:
+            last = self.last_open_time
+            ot = new["open_time"]
+            if last is None or ot[0] > last:
+                return self._append(new)
+            stored = self._columns()["open_time"]
+            old = ot[ot <= last]
+            idx = np.minimum(np.searchsorted(stored, old), len(stored) - 1)
+            if np.array_equal(stored[idx], old):
+                # Everything up to our last candle is already stored — append the rest
+                keep = ot > last
+                return self._append({k: v[keep] for k, v in new.items()})
+            return self._merge(new)
+
+    def _append(self, new: Dict[str, np.ndarray]) -> int:
+        n = len(new["open_time"])
+        if not n:
+            return 0
+        for name, dtype in COLUMNS:
+            with open(os.path.join(self.path, _file(name, dtype)), "ab") as fh:
+                fh.write(np.ascontiguousarray(new[name], dtype=dtype).tobytes())
+        self.rows += n
+        return n
+
+    def _merge(self, new: Dict[str, np.ndarray]) -> int:
+        """Out-of-order write: rebuild the series with the new rows and swap files in."""
+        old = self._columns()
+        existing = np.asarray(old["open_time"])
+        keep = ~np.isin(new["open_time"], existing)
+        added = int(keep.sum())
+        if not added:
+            return 0
+        merged_ot = np.concatenate([existing, new["open_time"][keep]])
+        order = np.argsort(merged_ot, kind="stable")
+        finals = []
+        for name, dtype in COLUMNS:
+            col = np.concatenate([np.asarray(old[name]), new[name][keep].astype(dtype)])[order]
+            final = os.path.join(self.path, _file(name, dtype))
+            with open(final + ".tmp", "wb") as fh:
+                fh.write(np.ascontiguousarray(col, dtype=dtype).tobytes())
+            finals.append(final)
+        # Swap only once every column is fully written
+        for final in finals:
+            os.replace(final + ".tmp", final)
+        self.rows += added
+        self._mapped = -1
+        return added
+
+    def stats(self) -> Dict[str, Any]:
+        return {"symbol": self.symbol, "interval": self.interval, "rows": self.rows,
+                "first_open_time": self.first_open_time, "last_open_time": self.last_open_time,
+                "bytes": self.rows * 8 * len(COLUMNS)}
+
+
+def _to_columns(klines: List[Any]) -> Dict[str, np.ndarray]:
+    rows = sorted({int(k[0]): k for k in klines}.values(), key=lambda k: int(k[0]))
+    return {
+        name: np.array([int(k[i]) if name in _INT_COLUMNS else float(k[i]) for k in rows], dtype=dtype)
+        for i, (name, dtype) in enumerate(COLUMNS)
+    }
+
+
+def to_klines(cols: Dict[str, np.ndarray]) -> List[List[Any]]:
+    lists = [cols[name].tolist() for name, _ in COLUMNS]
+    out = []
+    for row in zip(*lists):
+        out.append([
+            row[0], repr(row[1]), repr(row[2]), repr(row[3]), repr(row[4]), repr(row[5]),
+            row[6], repr(row[7]), row[8], repr(row[9]), repr(row[10]), "0",
+        ])
+    return out
+
+
+class CandleStore:
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._series: Dict[Tuple[str, str], CandleSeries] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def validate(symbol: str, interval: str) -> Tuple[str, str]:
+        """Normalised (symbol, interval); ValueError for anything unsafe to use as a path."""
+        interval_ms(interval)
+        symbol = symbol.upper()
+        if not _SYMBOL_RE.match(symbol):
+            raise ValueError(f"Invalid symbol: {symbol!r}")
+        return symbol, interval
+
+    def series(self, symbol: str, interval: str) -> CandleSeries:
+        """The series, created on disk if needed — call only with data the exchange returned."""
+        key = self.validate(symbol, interval)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = CandleSeries(self.root, *key)
+            return s
+
+    def existing(self, symbol: str, interval: str) -> Optional[CandleSeries]:
+        """The series if it is loaded or already on disk; never creates one."""
+        key = self.validate(symbol, interval)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None and os.path.isdir(os.path.join(self.root, *key)):
+                s = self._series[key] = CandleSeries(self.root, *key)
+            return s
+
+    def ingest(self, symbol: str, interval: str, klines: List[Any]) -> int:
+        """Write-through for fetched/streamed klines: store the closed ones if they extend the tail."""
+        closed = closed_only(klines)
+        if not closed:
+            return 0
+        s = self.series(symbol, interval)
+        last = s.last_open_time
+        # Only contiguous data is appended here; gaps are left for CandleSync to page through
+        if last is not None and int(closed[0][0]) > next_candle_close(interval, last):
+            return 0
+        return s.write(closed)
+
+    def _stitch(self, symbol: str, interval: str, head: List[Any], limit: int) -> Optional[List[Any]]:
+        """Closed history from the store + the live candle, or None if the store can't cover it."""
+        if not head:
+            return None
+        self.ingest(symbol, interval, head)
+        live = head[-1]
+        if int(live[6]) < now_ms():
+            live = None          # exchange returned only closed candles
+        want = limit - 1 if live is not None else limit
+        end = int(live[0]) - 1 if live is not None else None
+        series = self.existing(symbol, interval)
+        if series is None:
+            return None
+        tail = series.tail(want, end)
+        if len(tail["open_time"]) < want or not contiguous(interval, tail["open_time"]):
+            return None
+        closed = to_klines(tail)
+        if live is not None and int(closed[-1][6]) + 1 != int(live[0]):
+            return None          # store is behind; don't serve a gap
+        return closed + ([live] if live is not None else [])
+
+    def get_klines(self, client, symbol: str, interval: str, limit: int = 100, fresh: bool = False) -> List[Any]:
+        """Latest ``limit`` klines (including the open candle), read from the store first."""
+        if limit > 2:
+            head = client.get_klines(symbol, interval, 2) if fresh else kline_cache.get_klines(client, symbol, interval, 2)
+            data = self._stitch(symbol, interval, head, limit)
+            if data is not None:
+                return data
+        data = client.get_klines(symbol, interval, limit) if fresh else kline_cache.get_klines(client, symbol, interval, limit)
+        self.ingest(symbol, interval, data)
+        return data
+
+    async def aget_klines(self, client, symbol: str, interval: str, limit: int = 100) -> List[Any]:
+        """Async get_klines for AsyncExchangeClient callers; store IO runs in the threadpool."""
+        if limit > 2:
+            head = await kline_cache.aget_klines(client, symbol, interval, 2)
+            data = await run_in_threadpool(self._stitch, symbol, interval, head, limit)
+            if data is not None:
+                return data
+        data = await kline_cache.aget_klines(client, symbol, interval, limit)
+        await run_in_threadpool(self.ingest, symbol, interval, data)
+        return data
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            series = list(self._series.values())
+        return [s.stats() for s in series]
+
+
+# ── Background gap sync ───────────────────────────────────────────────────────
+
+def parse_series(spec: Optional[str]) -> List[Tuple[str, str]]:
+    """"BTCUSDT:1m,ETHUSDT:5m[:strategy]" -> [(BTCUSDT, 1m), (ETHUSDT, 5m)]."""
+    out: List[Tuple[str, str]] = []
+    for item in (spec or f"{settings.SYMBOL}:1m").split(","):
+        parts = [p.strip() for p in item.split(":") if p.strip()]
+        if parts:
+            out.append((parts[0].upper(), parts[1] if len(parts) > 1 else "1m"))
+    return list(dict.fromkeys(out))
+
+
+class CandleSync:
+    """Keeps store series caught up to the last closed candle by paging REST klines."""
+
+    def __init__(self, client, store: "CandleStore", series: Optional[List[Tuple[str, str]]] = None) -> None:
+        self.client = client
+        self.store = store
+        self.series = series if series is not None else parse_series(
+            settings.CANDLE_SYNC_SERIES or settings.POLLER_JOBS)
+        self.running = False
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self.last_sync: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.fetched = 0
+
+    def sync_one(self, symbol: str, interval: str) -> int:
+        s = self.store.existing(symbol, interval)
+        step = interval_ms(interval)
+        last = s.last_open_time if s is not None else None
+        start = last + 1 if last is not None else now_ms() - step * settings.CANDLE_SYNC_BOOTSTRAP
+        added = 0
+        while self.running or self._thread is None:
+            page = self.client.get_klines(symbol, interval, _PAGE, start_time=start)
+            closed = closed_only(page)
+            if closed:
+                s = s or self.store.series(symbol, interval)
+                added += s.write(closed)
+                start = int(closed[-1][0]) + 1
+            if len(page) < _PAGE or len(closed) < len(page):
+                break
+        self.fetched += added
+        return added
+
+    def sync_all(self) -> int:
+        added = 0
+        for symbol, interval in self.series:
+            try:
+                added += self.sync_one(symbol, interval)
+            except Exception as exc:
+                log.exception("CandleSync %s/%s failed", symbol, interval)
+                self.last_error = str(exc)
+        self.last_sync = time.time()
+        return added
+
+    def _loop(self) -> None:
+        log.info("CandleSync started — %s", ", ".join(f"{s}:{i}" for s, i in self.series))
+        while self.running:
+            added = self.sync_all()
+            if added:
+                log.info("CandleSync stored %d candles", added)
+            self._wake.wait(settings.CANDLE_SYNC_SECONDS)
+            self._wake.clear()
+        log.info("CandleSync stopped")
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="candle-sync")
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.running = False
+        self._wake.set()
+
+    def status(self) -> Dict[str, Any]:
+        return {"running": self.running, "series": [f"{s}:{i}" for s, i in self.series],
+                "last_sync": self.last_sync, "last_error": self.last_error, "fetched": self.fetched,
+                "store": self.store.stats()}
+
+
+candle_store = CandleStore(settings.CANDLE_STORE_DIR)
@@ -0,0 +1,302 @@
+# backend/services/downloader.py
+"""
+Bulk historical kline downloader.
+
+Splits [start, end) into 1000-candle pages and fetches them concurrently on the
+sync ExchangeClient, so every request goes through the shared weight limiter.
+It also stays out of the last DOWNLOAD_RESERVE_WEIGHT of budget, which is kept
+for live traffic. Pages are flushed in order into a staging series next to the
+candle store, so a job's progress is durable. A JSON checkpoint records the job
+so an interrupted download resumes from the last flushed candle. When all pages
+are in, the staging series is merged into the main store in one pass. The store
+write de-duplicates candles that overlap existing history.
+
+    python -m backend.services.downloader BTCUSDT 1m 2023-01-01 2024-01-01
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from backend.config import settings
+from backend.services.candle_store import CandleSeries, CandleStore, candle_store, closed_only
+from backend.services.intervals import candle_open, interval_ms, next_candle_close, now_ms, parse_time
+from backend.services.rate_limiter import ExchangeBusy, limiter
+
+log = logging.getLogger(__name__)
+
+_PAGE = 1000
+_MAX_ATTEMPTS = 5
+
+
+def plan_pages(interval: str, start_ms: int, end_ms: int) -> List[Tuple[int, int]]:
+    """Non-overlapping (start, end) windows of up to 1000 candles covering [start_ms, end_ms)."""
+    pages = []
+    t = candle_open(interval, start_ms)
+    if t < start_ms:
+        t = next_candle_close(interval, t)
+    if interval == "1M":
+        span = 1000 * 31 * 86_400_000     # any 1000-month window fits one request
+    else:
+        span = _PAGE * interval_ms(interval)
+    while t < end_ms:
+        pages.append((t, min(t + span, end_ms) - 1))
+        t += span
+    return pages
+
+
+@dataclass
+class DownloadJob:
+    symbol: str
+    interval: str
+    start_ms: int
+    end_ms: int
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = "pending"          # pending | running | merging | done | failed | cancelled | interrupted
+    pages_total: int = 0
+    pages_done: int = 0
+    candles: int = 0
+    stored: int = 0
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def progress(self) -> Dict[str, Any]:
+        elapsed = (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0
+        rate = self.pages_done / elapsed if elapsed > 0 else 0.0
+        remaining = self.pages_total - self.pages_done
+        return {
+            **asdict(self),
+            "percent": round(100 * self.pages_done / self.pages_total, 1) if self.pages_total else 0.0,
+            "candles_per_second": round(self.candles / elapsed, 1) if elapsed > 0 else 0.0,
+            "eta_seconds": round(remaining / rate, 1) if rate and self.status == "running" else None,
+        }
+
+
+class Downloader:
+    """Runs and tracks download jobs; one thread per job, a shared fetch pool per job."""
+
+    def __init__(self, client, store: CandleStore = candle_store, concurrency: Optional[int] = None) -> None:
+        self.client = client
+        self.store = store
+        self.concurrency = concurrency or settings.DOWNLOAD_CONCURRENCY
+        self.dir = os.path.join(store.root, ".downloads")
+        os.makedirs(self.dir, exist_ok=True)
+        self.jobs: Dict[str, DownloadJob] = {}
+        self._cancel: Dict[str, threading.Event] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._load_checkpoints()
+
+    # ── Checkpoints ──
+
+    def _checkpoint_path(self, job: DownloadJob) -> str:
+        return os.path.join(self.dir, f"{job.id}.json")
+
+    def _staging(self, job: DownloadJob) -> CandleSeries:
+        return CandleSeries(os.path.join(self.dir, job.id), job.symbol, job.interval)
+
+    def _save(self, job: DownloadJob) -> None:
+        tmp = self._checkpoint_path(job) + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(asdict(job), fh)
+        os.replace(tmp, self._checkpoint_path(job))
+
+    def _load_checkpoints(self) -> None:
+        for name in os.listdir(self.dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.dir, name)) as fh:
+                    job = DownloadJob(**json.load(fh))
+            except Exception:
+                log.exception("Downloader: unreadable checkpoint %s", name)
+                continue
+            if job.status in ("pending", "running", "merging"):
+                job.status = "interrupted"
+            self.jobs[job.id] = job
+
+    # ── Jobs ──
+
+    def submit(self, symbol: str, interval: str, start: Union[str, int], end: Union[str, int, None] = None) -> DownloadJob:
+        symbol, interval = CandleStore.validate(symbol, interval)
+        start_ms = parse_time(start)
+        if start_ms is None:
+            raise ValueError("start is required")
+        # Only closed candles are stored
+        end_ms = min(parse_time(end) or now_ms(), candle_open(interval))
+        if end_ms <= start_ms:
+            raise ValueError("end must be after start")
+        job = DownloadJob(symbol=symbol, interval=interval, start_ms=start_ms, end_ms=end_ms)
+        self._start(job)
+        return job
+
+    def resume(self, job_id: str) -> DownloadJob:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if job.status in ("running", "merging", "done"):
+            return job
+        job.error = None
+        self._start(job)
+        return job
+
+    def cancel(self, job_id: str) -> DownloadJob:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        event = self._cancel.get(job_id)
+        if event is not None:
+            event.set()
+        return job
+
+    def _start(self, job: DownloadJob) -> None:
+        with self._lock:
+            thread = self._threads.get(job.id)
+            if thread is not None and thread.is_alive():
+                return
+            self.jobs[job.id] = job
+            self._cancel[job.id] = threading.Event()
+            job.status = "pending"
+            self._save(job)
+            thread = self._threads[job.id] = threading.Thread(
+                target=self.run, args=(job,), daemon=True, name=f"download-{job.id}")
+            thread.start()
+
+    def run(self, job: DownloadJob) -> DownloadJob:
+        """Run ``job`` to completion on the calling thread."""
+        cancel = self._cancel.setdefault(job.id, threading.Event())
+        staging = self._staging(job)
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            # Resume after the last candle flushed to staging
+            resume_from = job.start_ms
+            if staging.last_open_time is not None:
+                resume_from = next_candle_close(job.interval, staging.last_open_time)
+            pages = plan_pages(job.interval, resume_from, job.end_ms)
+            if not staging.rows:
+                job.pages_done = 0
+            job.pages_total = job.pages_done + len(pages)
+            job.candles = staging.rows
+            log.info("Download %s %s/%s: %d pages from %s", job.id, job.symbol, job.interval,
+                     len(pages), datetime.fromtimestamp(resume_from / 1000, tz=timezone.utc).isoformat())
+            self._fetch_all(job, pages, staging, cancel)
+            if cancel.is_set():
+                job.status = "cancelled"
+                return job
+            job.status = "merging"
+            self._save(job)
+            job.stored = self.store.series(job.symbol, job.interval).write_columns(staging.range())
+            job.status = "done"
+            shutil.rmtree(os.path.join(self.dir, job.id), ignore_errors=True)
+            log.info("Download %s done — %d candles fetched, %d new in store", job.id, job.candles, job.stored)
+        except Exception as exc:
+            log.exception("Download %s failed", job.id)
+            job.status = "failed"
+            job.error = str(exc)
+        finally:
+            job.finished_at = time.time()
+            self._save(job)
+        return job
+
+    def _fetch_all(self, job: DownloadJob, pages: List[Tuple[int, int]], staging: CandleSeries,
+                   cancel: threading.Event) -> None:
+        ready: Dict[int, List[Any]] = {}
+        in_flight: Dict[Future, int] = {}
+        next_submit = 0
+        next_flush = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f"dl-{job.id}") as pool:
+            while next_flush < len(pages) and not cancel.is_set():
+                # Bounded read-ahead keeps out-of-order pages from piling up in memory
+                while next_submit < len(pages) and len(in_flight) + len(ready) < 2 * self.concurrency:
+                    in_flight[pool.submit(self._fetch_page, job, *pages[next_submit], cancel)] = next_submit
+                    next_submit += 1
+                done, _ = wait(list(in_flight), timeout=1.0, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    ready[in_flight.pop(fut)] = fut.result()
+                # Flush in order so staging stays append-only and the checkpoint is its last candle
+                while next_flush in ready:
+                    rows = ready.pop(next_flush)
+                    staging.write(rows)
+                    job.candles += len(rows)
+                    job.pages_done += 1
+                    next_flush += 1
+                if done:
+                    self._save(job)
+            for fut in in_flight:
+                fut.cancel()
+
+    def _fetch_page(self, job: DownloadJob, start: int, end: int, cancel: threading.Event) -> List[Any]:
+        for attempt in range(_MAX_ATTEMPTS):
+            if cancel.is_set():
+                return []
+            # Leave headroom in the shared weight budget for live trading traffic
+            while limiter.metrics()["weight_available"] < settings.DOWNLOAD_RESERVE_WEIGHT and not cancel.is_set():
+                time.sleep(0.25)
+            try:
+                return closed_only(self.client.get_klines(job.symbol, job.interval, _PAGE,
+                                                          start_time=start, end_time=end))
+            except ExchangeBusy as exc:
+                time.sleep(max(exc.retry_after, limiter.backoff(attempt)))
+            except Exception:
+                if attempt == _MAX_ATTEMPTS - 1:
+                    raise
+                time.sleep(limiter.backoff(attempt, base=1.0))
+        raise RuntimeError(f"page {start}-{end} failed after {_MAX_ATTEMPTS} attempts")
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [job.progress() for job in sorted(self.jobs.values(), key=lambda j: j.created_at, reverse=True)]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Download historical klines into the local candle store")
+    p.add_argument("symbol", nargs="?")
+    p.add_argument("interval", nargs="?", default="1m")
+    p.add_argument("start", nargs="?", help="ISO date/datetime or ms epoch")
+    p.add_argument("end", nargs="?", help="ISO date/datetime or ms epoch (default: now)")
+    p.add_argument("--resume", metavar="JOB_ID", help="Resume an interrupted job")
+    p.add_argument("--concurrency", type=int)
+    args = p.parse_args(argv)
+
+    from backend.services.exchange_client import ExchangeClient
+    dl = Downloader(ExchangeClient(), concurrency=args.concurrency)
+    if args.resume:
+        job = dl.jobs.get(args.resume)
+        if job is None:
+            p.error(f"no checkpoint for job {args.resume}")
+    elif args.symbol and args.start:
+        end_ms = min(parse_time(args.end) or now_ms(), candle_open(args.interval))
+        job = DownloadJob(symbol=args.symbol.upper(), interval=args.interval,
+                          start_ms=parse_time(args.start), end_ms=end_ms)  # type: ignore[arg-type]
+    else:
+        p.error("symbol and start are required (or --resume JOB_ID)")
+
+    stop = threading.Event()
+
+    def report() -> None:
+        while not stop.wait(5):
+            pr = job.progress()
+            print(f"[{job.id}] {pr['status']} {pr['percent']}% — {job.candles} candles, eta {pr['eta_seconds']}s",
+                  flush=True)
+
+    threading.Thread(target=report, daemon=True).start()
+    try:
+        dl.run(job)
+    except KeyboardInterrupt:
+        print(f"Interrupted — resume with --resume {job.id}")
+    stop.set()
+    print(json.dumps(job.progress(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,24 +5,13 @@ from typing import Any, Dict, List, Optional
 from binance.client import Client
 from binance.exceptions import BinanceAPIException, BinanceRequestException
 from backend.config import settings
+from backend.services.metrics import EXCHANGE_ERRORS, EXCHANGE_LATENCY
+from backend.services.rate_limiter import ExchangeBusy, limiter, request_weight
 
 log = logging.getLogger(__name__)
 _MAX_RETRIES = 3
 
 
-def _with_retry(fn, *args, **kwargs):
-    last_exc = None
-    for attempt in range(_MAX_RETRIES):
-        try:
-            return fn(*args, **kwargs)
-        except BinanceRequestException as exc:
-            last_exc = exc
-            time.sleep(1.0 * (2 ** attempt))
-        except BinanceAPIException:
-            raise
-    raise last_exc  # type: ignore
-
-
 class ExchangeClient:
     def __init__(self) -> None:
         if not settings.API_KEY or not settings.API_SECRET:
@@ -32,37 +21,75 @@ class ExchangeClient:
             self.client.API_URL = settings.API_BASE_URL
         log.info("ExchangeClient ready — base_url=%s", self.client.API_URL)
 
-    def get_klines(self, symbol: str, interval: str, limit: int = 100) -> List[Any]:
-        return _with_retry(self.client.get_klines, symbol=symbol, interval=interval, limit=limit)
+    def _call(self, fn, path: str, method: str = "GET", orders: int = 0, **kwargs):
+        """Run ``fn`` (REST ``path``) under the shared rate limiter, retrying with jittered backoff."""
+        weight = request_weight(path, kwargs, method)
+        last_exc: Optional[Exception] = None
+        for attempt in range(_MAX_RETRIES):
+            wait = limiter.reserve(weight, orders)
+            if wait:
+                time.sleep(wait)
+            started = time.perf_counter()
+            try:
+                result = fn(**kwargs)
+                EXCHANGE_LATENCY.observe(time.perf_counter() - started, "sync", path)
+                limiter.observe(getattr(self.client.response, "headers", None))
+                return result
+            except BinanceAPIException as exc:
+                EXCHANGE_ERRORS.inc("sync", path, str(exc.status_code))
+                limiter.observe(getattr(exc.response, "headers", None), exc.status_code)
+                if exc.status_code not in (418, 429):
+                    raise
+                last_exc = exc
+            except BinanceRequestException as exc:
+                EXCHANGE_ERRORS.inc("sync", path, "transport")
+                if method != "GET":
+                    raise       # the exchange answered (unparseable) — the order may exist
+                last_exc = exc
+                time.sleep(limiter.backoff(attempt))
+        if isinstance(last_exc, BinanceAPIException):
+            raise ExchangeBusy(limiter.metrics()["blocked_for_seconds"], "rate limited") from last_exc
+        raise last_exc  # type: ignore
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 100,
+                   start_time: Optional[int] = None, end_time: Optional[int] = None) -> List[Any]:
+        params: Dict[str, Any] = {"symbol": symbol, "interval": interval, "limit": limit}
+        if start_time is not None:
+            params["startTime"] = start_time
+        if end_time is not None:
+            params["endTime"] = end_time
+        return self._call(self.client.get_klines, "klines", **params)
 
     def get_ticker_price(self, symbol: str) -> Dict[str, Any]:
-        return _with_retry(self.client.get_symbol_ticker, symbol=symbol)
+        return self._call(self.client.get_symbol_ticker, "ticker/price", symbol=symbol)
 
     def get_order_book(self, symbol: str, limit: int = 20) -> Dict[str, Any]:
-        return _with_retry(self.client.get_order_book, symbol=symbol, limit=limit)
+        return self._call(self.client.get_order_book, "depth",
+                          symbol=symbol, limit=limit)
 
     def get_exchange_info(self, symbol: Optional[str] = None) -> Dict[str, Any]:
         if symbol:
-            return _with_retry(self.client.get_symbol_info, symbol)
-        return _with_retry(self.client.get_exchange_info)
+            return self._call(self.client.get_symbol_info, "exchangeInfo", symbol=symbol)
+        return self._call(self.client.get_exchange_info, "exchangeInfo")
 
     def get_account(self) -> Dict[str, Any]:
-        return _with_retry(self.client.get_account)
+        return self._call(self.client.get_account, "account")
 
     def get_open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         params: Dict[str, Any] = {}
         if symbol:
             params["symbol"] = symbol
-        return _with_retry(self.client.get_open_orders, **params)
+        return self._call(self.client.get_open_orders, "openOrders", **params)
 
     def get_order(self, symbol: str, order_id: int) -> Dict[str, Any]:
-        return _with_retry(self.client.get_order, symbol=symbol, orderId=order_id)
+        return self._call(self.client.get_order, "order", symbol=symbol, orderId=order_id)
 
     def cancel_order(self, symbol: str, order_id: int) -> Dict[str, Any]:
-        return _with_retry(self.client.cancel_order, symbol=symbol, orderId=order_id)
+        return self._call(self.client.cancel_order, "order", method="DELETE",
+                          symbol=symbol, orderId=order_id)
 
     def get_trade_history(self, symbol: str, limit: int = 50) -> List[Dict[str, Any]]:
-        return _with_retry(self.client.get_my_trades, symbol=symbol, limit=limit)
+        return self._call(self.client.get_my_trades, "myTrades", symbol=symbol, limit=limit)
 
     def create_order(self, *, symbol: str, side: str, type: str,
                      quantity: Optional[float] = None, price: Optional[float] = None,
@@ -76,5 +103,5 @@ class ExchangeClient:
             payload["timeInForce"] = time_in_force
         log.info("create_order test=%s payload=%s", test, payload)
         if test:
-            return _with_retry(self.client.create_test_order, **payload)
-        return _with_retry(self.client.create_order, **payload)
+            return self._call(self.client.create_test_order, "order/test", **payload)
+        return self._call(self.client.create_order, "order", method="POST", orders=1, **payload)
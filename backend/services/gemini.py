@@ -0,0 +1,170 @@
+# backend/services/gemini.py
+"""
+Shared Gemini transport and response cache for /chat and /automation/ai-analysis.
+
+All calls go through one pooled keep-alive httpx.AsyncClient. The system prompt
+is sent as ``systemInstruction`` rather than as a fake first conversation turn.
+Answers are cached by (model, normalized prompt, snapshot) for GEMINI_CACHE_TTL
+seconds, bounded by LRU at GEMINI_CACHE_SIZE. Concurrent identical requests
+share a single upstream call, and that call runs as its own task, so a
+disconnected first caller doesn't cancel it for the rest.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from backend.config import settings
+from backend.services.metrics import GEMINI_LATENCY, registry
+
+log = logging.getLogger(__name__)
+
+GEMINI_CACHE = registry.counter("gemini_cache_total", "Gemini response cache lookups", ("result",))
+
+_http: Optional[httpx.AsyncClient] = None
+_http_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def http() -> httpx.AsyncClient:
+    """The shared client, (re)built if the running loop changed (e.g. between test clients)."""
+    global _http, _http_loop
+    loop = asyncio.get_running_loop()
+    if _http is None or _http_loop is not loop or _http.is_closed:
+        _http = httpx.AsyncClient(
+            base_url=settings.GEMINI_BASE_URL,
+            timeout=httpx.Timeout(settings.GEMINI_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=settings.GEMINI_MAX_CONNECTIONS,
+                                max_keepalive_connections=settings.GEMINI_MAX_CONNECTIONS),
+        )
+        _http_loop = loop
+    return _http
+
+
+async def aclose() -> None:
+    global _http
+    if _http is not None and not _http.is_closed:
+        await _http.aclose()
+    _http = None
+
+
+async def generate(model: str, contents: List[Dict[str, Any]], system: Optional[str] = None,
+                   api_key: Optional[str] = None) -> Dict[str, Any]:
+    """One generateContent call; raises httpx.HTTPStatusError on non-2xx."""
+    payload: Dict[str, Any] = {"contents": contents}
+    if system:
+        payload["systemInstruction"] = {"parts": [{"text": system}]}
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        r = await http().post(f"/models/{model}:generateContent", json=payload,
+                              params={"key": api_key or settings.GEMINI_API_KEY})
+        outcome = str(r.status_code)
+        r.raise_for_status()
+        return r.json()
+    finally:
+        GEMINI_LATENCY.observe(time.perf_counter() - started, model, outcome)
+
+
+async def list_models(api_key: Optional[str] = None) -> Dict[str, Any]:
+    r = await http().get("/models", params={"key": api_key or settings.GEMINI_API_KEY})
+    r.raise_for_status()
+    return r.json()
+
+
+# ── Response cache ───────────────────────────────────────────────────────────
+
+def normalize(prompt: str) -> str:
+    return " ".join(prompt.split()).casefold()
+
+
+def cache_key(model: str, prompt: str, snapshot: Optional[Dict[str, Any]] = None) -> str:
+    raw = json.dumps([model, normalize(prompt), snapshot], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._flights: Dict[str, "asyncio.Task[Any]"] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def get_or_call(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """(value, served_from_cache). Failures are not cached; every waiter sees the error."""
+        if self.ttl <= 0:
+            return await fn(), False
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                GEMINI_CACHE.inc("hit")
+                return value, True
+            task = self._flights.get(key)
+            if task is not None:
+                self.coalesced += 1
+                GEMINI_CACHE.inc("coalesced")
+            else:
+                self.misses += 1
+                GEMINI_CACHE.inc("miss")
+        if task is None:
+            task = self._flights[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._landed(key, t))
+            return await asyncio.shield(task), False
+        return await asyncio.shield(task), True
+
+    def _landed(self, key: str, task: "asyncio.Task[Any]") -> None:
+        self._flights.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._store(key, task.result())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "in_flight": len(self._flights),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+response_cache = ResponseCache(max_entries=settings.GEMINI_CACHE_SIZE, ttl=settings.GEMINI_CACHE_TTL)
@@ -0,0 +1,134 @@
+# backend/services/indicator_engine.py
+"""
+Incremental EMA + Wilder RSI per (symbol, interval).
+
+Closed candles are folded into the running state one at a time in O(1); the
+still-forming last candle is evaluated provisionally without being committed,
+so the result has the same shape and semantics as strategy_service.get_signal.
+"""
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.services.metrics import SIGNAL_LATENCY
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class IndicatorState:
+    """Running EMA / RSI state up to and including the last committed candle."""
+    ema_span: int
+    rsi_window: int
+    last_open_time: int = -1
+    count: int = 0
+    close: float = 0.0
+    ema: float = 0.0
+    avg_gain: float = 0.0
+    avg_loss: float = 0.0
+
+    @property
+    def ema_alpha(self) -> float:
+        return 2.0 / (self.ema_span + 1)
+
+    @property
+    def rsi_alpha(self) -> float:
+        return 1.0 / self.rsi_window
+
+    def step(self, close: float) -> Tuple[float, float, float]:
+        """Return (ema, avg_gain, avg_loss) after ``close`` without mutating state."""
+        if self.count == 0:
+            # Mirrors pandas ewm(adjust=False) seeding and ta's 0.0 first diff
+            return close, 0.0, 0.0
+        diff = close - self.close
+        gain = diff if diff > 0 else 0.0
+        loss = -diff if diff < 0 else 0.0
+        ema = self.ema + self.ema_alpha * (close - self.ema)
+        avg_gain = self.avg_gain + self.rsi_alpha * (gain - self.avg_gain)
+        avg_loss = self.avg_loss + self.rsi_alpha * (loss - self.avg_loss)
+        return ema, avg_gain, avg_loss
+
+    def push(self, open_time: int, close: float) -> None:
+        self.ema, self.avg_gain, self.avg_loss = self.step(close)
+        self.close = close
+        self.last_open_time = open_time
+        self.count += 1
+
+
+def _rsi(avg_gain: float, avg_loss: float) -> float:
+    if avg_loss == 0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+class IndicatorEngine:
+    """Registry of IndicatorState keyed on (symbol, interval)."""
+
+    def __init__(self, ema_span: Optional[int] = None, rsi_window: Optional[int] = None) -> None:
+        self.ema_span = ema_span or settings.EMA_SPAN
+        self.rsi_window = rsi_window or settings.RSI_WINDOW
+        self._states: Dict[Tuple[str, str], IndicatorState] = {}
+        self._lock = threading.Lock()
+
+    def reset(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> None:
+        with self._lock:
+            if symbol is None:
+                self._states.clear()
+            else:
+                self._states.pop((symbol.upper(), interval or ""), None)
+
+    def _new_state(self) -> IndicatorState:
+        return IndicatorState(ema_span=self.ema_span, rsi_window=self.rsi_window)
+
+    def update(self, symbol: str, interval: str, klines: List[Any]) -> IndicatorState:
+        """
+        Commit every kline except the last (the forming candle) that is newer than
+        the state. If the batch does not overlap the state (gap, restart, first
+        call) the state is rebuilt from the batch.
+        """
+        with self._lock:
+            return self._update(symbol, interval, klines)
+
+    def _update(self, symbol: str, interval: str, klines: List[Any]) -> IndicatorState:
+        key = (symbol.upper(), interval)
+        closed = klines[:-1]
+        state = self._states.get(key)
+        if state is not None and int(klines[-1][0]) <= state.last_open_time:
+            # Batch is older than the state (stale snapshot) — evaluate it standalone
+            state = self._new_state()
+        elif state is None or not closed or int(closed[0][0]) > state.last_open_time:
+            state = self._new_state()
+            self._states[key] = state
+        for k in closed:
+            open_time = int(k[0])
+            if open_time > state.last_open_time:
+                state.push(open_time, float(k[4]))
+        return state
+
+    def get_signal(self, symbol: str, interval: str, klines: List[Any]) -> Dict[str, Any]:
+        """Drop-in replacement for strategy_service.get_signal backed by incremental state."""
+        with SIGNAL_LATENCY.time("incremental"):
+            return self._signal(symbol, interval, klines)
+
+    def _signal(self, symbol: str, interval: str, klines: List[Any]) -> Dict[str, Any]:
+        min_rows = max(self.ema_span, self.rsi_window) + 2
+        if len(klines) < min_rows:
+            return {"signal": "HOLD", "reason": "not enough data"}
+
+        with self._lock:
+            state = self._update(symbol, interval, klines)
+            prev_close, prev_ema = state.close, state.ema
+            price = float(klines[-1][4])
+            ema, avg_gain, avg_loss = state.step(price)
+        rsi = _rsi(avg_gain, avg_loss)
+
+        if prev_close < prev_ema and price > ema and rsi < settings.RSI_OVERSOLD:
+            return {"signal": "BUY",  "price": price, "ema": ema, "rsi": rsi}
+        if prev_close > prev_ema and price < ema and rsi > settings.RSI_OVERBOUGHT:
+            return {"signal": "SELL", "price": price, "ema": ema, "rsi": rsi}
+        return {"signal": "HOLD", "price": price, "ema": ema, "rsi": rsi}
+
+
+engine = IndicatorEngine()
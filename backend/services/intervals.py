@@ -0,0 +1,63 @@
+# backend/services/intervals.py
+"""Binance kline interval helpers — durations, candle boundaries and time parsing (UTC, ms)."""
+import time
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+_MINUTE = 60_000
+_HOUR = 60 * _MINUTE
+_DAY = 24 * _HOUR
+
+INTERVAL_MS = {
+    "1s": 1_000,
+    "1m": _MINUTE, "3m": 3 * _MINUTE, "5m": 5 * _MINUTE, "15m": 15 * _MINUTE, "30m": 30 * _MINUTE,
+    "1h": _HOUR, "2h": 2 * _HOUR, "4h": 4 * _HOUR, "6h": 6 * _HOUR, "8h": 8 * _HOUR, "12h": 12 * _HOUR,
+    "1d": _DAY, "3d": 3 * _DAY, "1w": 7 * _DAY, "1M": 30 * _DAY,
+}
+
+# Weekly candles open on Monday 00:00 UTC; the epoch was a Thursday.
+_WEEK_OFFSET_MS = 4 * _DAY
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def parse_time(value: Union[str, int, float, None]) -> Optional[int]:
+    """ms epoch, or an ISO date/datetime (UTC when no zone) -> ms epoch."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) or str(value).isdigit():
+        return int(value)
+    dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def interval_ms(interval: str) -> int:
+    try:
+        return INTERVAL_MS[interval]
+    except KeyError:
+        raise ValueError(f"Unsupported interval: {interval}")
+
+
+def candle_open(interval: str, ts_ms: Optional[int] = None) -> int:
+    """Open time of the candle containing ``ts_ms``."""
+    ts = now_ms() if ts_ms is None else ts_ms
+    if interval == "1M":
+        dt = datetime.fromtimestamp(ts / 1000, tz=timezone.utc)
+        return int(datetime(dt.year, dt.month, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    step = interval_ms(interval)
+    offset = _WEEK_OFFSET_MS if interval == "1w" else 0
+    return ts - ((ts - offset) % step)
+
+
+def next_candle_close(interval: str, ts_ms: Optional[int] = None) -> int:
+    """Time (ms) at which the candle containing ``ts_ms`` closes."""
+    ts = now_ms() if ts_ms is None else ts_ms
+    if interval == "1M":
+        dt = datetime.fromtimestamp(candle_open(interval, ts) / 1000, tz=timezone.utc)
+        year, month = (dt.year + 1, 1) if dt.month == 12 else (dt.year, dt.month + 1)
+        return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    return candle_open(interval, ts) + interval_ms(interval)
@@ -0,0 +1,161 @@
+# backend/services/kline_cache.py
+"""
+Process-wide kline cache shared by market routes, automation and the poller.
+
+Entries are keyed on (symbol, interval, limit) and expire when the current
+candle for their interval closes (capped by KLINE_CACHE_MAX_TTL). Concurrent
+misses for the same key share one upstream request — for async callers it runs
+as its own task, so a cancelled first caller doesn't cancel it for the rest.
+Memory is bounded by LRU.
+Sync callers use get_klines; async callers with an AsyncExchangeClient use
+aget_klines. Both share the same entries and counters.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.services.intervals import next_candle_close
+
+log = logging.getLogger(__name__)
+
+Key = Tuple[str, str, int]
+
+
+class _Flight:
+    """An in-progress upstream fetch that other callers can wait on."""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Optional[List[Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class KlineCache:
+    def __init__(self, max_entries: int = 512, max_ttl: float = 300.0) -> None:
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[Key, Tuple[float, List[Any]]]" = OrderedDict()
+        self._flights: Dict[Key, _Flight] = {}
+        self._aflights: Dict[Key, "asyncio.Task[List[Any]]"] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _expiry(self, interval: str) -> float:
+        now = time.time()
+        try:
+            close = next_candle_close(interval, int(now * 1000)) / 1000
+        except ValueError:
+            close = now + self.max_ttl
+        return min(close, now + self.max_ttl)
+
+    def _lookup(self, key: Key) -> Optional[List[Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return data
+
+    def _store(self, key: Key, data: List[Any]) -> None:
+        self._entries[key] = (self._expiry(key[1]), data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_klines(self, client, symbol: str, interval: str, limit: int = 100) -> List[Any]:
+        """Return klines from cache, or fetch them once via ``client.get_klines``."""
+        key = (symbol.upper(), interval, int(limit))
+        with self._lock:
+            data = self._lookup(key)
+            if data is not None:
+                self.hits += 1
+                return data
+            self.misses += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result  # type: ignore
+
+        try:
+            data = client.get_klines(key[0], interval, key[2])
+            flight.result = data
+            with self._lock:
+                self._store(key, data)
+            return data
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    async def aget_klines(self, client, symbol: str, interval: str, limit: int = 100) -> List[Any]:
+        """Async variant of get_klines for clients whose get_klines is a coroutine."""
+        key = (symbol.upper(), interval, int(limit))
+        with self._lock:
+            data = self._lookup(key)
+            if data is not None:
+                self.hits += 1
+                return data
+            self.misses += 1
+            task = self._aflights.get(key)
+            if task is not None:
+                self.coalesced += 1
+        if task is None:
+            task = self._aflights[key] = asyncio.ensure_future(client.get_klines(key[0], interval, key[2]))
+            task.add_done_callback(lambda t: self._landed(key, t))
+        return await asyncio.shield(task)
+
+    def _landed(self, key: Key, task: "asyncio.Task[List[Any]]") -> None:
+        self._aflights.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            with self._lock:
+                self._store(key, task.result())
+
+    def invalidate(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> None:
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == symbol.upper()
+                        and (interval is None or k[1] == interval)]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "in_flight": len(self._flights) + len(self._aflights),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+kline_cache = KlineCache(max_entries=settings.KLINE_CACHE_MAX_ENTRIES,
+                         max_ttl=settings.KLINE_CACHE_MAX_TTL)
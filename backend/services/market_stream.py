@@ -0,0 +1,266 @@
+# backend/services/market_stream.py
+"""
+Asyncio market-data ingestion from Binance kline/ticker streams.
+
+Keeps a rolling candle buffer per (symbol, interval) in REST kline format and
+fires ``on_candle_close`` the moment a candle closes. Buffers are backfilled
+over REST on every (re)connect. The transport is pluggable so a replay
+transport can drive the service without a network.
+"""
+import asyncio
+import itertools
+import json
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from backend.config import settings
+
+log = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+CandleCallback = Callable[[str, str, List[Any]], Optional[Awaitable[None]]]
+
+
+# ── Transports ────────────────────────────────────────────────────────────────
+
+class StreamSession:
+    """A combined-stream connection whose streams change via SUBSCRIBE / UNSUBSCRIBE."""
+
+    def __init__(self, ws) -> None:
+        self.ws = ws
+        self._ids = itertools.count(1)
+
+    async def subscribe(self, streams: List[str]) -> None:
+        await self._send("SUBSCRIBE", streams)
+
+    async def unsubscribe(self, streams: List[str]) -> None:
+        await self._send("UNSUBSCRIBE", streams)
+
+    async def _send(self, method: str, streams: List[str]) -> None:
+        if streams:
+            await self.ws.send(json.dumps({"method": method, "params": list(streams), "id": next(self._ids)}))
+
+    async def messages(self) -> AsyncIterator[Dict[str, Any]]:
+        async for raw in self.ws:
+            msg = json.loads(raw)
+            if "id" in msg and ("result" in msg or "error" in msg):
+                if msg.get("error"):
+                    log.warning("Stream control request %s rejected: %s", msg["id"], msg["error"])
+                continue
+            yield msg.get("data", msg)
+
+
+class WebSocketTransport:
+    """Binance combined-stream websocket transport."""
+
+    def __init__(self, url: Optional[str] = None) -> None:
+        self.url = (url or settings.STREAM_WS_URL).rstrip("/")
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[StreamSession]:
+        """One connection with no initial streams; the caller subscribes as needed."""
+        import websockets
+
+        async with websockets.connect(f"{self.url}/stream", ping_interval=20, ping_timeout=20,
+                                      max_queue=1024) as ws:
+            log.info("Market stream session connected")
+            yield StreamSession(ws)
+
+    async def messages(self, streams: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        import websockets
+
+        uri = f"{self.url}/stream?streams={'/'.join(streams)}"
+        async with websockets.connect(uri, ping_interval=20, ping_timeout=20, max_queue=1024) as ws:
+            log.info("Market stream connected — %d streams", len(streams))
+            async for raw in ws:
+                msg = json.loads(raw)
+                yield msg.get("data", msg)
+
+
+class ReplayTransport:
+    """Replays pre-recorded stream payloads — a local stand-in for tests and demos."""
+
+    def __init__(self, payloads: Iterable[Dict[str, Any]], delay: float = 0.0) -> None:
+        self.payloads = list(payloads)
+        self.delay = delay
+        self.connects = 0
+
+    async def messages(self, streams: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        self.connects += 1
+        for payload in self.payloads:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield payload
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator["_ReplaySession"]:
+        self.connects += 1
+        yield _ReplaySession(self)
+
+
+class _ReplaySession:
+    def __init__(self, transport: ReplayTransport) -> None:
+        self.transport = transport
+        self.streams: List[str] = []
+
+    async def subscribe(self, streams: List[str]) -> None:
+        self.streams += [s for s in streams if s not in self.streams]
+
+    async def unsubscribe(self, streams: List[str]) -> None:
+        self.streams = [s for s in self.streams if s not in streams]
+
+    async def messages(self) -> AsyncIterator[Dict[str, Any]]:
+        for payload in self.transport.payloads:
+            if self.transport.delay:
+                await asyncio.sleep(self.transport.delay)
+            yield payload
+
+
+# ── Service ───────────────────────────────────────────────────────────────────
+
+def _kline_from_event(k: Dict[str, Any]) -> List[Any]:
+    """Convert a stream kline payload to the REST /api/v3/klines row layout."""
+    return [k["t"], k["o"], k["h"], k["l"], k["c"], k["v"], k["T"],
+            k.get("q", "0"), k.get("n", 0), k.get("V", "0"), k.get("Q", "0"), "0"]
+
+
+class MarketStream:
+    def __init__(self, client, symbols: List[str], intervals: List[str],
+                 transport=None, on_candle_close: Optional[CandleCallback] = None,
+                 buffer_size: Optional[int] = None) -> None:
+        self.client = client
+        self.symbols = [s.upper() for s in symbols]
+        self.intervals = list(intervals)
+        self.transport = transport or WebSocketTransport()
+        self.on_candle_close = on_candle_close
+        self.buffer_size = buffer_size or settings.STREAM_BUFFER_SIZE
+        self.buffers: Dict[Key, Deque[List[Any]]] = {
+            (s, i): deque(maxlen=self.buffer_size) for s in self.symbols for i in self.intervals
+        }
+        self.prices: Dict[str, float] = {}
+        self._closed: Dict[Key, int] = {}  # open time of the last candle whose close was dispatched
+        self.connected = False
+        self.reconnects = 0
+        self._task: Optional[asyncio.Task] = None
+
+    # ── Queries ──
+
+    def covers(self, symbol: str, interval: str) -> bool:
+        return self.connected and (symbol.upper(), interval) in self.buffers
+
+    def klines(self, symbol: str, interval: str) -> List[Any]:
+        return list(self.buffers.get((symbol.upper(), interval), ()))
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def streams(self) -> List[str]:
+        names = [f"{s.lower()}@kline_{i}" for s in self.symbols for i in self.intervals]
+        names += [f"{s.lower()}@miniTicker" for s in self.symbols]
+        return names
+
+    # ── Ingestion ──
+
+    async def backfill(self) -> None:
+        """Reload every buffer over REST, e.g. after a (re)connect."""
+        for key in self.buffers:
+            symbol, interval = key
+            try:
+                rows = await run_in_threadpool(self.client.get_klines, symbol, interval, self.buffer_size)
+            except Exception:
+                log.exception("Backfill failed for %s %s", symbol, interval)
+                continue
+            self._merge(key, rows)
+
+    def _merge(self, key: Key, rows: List[Any]) -> None:
+        buf = self.buffers[key]
+        merged = {int(r[0]): r for r in buf}
+        merged.update({int(r[0]): r for r in rows})
+        buf.clear()
+        buf.extend(merged[t] for t in sorted(merged))
+
+    async def handle(self, payload: Dict[str, Any]) -> None:
+        event = payload.get("e")
+        if event == "kline":
+            await self._on_kline(payload)
+        elif event in ("24hrMiniTicker", "24hrTicker"):
+            self.prices[payload["s"]] = float(payload["c"])
+
+    async def _on_kline(self, payload: Dict[str, Any]) -> None:
+        k = payload["k"]
+        key = (payload["s"].upper(), k["i"])
+        buf = self.buffers.get(key)
+        if buf is None:
+            return
+        row = _kline_from_event(k)
+        if row[0] <= self._closed.get(key, -1):
+            return  # replayed update for a candle that has already closed
+        if buf and buf[-1][0] == row[0]:
+            buf[-1] = row
+        elif not buf or row[0] > buf[-1][0]:
+            buf.append(row)
+        else:
+            return  # stale update for an older candle
+        if k.get("x"):
+            self._closed[key] = row[0]
+        if k.get("x") and self.on_candle_close is not None:
+            try:
+                if asyncio.iscoroutinefunction(self.on_candle_close):
+                    await self.on_candle_close(key[0], key[1], list(buf))
+                else:
+                    # Sync callbacks (the poller's strategy + order path) do blocking IO
+                    await run_in_threadpool(self.on_candle_close, key[0], key[1], list(buf))
+            except Exception:
+                log.exception("on_candle_close failed for %s %s", *key)
+
+    async def run_once(self) -> None:
+        """One connection session: backfill, then consume until the transport ends."""
+        await self.backfill()
+        self.connected = True
+        try:
+            async for payload in self.transport.messages(self.streams()):
+                await self.handle(payload)
+        finally:
+            self.connected = False
+
+    async def run(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                await self.run_once()
+                delay, backoff = 1.0, 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                log.warning("Market stream disconnected: %s — retrying in %.0fs", exc, backoff)
+                delay, backoff = backoff, min(backoff * 2, 60.0)
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        if not self.is_running:
+            self._task = asyncio.get_event_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.connected = False
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "streams": self.streams(),
+            "buffers": {f"{s}:{i}": len(b) for (s, i), b in self.buffers.items()},
+        }
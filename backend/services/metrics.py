@@ -0,0 +1,221 @@
+# backend/services/metrics.py
+"""
+Minimal Prometheus-style metrics with per-thread shards.
+
+Each thread records into its own shard, so the hot path never takes a lock;
+shards are merged only when /metrics is scraped. Shards of threads that have
+exited (reaped threadpool workers) are folded into a retained base total, so
+the shard list stays as long as the live thread count. Gauges are callbacks
+read at scrape time.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        self._shards: Dict[threading.Thread, Dict[LabelValues, list]] = {}
+        self._base: Dict[LabelValues, list] = {}     # totals from threads that have exited
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict[LabelValues, list]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._fold_dead()
+                self._shards[threading.current_thread()] = shard
+        return shard
+
+    def _fold_dead(self) -> None:
+        # Caller holds _shards_lock. A dead thread can't write its shard any more.
+        for thread in [t for t in self._shards if not t.is_alive()]:
+            _add_into(self._base, self._shards.pop(thread))
+
+    def _merged(self) -> Dict[LabelValues, list]:
+        with self._shards_lock:
+            self._fold_dead()
+            shards = list(self._shards.values())
+            out = {key: list(values) for key, values in self._base.items()}
+        for shard in shards:
+            _add_into(out, shard)
+        return out
+
+    def _fmt_labels(self, values: LabelValues, extra: str = "") -> str:
+        parts = [f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _add_into(acc: Dict[LabelValues, list], shard: Dict[LabelValues, list]) -> None:
+    for key, values in list(shard.items()):
+        cell = acc.get(key)
+        if cell is None:
+            acc[key] = list(values)
+        else:
+            for i, v in enumerate(values):
+                cell[i] += v
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            shard[labels] = [amount]
+        else:
+            cell[0] += amount
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{self._fmt_labels(k)} {v[0]}" for k, v in sorted(self._merged().items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            # [bucket counts..., +Inf count, sum]
+            cell = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                cell[i] += 1
+                break
+        else:
+            cell[len(self.buckets)] += 1
+        cell[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self) -> List[str]:
+        lines: List[str] = []
+        for key, cell in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, cell):
+                cumulative += count
+                le = self._fmt_labels(key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += cell[len(self.buckets)]
+            le = self._fmt_labels(key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{self._fmt_labels(key)} {cell[-1]}")
+            lines.append(f"{self.name}_count{self._fmt_labels(key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Scrape-time gauge; ``fn`` returns {label values tuple: value}."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str],
+                 fn: Callable[[], Dict[LabelValues, Optional[float]]]) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, value in sorted(self.fn().items()):
+            if value is None:
+                continue
+            parts = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, key))
+            lines.append(f"{self.name}{{{parts}}} {float(value)}" if parts else f"{self.name} {float(value)}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str],
+              fn: Callable[[], Dict[LabelValues, Optional[float]]]) -> Gauge:
+        return self.register(Gauge(name, help, labels, fn))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        out: List[str] = []
+        for m in metrics:
+            try:
+                body = m.render()  # type: ignore[attr-defined]
+            except Exception as exc:
+                out.append(f"# {m.name} collection failed: {exc}")  # type: ignore[attr-defined]
+                continue
+            out.append(f"# HELP {m.name} {m.help}")  # type: ignore[attr-defined]
+            out.append(f"# TYPE {m.name} {m.kind}")  # type: ignore[attr-defined]
+            out.extend(body)
+        return "\n".join(out) + "\n"
+
+
+registry = Registry()
+
+# ── Hot-path metrics ──────────────────────────────────────────────────────────
+
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+EXCHANGE_LATENCY = registry.histogram(
+    "exchange_request_duration_seconds", "Exchange REST call latency", ("client", "endpoint"))
+EXCHANGE_ERRORS = registry.counter(
+    "exchange_request_errors_total", "Exchange REST call failures", ("client", "endpoint", "error"))
+SIGNAL_LATENCY = registry.histogram(
+    "signal_compute_seconds", "Strategy signal computation time", ("impl",),
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5))
+POLLER_LAG = registry.histogram(
+    "poller_job_lag_seconds", "Delay between scheduled and actual poller job start", ("symbol", "interval"))
+POLLER_DURATION = registry.histogram(
+    "poller_job_duration_seconds", "Poller job run time", ("symbol", "interval"))
+POLLER_ERRORS = registry.counter(
+    "poller_job_errors_total", "Poller job failures", ("symbol", "interval"))
+DB_QUERY_LATENCY = registry.histogram(
+    "db_query_duration_seconds", "Database statement execution time", ("operation",))
+DB_SESSION_LATENCY = registry.histogram(
+    "db_session_duration_seconds", "Lifetime of request-scoped DB sessions")
+GEMINI_LATENCY = registry.histogram(
+    "gemini_request_duration_seconds", "Gemini generateContent latency", ("model", "outcome"),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0))
@@ -0,0 +1,260 @@
+# backend/services/model_router.py
+"""
+Health-aware, hedged routing across the Gemini fallback chain.
+
+Each model keeps a window of recent successful latencies, an EWMA error rate
+and a circuit breaker: ROUTER_FAILURE_THRESHOLD consecutive failures open the
+circuit for ROUTER_OPEN_SECONDS (doubling on repeat, capped at 5 min), after
+which a single probe request is let through — one at a time. Candidates are
+tried in the caller's preference order, with open circuits skipped and
+error-prone models moved back; when every circuit is open the call fails fast
+with AllModelsFailed. HTTP 400 is the request's fault, not the model's, so it
+does not count towards the circuit.
+
+A request is hedged if it has not answered by the model's ROUTER_HEDGE_PERCENTILE
+latency: the next candidate is started alongside it and the first success
+wins (the loser is cancelled). Each attempt is capped at ROUTER_ATTEMPT_TIMEOUT
+and the whole call at ROUTER_DEADLINE_SECONDS.
+
+The transport is injectable — any ``async (model, contents, system) -> value``;
+the default is gemini.generate, which honours GEMINI_BASE_URL for stub servers.
+A call can pass its own transport (e.g. one that also parses the reply), so a
+reply the caller can't use counts as that model failing.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from backend.config import settings
+from backend.services import gemini
+from backend.services.metrics import registry
+
+log = logging.getLogger(__name__)
+
+ROUTER_EVENTS = registry.counter("gemini_router_events_total", "Gemini router outcomes per model",
+                                 ("model", "event"))
+
+Transport = Callable[[str, List[Dict[str, Any]], Optional[str]], Awaitable[Any]]
+
+_MAX_OPEN_SECONDS = 300.0
+_ERROR_HALF_LIFE = 60.0     # a demoted model drifts back up once it stops failing
+
+
+class AllModelsFailed(Exception):
+    def __init__(self, errors: List[Tuple[str, str]]) -> None:
+        last = errors[-1][1] if errors else "no model available"
+        super().__init__(f"All Gemini models failed. Last error: {last}")
+        self.errors = errors
+
+
+class _ModelHealth:
+    def __init__(self, model: str, window: int = 50) -> None:
+        self.model = model
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self._error_rate = 0.0          # EWMA over attempts, decayed with time
+        self._error_at = 0.0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.open_seconds = 0.0
+        self.probing = False
+        self.successes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def error_rate(self, now: float) -> float:
+        return self._error_rate * 0.5 ** ((now - self._error_at) / _ERROR_HALF_LIFE)
+
+    def _record(self, outcome: float, now: float) -> None:
+        self._error_rate = self.error_rate(now) * 0.8 + 0.2 * outcome
+        self._error_at = now
+
+    def state(self, now: float) -> str:
+        if self.open_until > now:
+            return "open"
+        return "half_open" if self.open_seconds else "closed"
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.latencies) < 5:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def succeeded(self, latency: float, now: float) -> None:
+        self.latencies.append(latency)
+        self._record(0.0, now)
+        self.consecutive_failures = 0
+        self.open_until = self.open_seconds = 0.0
+        self.probing = False
+        self.successes += 1
+
+    def failed(self, error: str, now: float) -> bool:
+        """Record a failure; True if this opened (or re-opened) the circuit."""
+        self._record(1.0, now)
+        self.consecutive_failures += 1
+        self.failures += 1
+        self.last_error = error
+        half_open = self.open_seconds > 0
+        self.probing = False
+        if half_open or self.consecutive_failures >= settings.ROUTER_FAILURE_THRESHOLD:
+            self.open_seconds = min(self.open_seconds * 2 or settings.ROUTER_OPEN_SECONDS, _MAX_OPEN_SECONDS)
+            self.open_until = now + self.open_seconds
+            return True
+        return False
+
+
+def _describe(exc: BaseException) -> str:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"HTTP {exc.response.status_code}"
+    if isinstance(exc, asyncio.TimeoutError):
+        return "timeout"
+    return str(exc) or type(exc).__name__
+
+
+class ModelRouter:
+    def __init__(self, transport: Optional[Transport] = None) -> None:
+        self.transport: Transport = transport or gemini.generate
+        self.health: Dict[str, _ModelHealth] = {}
+        self.hedges = 0
+
+    def _health(self, model: str) -> _ModelHealth:
+        h = self.health.get(model)
+        if h is None:
+            h = self.health[model] = _ModelHealth(model)
+        return h
+
+    def _usable(self, model: str, now: float) -> bool:
+        h = self._health(model)
+        state = h.state(now)
+        return state == "closed" or (state == "half_open" and not h.probing)
+
+    def candidates(self, models: Sequence[str]) -> List[str]:
+        """Usable models, healthiest first; preference order breaks ties. Empty if every circuit is open."""
+        now = time.time()
+        usable = [(round(self._health(m).error_rate(now) * 4) / 4, i, m)
+                  for i, m in enumerate(dict.fromkeys(models)) if self._usable(m, now)]
+        return [m for _, _, m in sorted(usable)]
+
+    def hedge_delay(self, model: str) -> float:
+        p = self._health(model).percentile(settings.ROUTER_HEDGE_PERCENTILE)
+        delay = p if p is not None else settings.ROUTER_HEDGE_DEFAULT_SECONDS
+        return max(0.25, min(delay, settings.ROUTER_ATTEMPT_TIMEOUT))
+
+    async def _attempt(self, transport: Transport, model: str, contents: List[Dict[str, Any]],
+                       system: Optional[str]) -> Any:
+        h = self._health(model)
+        started = time.perf_counter()
+        try:
+            resp = await asyncio.wait_for(transport(model, contents, system), settings.ROUTER_ATTEMPT_TIMEOUT)
+        except asyncio.CancelledError:
+            ROUTER_EVENTS.inc(model, "cancelled")
+            raise
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code != 400:
+                self._failed(h, exc)
+            else:
+                h.probing = False
+                ROUTER_EVENTS.inc(model, "bad_request")
+            raise
+        except Exception as exc:
+            self._failed(h, exc)
+            raise
+        h.succeeded(time.perf_counter() - started, time.time())
+        ROUTER_EVENTS.inc(model, "success")
+        return resp
+
+    def _failed(self, h: _ModelHealth, exc: BaseException) -> None:
+        model, error = h.model, _describe(exc)
+        if h.failed(error, time.time()):
+            ROUTER_EVENTS.inc(model, "circuit_open")
+            log.warning("Gemini model %s circuit open for %.0fs (%s)", model, h.open_seconds, error)
+        ROUTER_EVENTS.inc(model, "failure")
+
+    async def call(self, models: Sequence[str], contents: List[Dict[str, Any]], system: Optional[str] = None,
+                   transport: Optional[Transport] = None) -> Tuple[Any, str]:
+        """Return (response, model_used) from the first candidate to succeed; raises AllModelsFailed."""
+        transport = transport or self.transport
+        queue = self.candidates(models)
+        if not queue:
+            # Every circuit is open (or already being probed) — don't add load to a failing upstream
+            raise AllModelsFailed([(m, f"circuit open ({self._health(m).last_error})")
+                                   for m in dict.fromkeys(models)])
+        deadline = time.monotonic() + settings.ROUTER_DEADLINE_SECONDS
+        pending: Dict["asyncio.Task[Any]", str] = {}
+        errors: List[Tuple[str, str]] = []
+        hedges_left = 1 if settings.ROUTER_HEDGE else 0
+        hedge_at = 0.0
+
+        def launch() -> None:
+            """Start the next candidate that is still usable (another call may have tripped or be probing it)."""
+            nonlocal hedge_at
+            while queue:
+                model = queue.pop(0)
+                h = self._health(model)
+                if not self._usable(model, time.time()):
+                    errors.append((model, "circuit open"))
+                    continue
+                if h.state(time.time()) == "half_open":
+                    h.probing = True
+                log.info("Trying Gemini model: %s", model)
+                task = asyncio.ensure_future(self._attempt(transport, model, contents, system))
+                task.add_done_callback(lambda t, h=h: t.cancelled() and setattr(h, "probing", False))
+                pending[task] = model
+                hedge_at = time.monotonic() + self.hedge_delay(model)
+                return
+
+        try:
+            launch()
+            while pending:
+                now = time.monotonic()
+                if now >= deadline:
+                    errors.append(("*", "deadline exceeded"))
+                    break
+                can_hedge = hedges_left > 0 and bool(queue)
+                timeout = min(deadline, hedge_at) - now if can_hedge else deadline - now
+                done, _ = await asyncio.wait(list(pending), timeout=max(timeout, 0),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if can_hedge and time.monotonic() >= hedge_at:
+                        hedges_left -= 1
+                        self.hedges += 1
+                        ROUTER_EVENTS.inc(queue[0], "hedge")
+                        launch()
+                    continue
+                for task in done:
+                    model = pending.pop(task)
+                    if task.exception() is None:
+                        log.info("Gemini success with model: %s", model)
+                        return task.result(), model
+                    errors.append((model, _describe(task.exception())))
+                    log.warning("Model %s failed: %s", model, errors[-1][1])
+                if not pending and queue:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise AllModelsFailed(errors)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "hedges": self.hedges,
+            "models": {
+                m: {"state": h.state(now), "error_rate": round(h.error_rate(now), 3),
+                    "p50_ms": _ms(h.percentile(0.5)), "p90_ms": _ms(h.percentile(0.9)),
+                    "successes": h.successes, "failures": h.failures,
+                    "consecutive_failures": h.consecutive_failures, "last_error": h.last_error,
+                    "open_for_s": round(max(0.0, h.open_until - now), 1)}
+                for m, h in self.health.items()
+            },
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+model_router = ModelRouter()
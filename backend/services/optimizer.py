@@ -0,0 +1,238 @@
+# backend/services/optimizer.py
+"""
+Parallel parameter sweep for the EMA/RSI strategy.
+
+Backtests grid or random combinations of EMA_SPAN / RSI_WINDOW / RSI_OVERSOLD /
+RSI_OVERBOUGHT across a process pool (all cores by default). Candle arrays are
+copied once into a SharedMemory block that workers map read-only, so nothing
+large is pickled per task. Work is grouped by (rsi_window, ema_span): each task
+computes the RSI / EMA / crossover arrays once and evaluates every threshold
+pair against them, and workers keep the last RSI per window for the next task.
+
+    python -m backend.services.optimizer data/BTCUSDT-1m.csv --ema 10:50:5 --rsi 7,14,21 \\
+        --oversold 20:40:5 --overbought 60:80:5 --metric return_over_drawdown --top 20
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from backend.services import backtest
+from backend.services.backtest import crossovers, load_ohlcv, signals, simulate, symbol_from_path
+
+log = logging.getLogger(__name__)
+
+# metric -> True if higher is better
+METRICS: Dict[str, bool] = {
+    "return_pct": True,
+    "return_over_drawdown": True,
+    "profit_factor": True,
+    "win_rate": True,
+    "max_drawdown_pct": False,
+}
+
+Layout = List[Tuple[str, int, int]]     # (symbol, start row, rows)
+
+
+# ── Parameter spaces ──────────────────────────────────────────────────────────
+
+def parse_range(spec: str, cast=float) -> List[Any]:
+    """"10:50:5" -> 10, 15, ... 50 (inclusive); "7,14,21" -> [7, 14, 21]."""
+    if ":" in spec:
+        parts = [float(p) for p in spec.split(":")]
+        lo, hi = parts[0], parts[1]
+        step = parts[2] if len(parts) > 2 else 1.0
+        return [cast(v) for v in np.arange(lo, hi + step / 2, step)]
+    return [cast(v) for v in spec.split(",") if v.strip()]
+
+
+def grid(ema_spans: Sequence[int], rsi_windows: Sequence[int],
+         oversold: Sequence[float], overbought: Sequence[float]) -> List[Dict[str, Any]]:
+    return [
+        {"ema_span": e, "rsi_window": r, "oversold": lo, "overbought": hi}
+        for e, r, lo, hi in itertools.product(ema_spans, rsi_windows, oversold, overbought)
+    ]
+
+
+def random_sample(combos: List[Dict[str, Any]], n: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Random search: ``n`` distinct combinations drawn from the grid."""
+    if n >= len(combos):
+        return combos
+    return random.Random(seed).sample(combos, n)
+
+
+def _tasks(combos: List[Dict[str, Any]]) -> List[Tuple[int, int, List[Tuple[float, float]]]]:
+    groups: Dict[Tuple[int, int], List[Tuple[float, float]]] = {}
+    for c in combos:
+        groups.setdefault((c["rsi_window"], c["ema_span"]), []).append((c["oversold"], c["overbought"]))
+    # Sorted by RSI window so a worker's consecutive tasks tend to reuse its cached RSI
+    return [(r, e, thresholds) for (r, e), thresholds in sorted(groups.items())]
+
+
+# ── Shared candle data ────────────────────────────────────────────────────────
+
+def _share(frames: Dict[str, pd.DataFrame]) -> Tuple[shared_memory.SharedMemory, Layout, int]:
+    """Copy open/close (float64) and open_time (int64) for all symbols into one block."""
+    total = sum(len(df) for df in frames.values())
+    shm = shared_memory.SharedMemory(create=True, size=max(1, 24 * total))
+    prices = np.ndarray((2, total), dtype=np.float64, buffer=shm.buf)
+    times = np.ndarray((total,), dtype=np.int64, buffer=shm.buf, offset=16 * total)
+    layout: Layout = []
+    row = 0
+    for symbol, df in frames.items():
+        n = len(df)
+        prices[0, row:row + n] = df["open"].to_numpy(dtype=float)
+        prices[1, row:row + n] = df["close"].to_numpy(dtype=float)
+        times[row:row + n] = df["open_time"].to_numpy(dtype="int64")
+        layout.append((symbol, row, n))
+        row += n
+    del prices, times
+    return shm, layout, total
+
+
+_SHM: Optional[shared_memory.SharedMemory] = None
+_DATA: Dict[str, Dict[str, np.ndarray]] = {}
+_RSI_CACHE: Dict[Tuple[str, int], np.ndarray] = {}
+_SIM: Dict[str, Any] = {}
+
+
+def _init_worker(name: str, layout: Layout, total: int, sim_kwargs: Dict[str, Any]) -> None:
+    global _SHM
+    _SHM = shared_memory.SharedMemory(name=name)
+    prices = np.ndarray((2, total), dtype=np.float64, buffer=_SHM.buf)
+    times = np.ndarray((total,), dtype=np.int64, buffer=_SHM.buf, offset=16 * total)
+    for symbol, start, n in layout:
+        _DATA[symbol] = {"open": prices[0, start:start + n], "close": prices[1, start:start + n],
+                         "open_time": times[start:start + n]}
+    _SIM.update(sim_kwargs)
+
+
+def _rsi(symbol: str, close: np.ndarray, window: int) -> np.ndarray:
+    key = (symbol, window)
+    rsi = _RSI_CACHE.get(key)
+    if rsi is None:
+        # Keep only the most recent window per symbol to bound worker memory
+        for stale in [k for k in _RSI_CACHE if k[0] == symbol]:
+            del _RSI_CACHE[stale]
+        rsi = _RSI_CACHE[key] = backtest.rsi(close, window)
+    return rsi
+
+
+def _run_task(task: Tuple[int, int, List[Tuple[float, float]]]) -> List[Dict[str, Any]]:
+    rsi_window, ema_span, thresholds = task
+    warmup = max(ema_span, rsi_window) + 1
+    per_combo: List[List[Dict[str, Any]]] = [[] for _ in thresholds]
+    for symbol, cols in _DATA.items():
+        close = cols["close"]
+        rsi = _rsi(symbol, close, rsi_window)
+        ema = backtest.ema(close, ema_span)
+        crosses = crossovers(close, ema)
+        for i, (lo, hi) in enumerate(thresholds):
+            sig = signals(close, ema, rsi, lo, hi, warmup=warmup, crosses=crosses)
+            per_combo[i].append(simulate(cols, sig, symbol=symbol, **_SIM).summary())
+    return [
+        _aggregate({"ema_span": ema_span, "rsi_window": rsi_window, "oversold": lo, "overbought": hi}, rows)
+        for (lo, hi), rows in zip(thresholds, per_combo)
+    ]
+
+
+def _aggregate(params: Dict[str, Any], rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    trades = sum(r["trades"] for r in rows)
+    wins = sum((r["win_rate"] or 0) * r["trades"] for r in rows)
+    pfs = [r["profit_factor"] for r in rows if r["profit_factor"] is not None]
+    ret = float(np.mean([r["return_pct"] for r in rows]))
+    dd = max(r["max_drawdown_pct"] for r in rows)
+    return {
+        **params,
+        "return_pct": round(ret, 3),
+        "max_drawdown_pct": dd,
+        "return_over_drawdown": round(ret / dd, 4) if dd else None,
+        "profit_factor": round(float(np.mean(pfs)), 3) if pfs else None,
+        "win_rate": round(wins / trades, 4) if trades else None,
+        "trades": trades,
+        "symbols": {r["symbol"]: {"return_pct": r["return_pct"], "trades": r["trades"],
+                                  "max_drawdown_pct": r["max_drawdown_pct"]} for r in rows},
+    }
+
+
+# ── Driver ────────────────────────────────────────────────────────────────────
+
+def optimize(datasets: Dict[str, Union[str, pd.DataFrame]], combos: List[Dict[str, Any]],
+             metric: str = "return_pct", min_trades: int = 1, workers: Optional[int] = None,
+             **sim_kwargs) -> List[Dict[str, Any]]:
+    """Backtest every combination over all symbols and return results ranked by ``metric``."""
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; choose from {sorted(METRICS)}")
+    frames = {s: load_ohlcv(d) if isinstance(d, str) else d for s, d in datasets.items()}
+    tasks = _tasks(combos)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    shm, layout, total = _share(frames)
+    results: List[Dict[str, Any]] = []
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)) or 1, initializer=_init_worker,
+                                 initargs=(shm.name, layout, total, sim_kwargs)) as pool:
+            for fut in as_completed([pool.submit(_run_task, t) for t in tasks]):
+                results.extend(fut.result())
+    finally:
+        shm.close()
+        shm.unlink()
+    log.info("Optimizer: %d combos x %d symbols (%d bars) on %d workers in %.2fs",
+             len(combos), len(frames), total, workers, time.perf_counter() - started)
+
+    higher = METRICS[metric]
+    ranked = [r for r in results if r["trades"] >= min_trades and r[metric] is not None]
+    ranked.sort(key=lambda r: r[metric], reverse=higher)
+    return ranked
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Parameter sweep for the EMA/RSI strategy")
+    p.add_argument("files", nargs="+", help="CSV or Parquet files; symbol is taken from the file name")
+    p.add_argument("--ema", default="10:50:5", help="EMA spans, e.g. 10:50:5 or 10,20,50")
+    p.add_argument("--rsi", default="7:21:7", help="RSI windows")
+    p.add_argument("--oversold", default="20:40:5")
+    p.add_argument("--overbought", default="60:80:5")
+    p.add_argument("--random", type=int, help="Sample this many combinations instead of the full grid")
+    p.add_argument("--seed", type=int)
+    p.add_argument("--metric", default="return_pct", choices=sorted(METRICS))
+    p.add_argument("--min-trades", type=int, default=1)
+    p.add_argument("--top", type=int, default=20)
+    p.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    p.add_argument("--capital", type=float, default=10_000.0)
+    p.add_argument("--fee-bps", type=float, default=10.0)
+    p.add_argument("--slippage-bps", type=float, default=2.0)
+    args = p.parse_args(argv)
+
+    datasets: Dict[str, Union[str, pd.DataFrame]] = {}
+    for path in args.files:
+        symbol = symbol_from_path(path)
+        df = load_ohlcv(path)
+        prev = datasets.get(symbol)
+        datasets[symbol] = df if prev is None else (
+            pd.concat([prev, df]).drop_duplicates("open_time").sort_values("open_time").reset_index(drop=True))
+
+    combos = grid(parse_range(args.ema, int), parse_range(args.rsi, int),
+                  parse_range(args.oversold), parse_range(args.overbought))
+    if args.random:
+        combos = random_sample(combos, args.random, args.seed)
+    started = time.perf_counter()
+    ranked = optimize(datasets, combos, metric=args.metric, min_trades=args.min_trades,
+                      workers=args.workers, initial_capital=args.capital,
+                      fee_bps=args.fee_bps, slippage_bps=args.slippage_bps)
+    print(json.dumps({"metric": args.metric, "combos": len(combos), "ranked": len(ranked),
+                      "elapsed_seconds": round(time.perf_counter() - started, 3),
+                      "top": ranked[:args.top]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+# backend/services/order_book.py
+"""
+Local order books maintained from Binance depth diffs.
+
+Each tracked symbol consumes ``<symbol>@depth@100ms`` and applies the diffs to a
+REST snapshot following Binance's sequencing rules: events buffered while the
+snapshot loads are replayed, anything with ``u <= lastUpdateId`` is dropped,
+and an event whose first id ``U`` skips past ``lastUpdateId + 1`` is a gap
+that triggers a fresh snapshot (resync) on the same connection.
+
+Price levels live in a dict plus a bisect-sorted price list per side, so best
+bid/ask is O(1), depth-at-price is a dict lookup and top-N is a slice. Symbols
+in ORDERBOOK_SYMBOLS are always tracked. Others start on first request, but
+only once a REST snapshot for them succeeds (so unknown symbols never get a
+stream), at most ORDERBOOK_MAX_TRACKED at a time, and a timer drops them after
+ORDERBOOK_IDLE_SECONDS without reads — silent streams included.
+"""
+import asyncio
+import bisect
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.services.market_stream import WebSocketTransport
+
+log = logging.getLogger(__name__)
+
+Level = Tuple[float, str, str]      # qty, raw price, raw qty
+
+
+class _Side:
+    """Price levels for one side, prices kept ascending."""
+
+    def __init__(self) -> None:
+        self.levels: Dict[float, Level] = {}
+        self.prices: List[float] = []
+
+    def clear(self) -> None:
+        self.levels.clear()
+        self.prices.clear()
+
+    def set(self, raw_price: str, raw_qty: str) -> None:
+        price, qty = float(raw_price), float(raw_qty)
+        if qty == 0.0:
+            if self.levels.pop(price, None) is not None:
+                del self.prices[bisect.bisect_left(self.prices, price)]
+        else:
+            if price not in self.levels:
+                bisect.insort(self.prices, price)
+            self.levels[price] = (qty, raw_price, raw_qty)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+
+class OrderBook:
+    def __init__(self, symbol: str) -> None:
+        self.symbol = symbol.upper()
+        self.bids = _Side()
+        self.asks = _Side()
+        self.update_id = 0
+        self.synced = False
+        self.updated_at: Optional[float] = None
+
+    # ── Maintenance ──
+
+    def reset(self) -> None:
+        self.bids.clear()
+        self.asks.clear()
+        self.update_id = 0
+        self.synced = False
+
+    def load_snapshot(self, snap: Dict[str, Any]) -> None:
+        self.reset()
+        for p, q in snap["bids"]:
+            self.bids.set(p, q)
+        for p, q in snap["asks"]:
+            self.asks.set(p, q)
+        self.update_id = int(snap["lastUpdateId"])
+        self.synced = True
+        self.updated_at = time.time()
+
+    def apply_diff(self, event: Dict[str, Any]) -> bool:
+        """Apply a depthUpdate; False means a sequence gap (the book needs a new snapshot)."""
+        first, last = int(event["U"]), int(event["u"])
+        if last <= self.update_id:
+            return True             # already covered by the snapshot
+        if first > self.update_id + 1:
+            return False
+        for p, q in event["b"]:
+            self.bids.set(p, q)
+        for p, q in event["a"]:
+            self.asks.set(p, q)
+        self.update_id = last
+        self.updated_at = time.time()
+        return True
+
+    # ── Queries ──
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return self.bids.prices[-1] if self.bids.prices else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return self.asks.prices[0] if self.asks.prices else None
+
+    def depth_at(self, side: str, price: float) -> float:
+        level = (self.bids if side.lower() in ("bid", "bids", "buy") else self.asks).levels.get(float(price))
+        return level[0] if level else 0.0
+
+    def top(self, n: int) -> Tuple[List[List[str]], List[List[str]]]:
+        """Top ``n`` levels per side in REST layout ([[price, qty], ...], best first)."""
+        bid_prices = self.bids.prices[-n:][::-1] if n > 0 else []
+        ask_prices = self.asks.prices[:n]
+        return ([list(self.bids.levels[p][1:]) for p in bid_prices],
+                [list(self.asks.levels[p][1:]) for p in ask_prices])
+
+    def imbalance(self, n: int = 10) -> Optional[float]:
+        """(bid qty - ask qty) / (bid qty + ask qty) over the top ``n`` levels, in [-1, 1]."""
+        bid_qty = sum(self.bids.levels[p][0] for p in self.bids.prices[-n:])
+        ask_qty = sum(self.asks.levels[p][0] for p in self.asks.prices[:n])
+        total = bid_qty + ask_qty
+        return (bid_qty - ask_qty) / total if total else None
+
+    def features(self, n: int = 10) -> Optional[Dict[str, Any]]:
+        bid, ask = self.best_bid, self.best_ask
+        if not self.synced or bid is None or ask is None:
+            return None
+        mid = (bid + ask) / 2
+        return {
+            "best_bid": bid, "best_ask": ask, "mid": mid,
+            "spread": ask - bid, "spread_bps": (ask - bid) / mid * 10_000,
+            "imbalance": self.imbalance(n), "update_id": self.update_id,
+            "age_ms": int((time.time() - self.updated_at) * 1000) if self.updated_at else None,
+        }
+
+
+class _Tracker:
+    def __init__(self, symbol: str, pinned: bool, seed: Optional[Dict[str, Any]] = None) -> None:
+        self.book = OrderBook(symbol)
+        self.pinned = pinned
+        self.seed = seed                        # admission snapshot, used for the first sync
+        self.task: Optional[asyncio.Task] = None
+        self.last_read = time.monotonic()
+        self.resyncs = 0
+        self.reconnects = 0
+        self.events = 0
+
+
+class OrderBookManager:
+    def __init__(self, client, transport=None, depth: Optional[int] = None,
+                 idle_seconds: Optional[float] = None, max_tracked: Optional[int] = None) -> None:
+        self.client = client                    # AsyncExchangeClient (snapshot source)
+        self.transport = transport or WebSocketTransport()
+        self.depth = depth or settings.ORDERBOOK_DEPTH
+        self.idle_seconds = settings.ORDERBOOK_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        self.max_tracked = settings.ORDERBOOK_MAX_TRACKED if max_tracked is None else max_tracked
+        self.trackers: Dict[str, _Tracker] = {}
+        self._admitting: Dict[str, asyncio.Task] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        self.rejected = 0
+
+    # ── Access ──
+
+    def book(self, symbol: str, track: bool = True) -> Optional[OrderBook]:
+        """The symbol's book if it is in sync; asks to start tracking it otherwise (needs a running loop)."""
+        symbol = symbol.upper()
+        tracker = self.trackers.get(symbol)
+        if tracker is None:
+            if track:
+                self._admit(symbol)
+            return None
+        tracker.last_read = time.monotonic()
+        return tracker.book if tracker.book.synced else None
+
+    def features(self, symbol: str, n: int = 10) -> Optional[Dict[str, Any]]:
+        """Spread / imbalance for strategies; None unless the book is tracked and in sync. Thread-safe read."""
+        tracker = self.trackers.get(symbol.upper())
+        if tracker is None:
+            return None
+        tracker.last_read = time.monotonic()
+        try:
+            return tracker.book.features(n)
+        except (IndexError, KeyError):
+            return None     # read raced a level update on the loop thread
+
+    def track(self, symbol: str, pinned: bool = False, seed: Optional[Dict[str, Any]] = None) -> None:
+        """Start maintaining the book unconditionally — for configured symbols; requests go through _admit."""
+        symbol = symbol.upper()
+        tracker = self.trackers.get(symbol)
+        if tracker is None:
+            tracker = self.trackers[symbol] = _Tracker(symbol, pinned, seed)
+            tracker.task = asyncio.get_running_loop().create_task(self._run(tracker))
+            log.info("Order book tracking started for %s", symbol)
+        tracker.pinned = tracker.pinned or pinned
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.get_running_loop().create_task(self._reap())
+
+    def _unpinned(self) -> int:
+        return sum(1 for t in self.trackers.values() if not t.pinned)
+
+    def _admit(self, symbol: str) -> None:
+        """Track ``symbol`` once a REST snapshot proves it exists, within ORDERBOOK_MAX_TRACKED."""
+        if symbol in self._admitting:
+            return
+        if self._unpinned() + len(self._admitting) >= self.max_tracked:
+            self.rejected += 1
+            return
+        self._admitting[symbol] = asyncio.get_running_loop().create_task(self._snapshot_then_track(symbol))
+
+    async def _snapshot_then_track(self, symbol: str) -> None:
+        try:
+            snap = await self.client.get_order_book(symbol, self.depth)
+        except Exception as exc:
+            log.info("Not tracking %s order book — snapshot failed: %s", symbol, exc)
+            return
+        finally:
+            self._admitting.pop(symbol, None)
+        self.track(symbol, seed=snap)
+
+    async def _reap(self) -> None:
+        """Drop unpinned books nobody has read for idle_seconds, whether or not their stream is talking."""
+        period = max(1.0, min(self.idle_seconds / 4, 30.0))
+        while self.trackers:
+            await asyncio.sleep(period)
+            cutoff = time.monotonic() - self.idle_seconds
+            for symbol, tracker in list(self.trackers.items()):
+                if not tracker.pinned and tracker.last_read < cutoff and tracker.task is not None:
+                    log.info("Order book %s idle for %.0fs — stopping", symbol, self.idle_seconds)
+                    tracker.task.cancel()
+
+    # ── Maintenance loop ──
+
+    async def _run(self, tracker: _Tracker) -> None:
+        symbol, book = tracker.book.symbol, tracker.book
+        backoff = 1.0
+        try:
+            while True:
+                try:
+                    await self._consume(tracker)
+                    backoff = 1.0
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    log.warning("Order book %s stream failed: %s — retrying in %.0fs", symbol, exc, backoff)
+                book.reset()
+                tracker.reconnects += 1
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+        finally:
+            book.reset()
+            if self.trackers.get(symbol) is tracker:
+                del self.trackers[symbol]
+            log.info("Order book tracking stopped for %s", symbol)
+
+    async def _consume(self, tracker: _Tracker) -> None:
+        book = tracker.book
+        pending: Deque[Dict[str, Any]] = deque()
+        snapshot: Optional[asyncio.Future] = None
+        if tracker.seed is not None:
+            snapshot = asyncio.get_running_loop().create_future()
+            snapshot.set_result(tracker.seed)
+            tracker.seed = None
+        async for event in self.transport.messages([f"{book.symbol.lower()}@depth@100ms"]):
+            tracker.events += 1
+            if book.synced:
+                if book.apply_diff(event):
+                    continue
+                log.warning("Order book %s gap at %s (U=%s) — resyncing", book.symbol, book.update_id, event["U"])
+                tracker.resyncs += 1
+                book.reset()
+            pending.append(event)
+            if snapshot is None:
+                snapshot = asyncio.ensure_future(self.client.get_order_book(book.symbol, self.depth))
+            if not snapshot.done():
+                continue
+            snap, snapshot = snapshot.result(), None
+            book.load_snapshot(snap)
+            while pending:
+                if not book.apply_diff(pending.popleft()):
+                    # Snapshot older than the buffered stream — fetch another
+                    book.reset()
+                    break
+            pending.clear()
+
+    async def stop(self) -> None:
+        for task in [self._reaper, *self._admitting.values()]:
+            if task is not None:
+                task.cancel()
+        for tracker in list(self.trackers.values()):
+            if tracker.task is not None:
+                tracker.task.cancel()
+                try:
+                    await tracker.task
+                except asyncio.CancelledError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            s: {"synced": t.book.synced, "update_id": t.book.update_id, "bids": len(t.book.bids),
+                "asks": len(t.book.asks), "events": t.events, "resyncs": t.resyncs,
+                "reconnects": t.reconnects, "pinned": t.pinned}
+            for s, t in self.trackers.items()
+        }
@@ -0,0 +1,96 @@
+# backend/services/password_hasher.py
+"""
+Dedicated executor for bcrypt work on the auth routes.
+
+A bcrypt verify at BCRYPT_ROUNDS=12 is ~250ms of CPU. Running it in the shared
+request threadpool lets a login burst starve the market-data routes, so hashing
+gets its own HASH_WORKERS threads (bcrypt releases the GIL). Admission control
+caps work in flight — running plus queued — at HASH_MAX_PENDING; beyond that
+callers get HashingBusy (503 + Retry-After) straight away instead of queueing.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from backend.config import settings
+from backend.services.auth_service import hash_password, verify_and_update
+from backend.services.metrics import registry
+
+log = logging.getLogger(__name__)
+
+HASH_OPS = registry.counter("password_hash_total", "Password hash operations", ("op", "result"))
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing executor is at HASH_MAX_PENDING."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"Too many sign-in requests in progress — retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None) -> None:
+        self.workers = workers or settings.HASH_WORKERS
+        self.max_pending = max(max_pending or settings.HASH_MAX_PENDING, self.workers)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.avg_seconds = 0.25         # EWMA of one hash, for Retry-After
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pw-hash")
+        return self._pool
+
+    def _timed(self, fn: Callable[..., Any], *args: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.avg_seconds += 0.2 * (time.perf_counter() - start - self.avg_seconds)
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    async def _run(self, op: str, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                HASH_OPS.inc(op, "rejected")
+                raise HashingBusy(max(1.0, self.pending / self.workers * self.avg_seconds))
+            self.pending += 1
+            pool = self._executor()
+        # The slot is released when the work finishes, not when the caller stops
+        # waiting — a disconnected client's hash still occupies a worker.
+        future = pool.submit(self._timed, fn, *args)
+        future.add_done_callback(self._release)
+        HASH_OPS.inc(op, "accepted")
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, plain: str) -> str:
+        return await self._run("hash", hash_password, plain)
+
+    async def verify(self, plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(valid, replacement hash or None) — see auth_service.verify_and_update."""
+        return await self._run("verify", verify_and_update, plain, hashed)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "max_pending": self.max_pending, "pending": self.pending,
+                "rejected": self.rejected, "avg_ms": round(self.avg_seconds * 1000, 1)}
+
+
+password_hasher = PasswordHasher()
+
+registry.gauge("password_hash_pending", "Password hashes running or queued", (),
+               lambda: {(): password_hasher.pending})
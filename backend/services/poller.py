@@ -1,34 +1,238 @@
 # backend/services/poller.py
+"""
+Background strategy scheduler.
+
+Runs many (symbol, interval, strategy) jobs, each aligned to its candle close
+plus a small settle delay and a per-job stagger so jobs don't all fire at once.
+Jobs run on a small worker pool; when the exchange slows down or errors, the
+scheduler serializes dispatch and backs failing jobs off.
+"""
+import heapq
 import logging
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
 from backend.config import settings
-from backend.services.strategy_service import get_signal
+from backend.services.broadcaster import broadcaster
+from backend.services.candle_store import candle_store
+from backend.services.indicator_engine import engine
+from backend.services.intervals import candle_open, interval_ms, next_candle_close
+from backend.services.metrics import POLLER_DURATION, POLLER_ERRORS, POLLER_LAG
 
 log = logging.getLogger(__name__)
 
+# name -> fn(symbol, interval, klines) -> signal dict
+STRATEGIES: Dict[str, Callable[[str, str, List[Any]], Dict[str, Any]]] = {
+    "ema_rsi": engine.get_signal,
+}
+
+
+@dataclass
+class PollJob:
+    symbol: str
+    interval: str
+    strategy: str = "ema_rsi"
+    offset: float = 0.0              # stagger after candle close, seconds
+    next_run: float = 0.0
+    boundary_ms: int = 0             # candle close this run is scheduled for
+    running: bool = False
+    runs: int = 0
+    errors: int = 0
+    consecutive_errors: int = 0
+    skipped: int = 0
+    deferred: int = 0
+    last_run: Optional[float] = None
+    last_duration: Optional[float] = None
+    last_lag: Optional[float] = None
+    last_error: Optional[str] = None
+    last_signal: Optional[Dict[str, Any]] = None
+    source: str = "rest"
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return (self.symbol, self.interval, self.strategy)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol, "interval": self.interval, "strategy": self.strategy,
+            "source": self.source, "runs": self.runs, "errors": self.errors,
+            "consecutive_errors": self.consecutive_errors, "skipped": self.skipped,
+            "deferred": self.deferred, "last_run": self.last_run,
+            "last_duration": self.last_duration, "last_lag": self.last_lag,
+            "next_run": self.next_run or None, "last_error": self.last_error,
+            "last_signal": self.last_signal,
+        }
+
+
+def parse_jobs(spec: Optional[str]) -> List[PollJob]:
+    """Parse "BTCUSDT:1m,ETHUSDT:5m:ema_rsi" into PollJobs (default: SYMBOL on 1m)."""
+    jobs: List[PollJob] = []
+    for item in (spec or f"{settings.SYMBOL}:1m").split(","):
+        parts = [p.strip() for p in item.split(":") if p.strip()]
+        if not parts:
+            continue
+        symbol = parts[0].upper()
+        interval = parts[1] if len(parts) > 1 else "1m"
+        strategy = parts[2] if len(parts) > 2 else "ema_rsi"
+        interval_ms(interval)  # validate
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        jobs.append(PollJob(symbol=symbol, interval=interval, strategy=strategy))
+    return jobs
+
 
 class Poller:
-    def __init__(self, client) -> None:
+    def __init__(self, client, stream=None, jobs: Optional[List[PollJob]] = None) -> None:
         self.client = client
+        self.stream = stream
+        self.order_books = None     # OrderBookManager; adds spread/imbalance to signals when set
+        self.jobs = jobs if jobs is not None else parse_jobs(settings.POLLER_JOBS)
         self.running = False
+        self.last_signal: dict | None = None
         self._thread: threading.Thread | None = None
         self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self._latency_ewma = 0.0
+        self._spread()
+
+    def _spread(self) -> None:
+        """Stagger jobs evenly across POLLER_SPREAD_SECONDS (at most a quarter candle) after close."""
+        n = len(self.jobs)
+        for i, job in enumerate(self.jobs):
+            spread = min(settings.POLLER_SPREAD_SECONDS, interval_ms(job.interval) / 4000)
+            job.offset = min(settings.POLLER_SETTLE_SECONDS, interval_ms(job.interval) / 4000) + spread * i / n
 
     @property
     def is_running(self) -> bool:
         return self.running and self._thread is not None and self._thread.is_alive()
 
+    @property
+    def source(self) -> str:
+        return "stream" if self.stream is not None and self.stream.covers(settings.SYMBOL, "1m") else "rest"
+
+    @property
+    def slow(self) -> bool:
+        return self._latency_ewma > settings.POLLER_SLOW_SECONDS
+
+    # ── Evaluation ──
+
+    def _job_for(self, symbol: str, interval: str) -> Optional[PollJob]:
+        for job in self.jobs:
+            if job.symbol == symbol and job.interval == interval:
+                return job
+        return None
+
+    def evaluate(self, symbol: str, interval: str, klines, strategy: str = "ema_rsi") -> dict:
+        sig = STRATEGIES[strategy](symbol, interval, klines)
+        book = self.order_books.features(symbol) if self.order_books is not None else None
+        if book is not None:
+            sig = {**sig, "book": book}
+        self.last_signal = {"symbol": symbol, "interval": interval, **sig}
+        log.info("Poller signal: %s", self.last_signal)
+        broadcaster.publish("signal", symbol, self.last_signal)
+        return sig
+
+    def on_candle_close(self, symbol: str, interval: str, klines) -> None:
+        """MarketStream callback — evaluates the moment a candle closes."""
+        if not self.running:
+            return
+        candle_store.ingest(symbol, interval, klines)
+        job = self._job_for(symbol, interval)
+        started = time.time()
+        sig = self.evaluate(symbol, interval, klines, job.strategy if job else "ema_rsi")
+        if job is not None:
+            job.source = "stream"
+            job.runs += 1
+            job.last_run = started
+            job.last_duration = time.time() - started
+            job.last_lag = started - int(klines[-1][6]) / 1000 if klines else None
+            job.last_signal = sig
+
+    # ── Scheduling ──
+
+    def _schedule(self, job: PollJob, now: float) -> None:
+        boundary = next_candle_close(job.interval, int(now * 1000))
+        backoff = min(2 ** job.consecutive_errors - 1, interval_ms(job.interval) / 1000) if job.consecutive_errors else 0
+        job.boundary_ms = boundary
+        job.next_run = boundary / 1000 + job.offset + backoff
+
+    def _run_job(self, job: PollJob, scheduled: float) -> None:
+        started = time.time()
+        job.last_lag = started - scheduled
+        POLLER_LAG.observe(max(0.0, job.last_lag), job.symbol, job.interval)
+        try:
+            job.source = "rest"
+            klines = candle_store.get_klines(self.client, job.symbol, job.interval, 100)
+            # Evaluate the candle that just closed, not the one that just opened
+            if klines and int(klines[-1][0]) >= candle_open(job.interval, job.boundary_ms):
+                klines = klines[:-1]
+            job.last_signal = self.evaluate(job.symbol, job.interval, klines, job.strategy)
+            job.runs += 1
+            job.consecutive_errors = 0
+            job.last_error = None
+        except Exception as exc:
+            log.exception("Poller job %s failed — continuing", job.key)
+            job.errors += 1
+            job.consecutive_errors += 1
+            job.last_error = str(exc)
+            POLLER_ERRORS.inc(job.symbol, job.interval)
+        finally:
+            job.last_run = started
+            job.last_duration = time.time() - started
+            POLLER_DURATION.observe(job.last_duration, job.symbol, job.interval)
+            self._latency_ewma += 0.2 * (job.last_duration - self._latency_ewma)
+            with self._lock:
+                self._in_flight -= 1
+                job.running = False
+            self._wake.set()
+
+    def _dispatch(self, job: PollJob, now: float) -> bool:
+        """Submit a due job; returns False if backpressure deferred it."""
+        if self.stream is not None and self.stream.covers(job.symbol, job.interval):
+            job.source = "stream"     # candle closes on the stream already drive this job
+            return True
+        limit = 1 if self.slow else settings.POLLER_MAX_WORKERS
+        with self._lock:
+            if self._pool is None:
+                return True
+            if job.running:
+                job.skipped += 1      # previous run for this job still in flight
+                return True
+            if self._in_flight >= limit:
+                job.deferred += 1
+                return False
+            job.running = True
+            self._in_flight += 1
+            self._pool.submit(self._run_job, job, job.next_run)
+        return True
+
     def _loop(self) -> None:
-        log.info("Poller started — symbol=%s interval=%ds", settings.SYMBOL, settings.POLL_INTERVAL)
-        while self.running:
-            try:
-                klines = self.client.get_klines(settings.SYMBOL, "1m", 100)
-                sig = get_signal(klines)
-                log.info("Poller signal: %s", sig)
-            except Exception:
-                log.exception("Poller iteration error — continuing")
-            time.sleep(settings.POLL_INTERVAL)
+        log.info("Poller started — %d jobs: %s", len(self.jobs),
+                 ", ".join(f"{j.symbol}:{j.interval}:{j.strategy}" for j in self.jobs))
+        now = time.time()
+        heap: List[Tuple[float, int]] = []
+        for idx, job in enumerate(self.jobs):
+            self._schedule(job, now)
+            heapq.heappush(heap, (job.next_run, idx))
+        while self.running and heap:
+            due, idx = heap[0]
+            now = time.time()
+            if due > now:
+                self._wake.wait(min(due - now, 1.0))
+                self._wake.clear()
+                continue
+            heapq.heappop(heap)
+            job = self.jobs[idx]
+            if self._dispatch(job, now):
+                self._schedule(job, now)
+            else:
+                job.next_run = now + settings.POLLER_DEFER_SECONDS
+            heapq.heappush(heap, (job.next_run, idx))
         log.info("Poller stopped")
 
     def start(self) -> None:
@@ -36,9 +240,17 @@ class Poller:
             if self.is_running:
                 return
             self.running = True
+            self._pool = ThreadPoolExecutor(max_workers=settings.POLLER_MAX_WORKERS, thread_name_prefix="poller-job")
             self._thread = threading.Thread(target=self._loop, daemon=True, name="poller")
             self._thread.start()
 
     def stop(self) -> None:
         with self._lock:
             self.running = False
+            pool, self._pool = self._pool, None
+        self._wake.set()
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [job.stats() for job in self.jobs]
@@ -0,0 +1,159 @@
+# backend/services/rate_limiter.py
+"""
+Exchange request-weight and order-rate limiter shared by the sync and async clients.
+
+Token buckets track the per-minute request weight and the 10-second order count
+budgets, corrected from Binance's X-MBX-USED-WEIGHT-1M / X-MBX-ORDER-COUNT-10S
+response headers. Callers reserve tokens up front and are told how long to
+wait; if the wait would exceed RATE_LIMIT_MAX_WAIT_SECONDS the call is shed.
+429/418 responses pause all calls until Retry-After has passed.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from backend.config import settings
+
+log = logging.getLogger(__name__)
+
+
+class ExchangeBusy(Exception):
+    """Raised when a call is shed because the exchange budget is exhausted."""
+
+    def __init__(self, retry_after: float, reason: str = "rate limit budget exhausted") -> None:
+        super().__init__(f"Exchange {reason} — retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+# Approximate Binance spot REST weights (GET unless noted).
+def request_weight(path: str, params: Optional[Mapping[str, Any]] = None, method: str = "GET") -> int:
+    params = params or {}
+    if path == "depth":
+        limit = int(params.get("limit") or 100)
+        return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+    if path == "openOrders":
+        return 6 if params.get("symbol") else 80
+    if path == "order":
+        return 4 if method == "GET" else 1
+    return {
+        "klines": 2, "ticker/price": 2, "exchangeInfo": 20, "account": 20,
+        "myTrades": 20, "order/test": 1, "ping": 1, "time": 1,
+    }.get(path, 1)
+
+
+class _Bucket:
+    def __init__(self, capacity: float, period: float) -> None:
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_for(self, amount: float) -> float:
+        deficit = amount - self.tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+
+class WeightLimiter:
+    def __init__(self, weight_per_minute: Optional[int] = None, orders_per_10s: Optional[int] = None,
+                 headroom: Optional[float] = None, max_wait: Optional[float] = None) -> None:
+        headroom = settings.RATE_LIMIT_HEADROOM if headroom is None else headroom
+        self.weight_limit = weight_per_minute or settings.EXCHANGE_WEIGHT_PER_MINUTE
+        self.order_limit = orders_per_10s or settings.EXCHANGE_ORDERS_PER_10S
+        self.max_wait = settings.RATE_LIMIT_MAX_WAIT_SECONDS if max_wait is None else max_wait
+        self._weight = _Bucket(self.weight_limit * headroom, 60.0)
+        self._orders = _Bucket(max(1.0, self.order_limit * headroom), 10.0)
+        self._lock = threading.Lock()
+        self.blocked_until = 0.0       # monotonic
+        self.used_weight_1m: Optional[int] = None
+        self.order_count_10s: Optional[int] = None
+        self.requests = 0
+        self.throttled = 0
+        self.shed = 0
+        self.bans = 0
+        self.wait_seconds = 0.0
+
+    def reserve(self, weight: int, orders: int = 0) -> float:
+        """Reserve budget for one call; returns seconds to wait first, or raises ExchangeBusy."""
+        with self._lock:
+            now = time.monotonic()
+            self._weight.refill(now)
+            self._orders.refill(now)
+            wait = max(self.blocked_until - now, self._weight.wait_for(weight),
+                       self._orders.wait_for(orders) if orders else 0.0)
+            if wait > self.max_wait:
+                self.shed += 1
+                raise ExchangeBusy(wait)
+            self._weight.tokens -= weight
+            self._orders.tokens -= orders
+            self.requests += 1
+            if wait > 0:
+                self.throttled += 1
+                self.wait_seconds += wait
+            return wait
+
+    def observe(self, headers: Optional[Mapping[str, str]], status: Optional[int] = None) -> None:
+        """Correct the buckets from response headers and react to 429/418."""
+        if headers is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            used = _header_int(headers, "x-mbx-used-weight-1m")
+            if used is not None:
+                self.used_weight_1m = used
+                self._weight.refill(now)
+                self._weight.tokens = min(self._weight.tokens, self._weight.capacity - used)
+            count = _header_int(headers, "x-mbx-order-count-10s")
+            if count is not None:
+                self.order_count_10s = count
+                self._orders.refill(now)
+                self._orders.tokens = min(self._orders.tokens, self._orders.capacity - count)
+            if status in (418, 429):
+                retry_after = float(_header_int(headers, "retry-after") or 60)
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+                self.bans += 1
+                log.warning("Exchange returned %d — pausing calls for %.0fs", status, retry_after)
+
+    def backoff(self, attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+        """Full-jitter exponential backoff delay for retry ``attempt`` (0-based)."""
+        return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._weight.refill(now)
+            self._orders.refill(now)
+            return {
+                "weight_limit_1m": self.weight_limit,
+                "weight_budget_1m": self._weight.capacity,
+                "weight_available": round(self._weight.tokens, 1),
+                "used_weight_1m": self.used_weight_1m,
+                "order_limit_10s": self.order_limit,
+                "orders_available": round(self._orders.tokens, 1),
+                "order_count_10s": self.order_count_10s,
+                "blocked_for_seconds": round(max(0.0, self.blocked_until - now), 1),
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "shed": self.shed,
+                "bans": self.bans,
+                "wait_seconds_total": round(self.wait_seconds, 3),
+            }
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    # requests and httpx header mappings are both case-insensitive
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+limiter = WeightLimiter()
@@ -0,0 +1,75 @@
+# backend/services/scanner.py
+"""
+Concurrent multi-symbol signal scan.
+
+Kline fetches go through the async exchange client with bounded concurrency,
+and a per-request deadline returns whatever finished. Signals for all fetched symbols are then
+computed in one vectorized batch, off the event loop.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from backend.config import settings
+from backend.services.kline_cache import kline_cache
+from backend.services.strategy_service import get_signals_batch
+
+log = logging.getLogger(__name__)
+
+
+def evaluate_batch(fetched: Dict[str, List[Any]]) -> Dict[str, Dict[str, Any]]:
+    """Run get_signals_batch over {symbol: klines}, grouping symbols by series length."""
+    by_len: Dict[int, List[str]] = defaultdict(list)
+    for sym, klines in fetched.items():
+        by_len[len(klines)].append(sym)
+    out: Dict[str, Dict[str, Any]] = {}
+    for length, syms in by_len.items():
+        if length == 0:
+            out.update({s: {"signal": "HOLD", "reason": "not enough data"} for s in syms})
+            continue
+        closes = np.array([[float(k[4]) for k in fetched[s]] for s in syms], dtype=float)
+        for sym, sig in zip(syms, get_signals_batch(closes)):
+            out[sym] = sig
+    return out
+
+
+async def scan_symbols(client, symbols: List[str], interval: str, limit: int = 100,
+                       concurrency: Optional[int] = None,
+                       deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Return one result per symbol, in input order. Symbols that fail get
+    signal="ERROR"; symbols still pending at the deadline get signal="TIMEOUT".
+    """
+    sem = asyncio.Semaphore(concurrency or settings.SCAN_CONCURRENCY)
+    timeout = deadline if deadline is not None else settings.SCAN_DEADLINE_SECONDS
+
+    async def one(sym: str) -> List[Any]:
+        async with sem:
+            return await kline_cache.aget_klines(client, sym, interval, limit)
+
+    tasks = [asyncio.ensure_future(one(sym)) for sym in symbols]
+    if not tasks:
+        return []
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    for t in pending:
+        t.cancel()
+    if pending:
+        log.warning("Scan deadline %.1fs hit — %d/%d symbols pending", timeout, len(pending), len(tasks))
+
+    fetched = {sym: t.result() for sym, t in zip(symbols, tasks)
+               if t not in pending and t.exception() is None}
+    signals = await run_in_threadpool(evaluate_batch, fetched) if fetched else {}
+
+    results: List[Dict[str, Any]] = []
+    for sym, t in zip(symbols, tasks):
+        if t in pending:
+            results.append({"symbol": sym, "signal": "TIMEOUT", "reason": "deadline exceeded"})
+        elif t.exception() is not None:
+            results.append({"symbol": sym, "signal": "ERROR", "reason": str(t.exception())})
+        else:
+            results.append({"symbol": sym, **signals[sym]})
+    return results
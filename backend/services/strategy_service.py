@@ -1,8 +1,10 @@
 # backend/services/strategy_service.py
 from typing import Any, Dict, List
+import numpy as np
 import pandas as pd
 from ta.momentum import RSIIndicator
 from backend.config import settings
+from backend.services.metrics import SIGNAL_LATENCY
 
 
 def klines_to_df(klines: List[Any]) -> pd.DataFrame:
@@ -16,6 +18,11 @@ def klines_to_df(klines: List[Any]) -> pd.DataFrame:
 
 
 def get_signal(klines: List[Any]) -> Dict[str, Any]:
+    with SIGNAL_LATENCY.time("pandas"):
+        return _get_signal(klines)
+
+
+def _get_signal(klines: List[Any]) -> Dict[str, Any]:
     df = klines_to_df(klines)
     min_rows = max(settings.EMA_SPAN, settings.RSI_WINDOW) + 2
     if df.shape[0] < min_rows:
@@ -35,3 +42,68 @@ def get_signal(klines: List[Any]) -> Dict[str, Any]:
     if prev["close"] > prev["ema"] and price < ema and rsi > settings.RSI_OVERBOUGHT:
         return {"signal": "SELL", "price": price, "ema": ema, "rsi": rsi}
     return {"signal": "HOLD", "price": price, "ema": ema, "rsi": rsi}
+
+
+# ── Batch (vectorized across symbols) ────────────────────────────────────────
+
+def ema_2d(closes: np.ndarray, span: int) -> np.ndarray:
+    """Row-wise EMA of an (N, T) array — same recursion as ewm(span, adjust=False)."""
+    alpha = 2.0 / (span + 1)
+    out = np.empty_like(closes)
+    out[:, 0] = closes[:, 0]
+    for t in range(1, closes.shape[1]):
+        out[:, t] = out[:, t - 1] + alpha * (closes[:, t] - out[:, t - 1])
+    return out
+
+
+def rsi_2d(closes: np.ndarray, window: int) -> np.ndarray:
+    """Row-wise Wilder RSI of an (N, T) array, matching ta.momentum.RSIIndicator."""
+    alpha = 1.0 / window
+    diff = np.diff(closes, axis=1, prepend=closes[:, :1])
+    gain = np.where(diff > 0, diff, 0.0)
+    loss = np.where(diff < 0, -diff, 0.0)
+    avg_gain = np.empty_like(closes)
+    avg_loss = np.empty_like(closes)
+    avg_gain[:, 0] = gain[:, 0]
+    avg_loss[:, 0] = loss[:, 0]
+    for t in range(1, closes.shape[1]):
+        avg_gain[:, t] = avg_gain[:, t - 1] + alpha * (gain[:, t] - avg_gain[:, t - 1])
+        avg_loss[:, t] = avg_loss[:, t - 1] + alpha * (loss[:, t] - avg_loss[:, t - 1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    rsi[:, :window - 1] = np.nan
+    return rsi
+
+
+def get_signals_batch(closes: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Evaluate the EMA/RSI strategy for N symbols at once.
+    ``closes`` is an (N, T) array of close prices, oldest first; returns one
+    get_signal-style dict per row.
+    """
+    closes = np.asarray(closes, dtype=float)
+    if closes.ndim != 2:
+        raise ValueError("closes must be a 2-D (symbols x candles) array")
+    with SIGNAL_LATENCY.time("batch"):
+        return _signals_batch(closes)
+
+
+def _signals_batch(closes: np.ndarray) -> List[Dict[str, Any]]:
+    n, t = closes.shape
+    min_rows = max(settings.EMA_SPAN, settings.RSI_WINDOW) + 2
+    if t < min_rows:
+        return [{"signal": "HOLD", "reason": "not enough data"} for _ in range(n)]
+
+    ema = ema_2d(closes, settings.EMA_SPAN)
+    rsi = rsi_2d(closes, settings.RSI_WINDOW)[:, -1]
+    price, prev_close = closes[:, -1], closes[:, -2]
+    last_ema, prev_ema = ema[:, -1], ema[:, -2]
+
+    buy = (prev_close < prev_ema) & (price > last_ema) & (rsi < settings.RSI_OVERSOLD)
+    sell = (prev_close > prev_ema) & (price < last_ema) & (rsi > settings.RSI_OVERBOUGHT)
+    signals = np.where(buy, "BUY", np.where(sell, "SELL", "HOLD"))
+
+    return [
+        {"signal": str(signals[i]), "price": float(price[i]), "ema": float(last_ema[i]), "rsi": float(rsi[i])}
+        for i in range(n)
+    ]
@@ -0,0 +1,121 @@
+# backend/services/trade_export.py
+"""
+Streaming trade export.
+
+Rows are read in keyset-paged chunks (see trade_history.iter_chunks) as plain
+column tuples, not ORM objects, and each chunk is encoded and yielded before
+the next is fetched — memory stays at one chunk whatever the row count.
+Parquet writes one row group per chunk and needs pyarrow (optional).
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Iterator, List, Optional, Sequence
+
+from backend.models.db import SessionLocal, Trade
+from backend.services.trade_history import filtered, iter_chunks
+
+COLUMNS = ("id", "timestamp", "user_id", "symbol", "side", "quantity", "price", "status", "order_id", "details")
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def export(fmt: str, symbol: Optional[str] = None, status: Optional[str] = None,
+           user_id: Optional[int] = None, start: Optional[datetime] = None,
+           end: Optional[datetime] = None, chunk_size: int = 5000) -> Iterator[bytes]:
+    """Encoded trades, newest first, filtered like /trading/history plus [start, end)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; choose from {sorted(FORMATS)}")
+    if fmt == "parquet":
+        _require_pyarrow()
+    encode = {"csv": _csv, "ndjson": _ndjson, "parquet": _parquet}[fmt]
+    return encode(_chunks(symbol, status, user_id, start, end, chunk_size))
+
+
+def _chunks(symbol, status, user_id, start, end, chunk_size) -> Iterator[List[Sequence[Any]]]:
+    with SessionLocal() as db:
+        query = filtered(db, symbol, status, user_id).with_entities(
+            *(getattr(Trade, c) for c in COLUMNS))
+        if start is not None:
+            query = query.filter(Trade.timestamp >= start)
+        if end is not None:
+            query = query.filter(Trade.timestamp < end)
+        yield from iter_chunks(query, chunk_size)
+
+
+def _csv(chunks: Iterator[List[Sequence[Any]]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for rows in chunks:
+        writer.writerows((r[0], r[1].isoformat(), *r[2:]) for r in rows)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def _ndjson(chunks: Iterator[List[Sequence[Any]]]) -> Iterator[bytes]:
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(COLUMNS, (r[0], r[1].isoformat(), *r[2:]))), separators=(",", ":")) + "\n"
+            for r in rows
+        ).encode()
+
+
+def _require_pyarrow() -> None:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as exc:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from exc
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain()."""
+
+    def __init__(self) -> None:
+        self._parts: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._parts.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _parquet(chunks: Iterator[List[Sequence[Any]]]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()), ("timestamp", pa.timestamp("us")), ("user_id", pa.int64()),
+        ("symbol", pa.string()), ("side", pa.string()), ("quantity", pa.float64()),
+        ("price", pa.float64()), ("status", pa.string()), ("order_id", pa.string()),
+        ("details", pa.string()),
+    ])
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
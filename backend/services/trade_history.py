@@ -0,0 +1,103 @@
+# backend/services/trade_history.py
+"""
+Keyset pagination over the trades table.
+
+Pages are ordered by (timestamp DESC, id DESC) and continue from an opaque
+cursor holding the last row's (timestamp, id), so every page is an index range
+scan on one of the composite (filter, timestamp, id) indexes — page 10 000 costs
+the same as page 1. Totals are optional and cached per filter for a short TTL,
+since an exact COUNT(*) over millions of rows is the slow part of a listing.
+"""
+import base64
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Query, Session
+
+from backend.config import settings
+from backend.models.db import Trade
+
+Cursor = Tuple[datetime, int]
+Filters = Tuple[Optional[str], Optional[str], Optional[int]]
+
+
+def encode_cursor(trade: Trade) -> str:
+    raw = f"{trade.timestamp.isoformat()}|{trade.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Inverse of encode_cursor; raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, trade_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(trade_id)
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def filtered(db: Session, symbol: Optional[str] = None, status: Optional[str] = None,
+             user_id: Optional[int] = None) -> Query:
+    query = db.query(Trade)
+    if symbol:
+        query = query.filter(Trade.symbol == symbol.upper())
+    if status:
+        query = query.filter(Trade.status == status)
+    if user_id is not None:
+        query = query.filter(Trade.user_id == user_id)
+    return query
+
+
+def page(query: Query, limit: int, after: Optional[Cursor] = None) -> Tuple[List[Trade], Optional[str]]:
+    """One page newest-first after ``after``, plus the cursor for the next page (None at the end)."""
+    if after is not None:
+        query = query.filter(tuple_(Trade.timestamp, Trade.id) < tuple_(*after))
+    rows = query.order_by(Trade.timestamp.desc(), Trade.id.desc()).limit(limit + 1).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]) if more and rows else None
+
+
+def iter_chunks(query: Query, chunk_size: int = 1000) -> Iterator[List[Trade]]:
+    """Walk the whole result newest-first in keyset-paged chunks."""
+    after: Optional[Cursor] = None
+    while True:
+        rows, _ = page(query, chunk_size, after)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        after = (rows[-1].timestamp, rows[-1].id)
+
+
+class CountCache:
+    """COUNT(*) per filter combination, reused for ``ttl`` seconds."""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._entries: Dict[Filters, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, query: Query, key: Filters) -> int:
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(key)
+        if hit is not None and hit[0] > now:
+            return hit[1]
+        total = query.order_by(None).with_entities(func.count(Trade.id)).scalar() or 0
+        with self._lock:
+            if len(self._entries) >= 1024:
+                self._entries.clear()
+            self._entries[key] = (now + self.ttl, total)
+        return total
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+count_cache = CountCache(settings.HISTORY_COUNT_TTL_SECONDS)
@@ -0,0 +1,262 @@
+# backend/services/trade_journal.py
+"""
+Write-behind trade journal.
+
+record() gives the trade a random receipt (a UUID, unique across processes),
+appends it to an append-only JSON-lines log for crash safety, and queues it.
+The caller gets the receipt back without touching the database. A flusher
+thread drains the queue into the trades table in batched transactions — the
+database assigns the ids — and truncates the log once everything in it is
+committed. On startup any records still in the log are replayed; receipts that
+already reached the table (a crash between commit and truncate) are skipped.
+
+Each journal file has exactly one writer: start() takes an exclusive lock on
+``<path>.lock`` and fails if another process holds it. Several processes can
+share one database, each with its own TRADE_JOURNAL_PATH.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:     # Windows — no advisory locks; single-process dev only
+    fcntl = None  # type: ignore
+
+from backend.config import settings
+from backend.models.db import SessionLocal, Trade
+from backend.services import analytics
+from backend.services.broadcaster import broadcaster
+from backend.services.metrics import registry
+
+log = logging.getLogger(__name__)
+
+JOURNAL_FLUSH_LATENCY = registry.histogram(
+    "trade_journal_flush_seconds", "Time to commit one batch of journaled trades")
+JOURNAL_BATCH_SIZE = registry.histogram(
+    "trade_journal_batch_size", "Trades committed per flush", buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500))
+
+_FIELDS = ("receipt", "user_id", "timestamp", "symbol", "side", "quantity", "price", "status", "order_id", "details")
+
+
+class TradeJournal:
+    def __init__(self, path: Optional[str] = None, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None, fsync: Optional[bool] = None) -> None:
+        self.path = path or settings.TRADE_JOURNAL_PATH
+        self.batch_size = batch_size or settings.TRADE_JOURNAL_BATCH_SIZE
+        self.flush_interval = settings.TRADE_JOURNAL_FLUSH_SECONDS if flush_interval is None else flush_interval
+        self.fsync = settings.TRADE_JOURNAL_FSYNC if fsync is None else fsync
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._pending: Dict[str, Dict[str, Any]] = {}    # queued or being flushed, by receipt
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._fh = None
+        self._lock_fh = None
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+        self.flushed = 0
+        self.flushes = 0
+        self.failures = 0
+        self.last_flush_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    # ── Lifecycle ──
+
+    def start(self) -> None:
+        with self._lock:
+            if self.running:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._acquire()
+            replayed = self._replay()
+            # Swap in a log holding only the records still owed to the database
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.writelines(json.dumps(rec, separators=(",", ":")) + "\n" for rec in replayed)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, self.path)
+            self._fh = open(self.path, "a", encoding="utf-8")
+            for rec in replayed:
+                self._enqueue(rec, write=False)
+            self.running = True
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="trade-journal")
+            self._thread.start()
+        log.info("TradeJournal started — %d records replayed", len(replayed))
+
+    def _acquire(self) -> None:
+        """Take the journal's writer lock; two processes appending to one log would corrupt replay."""
+        if fcntl is None or self._lock_fh is not None:
+            return
+        fh = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            raise RuntimeError(f"Trade journal {self.path} is in use by another process — "
+                               "give each process its own TRADE_JOURNAL_PATH")
+        self._lock_fh = fh
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything queued, then stop the flusher."""
+        self.running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._flush_all()
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            if self._lock_fh is not None:
+                self._lock_fh.close()       # releases the flock
+                self._lock_fh = None
+
+    def _replay(self) -> List[Dict[str, Any]]:
+        """Records from a previous run that never reached the database."""
+        if not os.path.exists(self.path):
+            return []
+        records: Dict[str, Dict[str, Any]] = {}
+        legacy: Dict[int, Dict[str, Any]] = {}
+        with open(self.path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    log.warning("TradeJournal: skipping torn record")
+                    continue
+                if "receipt" in rec:
+                    records[rec["receipt"]] = rec
+                else:
+                    legacy[rec.pop("id")] = rec     # written by a version that assigned ids itself
+        with SessionLocal() as db:
+            if records:
+                present = {r for (r,) in db.query(Trade.receipt).filter(Trade.receipt.in_(list(records)))}
+                for r in present:
+                    records.pop(r)
+            if legacy:
+                present = {i for (i,) in db.query(Trade.id).filter(Trade.id.in_(list(legacy)))}
+                for i in sorted(set(legacy) - present):
+                    rec = legacy[i]
+                    rec["receipt"] = uuid.uuid4().hex
+                    records[rec["receipt"]] = rec
+        return list(records.values())
+
+    # ── Write path ──
+
+    def record(self, symbol: str, side: str, quantity: float, price: Optional[float],
+               status: str = "submitted", order_id: Optional[str] = None,
+               details: Optional[str] = None, user_id: Optional[int] = None) -> Trade:
+        """Journal a trade and return it immediately (transient: a receipt, no id until it is committed)."""
+        if not self.running:
+            self.start()
+        rec = {"receipt": uuid.uuid4().hex, "user_id": user_id, "timestamp": datetime.utcnow().isoformat(),
+               "symbol": symbol, "side": side, "quantity": quantity, "price": price,
+               "status": status, "order_id": order_id, "details": details}
+        with self._lock:
+            self._enqueue(rec, write=True)
+            depth = len(self._queue)
+        if depth >= self.batch_size:
+            self._wake.set()
+        broadcaster.publish("trade", symbol, rec)
+        return _to_trade(rec)
+
+    def _enqueue(self, rec: Dict[str, Any], write: bool) -> None:
+        # Caller holds self._lock
+        if write and self._fh is not None:
+            self._fh.write(json.dumps(rec, separators=(",", ":")) + "\n")
+            self._fh.flush()
+            if self.fsync:
+                os.fsync(self._fh.fileno())
+        self._queue.append(rec)
+        self._pending[rec["receipt"]] = rec
+
+    def get(self, receipt: str) -> Optional[Trade]:
+        """A journaled trade that has not reached the database yet."""
+        rec = self._pending.get(receipt)
+        return _to_trade(rec) if rec is not None else None
+
+    # ── Flushing ──
+
+    def _loop(self) -> None:
+        while self.running:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush_all()
+
+    def _flush_all(self) -> None:
+        while self._queue:
+            if not self._flush_batch():
+                break
+
+    def _flush_batch(self) -> bool:
+        with self._lock:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        if not batch:
+            return True
+        started = time.perf_counter()
+        try:
+            self._insert(batch)
+        except Exception as exc:
+            log.exception("TradeJournal flush of %d trades failed — will retry", len(batch))
+            self.failures += 1
+            self.last_error = str(exc)
+            with self._lock:
+                self._queue.extendleft(reversed(batch))
+            time.sleep(min(5.0, 0.1 * 2 ** min(self.failures, 6)))
+            return False
+        elapsed = time.perf_counter() - started
+        JOURNAL_FLUSH_LATENCY.observe(elapsed)
+        JOURNAL_BATCH_SIZE.observe(len(batch))
+        with self._lock:
+            for rec in batch:
+                self._pending.pop(rec["receipt"], None)
+            self.flushed += len(batch)
+            self.flushes += 1
+            self.last_flush_seconds = elapsed
+            self.last_error = None
+            if not self._pending and self._fh is not None:
+                # Everything journaled is committed — start a fresh log
+                self._fh.truncate(0)
+                self._fh.seek(0)
+        return True
+
+    def _insert(self, batch: List[Dict[str, Any]]) -> None:
+        rows = [{**rec, "timestamp": datetime.fromisoformat(rec["timestamp"])} for rec in batch]
+        # Rollups are updated in the same transaction, so they match the trades table exactly
+        with analytics.write_lock, SessionLocal() as db:
+            # Receipts already committed (retry after an ambiguous commit failure) are skipped
+            present = {r for (r,) in db.query(Trade.receipt).filter(Trade.receipt.in_([r["receipt"] for r in rows]))}
+            rows = [r for r in rows if r["receipt"] not in present]
+            db.bulk_insert_mappings(Trade, rows)
+            analytics.apply(db, rows)
+            db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queue_depth": len(self._queue),
+            "pending": len(self._pending),
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "last_flush_seconds": self.last_flush_seconds,
+            "last_error": self.last_error,
+        }
+
+
+def _to_trade(rec: Dict[str, Any]) -> Trade:
+    return Trade(**{k: rec[k] for k in _FIELDS if k != "timestamp"},
+                 timestamp=datetime.fromisoformat(rec["timestamp"]))
+
+
+trade_journal = TradeJournal()
+
+registry.gauge("trade_journal_queue_depth", "Journaled trades waiting to be committed", (),
+               lambda: {(): len(trade_journal._queue)})
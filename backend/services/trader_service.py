@@ -4,30 +4,30 @@ import logging
 from typing import Any, Dict, Optional
 from sqlalchemy.orm import Session
 from backend.models.db import Trade
+from backend.services.candle_store import candle_store
 from backend.services.exchange_client import ExchangeClient
-from backend.services.strategy_service import get_signal
+from backend.services.indicator_engine import engine
+from backend.services.trade_journal import trade_journal
 from backend.config import settings
 
 log = logging.getLogger(__name__)
 
 
-def save_trade(db: Session, symbol: str, side: str, quantity: float,
+def save_trade(db: Optional[Session], symbol: str, side: str, quantity: float,
                price: Optional[float], status: str = "submitted",
-               order_id: Optional[str] = None, details: Optional[str] = None) -> Trade:
-    trade = Trade(symbol=symbol, side=side, quantity=quantity, price=price,
-                  status=status, order_id=order_id, details=details)
-    db.add(trade)
-    db.commit()
-    db.refresh(trade)
-    return trade
+               order_id: Optional[str] = None, details: Optional[str] = None,
+               user_id: Optional[int] = None) -> Trade:
+    """Journal the trade; the returned Trade carries its receipt, the DB row (and id) follows in the next batch."""
+    return trade_journal.record(symbol=symbol, side=side, quantity=quantity, price=price,
+                                status=status, order_id=order_id, details=details, user_id=user_id)
 
 
-def run_signal_and_place(db: Session, client: ExchangeClient,
+def run_signal_and_place(db: Optional[Session], client: ExchangeClient,
                          symbol: str = "BTCUSDT", interval: str = "1m",
                          spend_quote: Optional[float] = None) -> Dict[str, Any]:
     spend = spend_quote if spend_quote is not None else settings.SPEND_QUOTE
-    raw = client.get_klines(symbol, interval, limit=200)
-    sig_result = get_signal(raw)
+    raw = candle_store.get_klines(client, symbol, interval, 200, fresh=True)
+    sig_result = engine.get_signal(symbol, interval, raw)
     signal = sig_result.get("signal", "HOLD")
     result: Dict[str, Any] = {"signal": signal, "action": "none"}
 
@@ -41,7 +41,7 @@ def run_signal_and_place(db: Session, client: ExchangeClient,
             trade = save_trade(db, symbol, signal, qty, last_price,
                                status="submitted", order_id=order_id, details=json.dumps(order))
             result.update({"action": signal.lower(), "quantity": qty, "price": last_price,
-                           "order": order, "trade_id": trade.id})
+                           "order": order, "trade_receipt": trade.receipt})
         except Exception:
             log.exception("run_signal_and_place order failed")
             result["action"] = "error"
@@ -0,0 +1,145 @@
+# backend/services/user_clients.py
+"""
+Per-user exchange clients for JWT-authenticated trading.
+
+Each user with stored keys gets one AsyncExchangeClient (its own keep-alive
+httpx pool), built the first time they need it — keys are decrypted once, at
+build time. Clients are kept LRU up to USER_CLIENT_POOL_SIZE and dropped after
+USER_CLIENT_IDLE_SECONDS unused. A client is rebuilt if the user's stored key
+fields change (the principal cache reloads them on commit) and is invalidated
+explicitly when keys are saved or removed via /auth/keys/exchange.
+
+Evicted clients are closed after a grace period so requests still holding
+them can finish. A user's base URL must be one of EXCHANGE_BASE_URLS (or
+API_BASE_URL) — signed requests never go to an arbitrary host. Each client has
+its own WeightLimiter: order counts and bans are per account, so one user's
+response headers must not throttle or ban everyone else.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.services.async_exchange_client import AsyncExchangeClient
+from backend.services.auth_service import decrypt
+from backend.services.metrics import registry
+from backend.services.rate_limiter import WeightLimiter
+
+log = logging.getLogger(__name__)
+
+USER_CLIENTS = registry.counter("user_client_lookups_total", "Per-user exchange client lookups", ("result",))
+
+Fingerprint = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+class NoExchangeKeys(Exception):
+    """The user has not stored exchange keys."""
+
+
+def allowed_base_urls() -> List[str]:
+    urls = [u.strip().rstrip("/") for u in settings.EXCHANGE_BASE_URLS.split(",") if u.strip()]
+    return list(dict.fromkeys(urls + [settings.API_BASE_URL.rstrip("/")]))
+
+
+def check_base_url(url: Optional[str]) -> str:
+    """The normalised exchange URL; ValueError unless it is on the allowlist."""
+    url = (url or settings.API_BASE_URL).strip().rstrip("/")
+    if url not in allowed_base_urls():
+        raise ValueError(f"Exchange URL must be one of: {', '.join(allowed_base_urls())}")
+    return url
+
+
+class _Entry:
+    __slots__ = ("client", "fingerprint", "last_used")
+
+    def __init__(self, client: AsyncExchangeClient, fingerprint: Fingerprint) -> None:
+        self.client = client
+        self.fingerprint = fingerprint
+        self.last_used = time.monotonic()
+
+
+class UserClientPool:
+    def __init__(self, max_clients: Optional[int] = None, idle_seconds: Optional[float] = None) -> None:
+        self.max_clients = max_clients or settings.USER_CLIENT_POOL_SIZE
+        self.idle_seconds = settings.USER_CLIENT_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.built = 0
+        self.evicted = 0
+
+    def get(self, user) -> AsyncExchangeClient:
+        """The warm client for ``user`` (a Principal or User). Call from the event loop."""
+        fingerprint = (user.enc_api_key, user.enc_api_secret, user.api_base_url)
+        if not user.enc_api_key or not user.enc_api_secret:
+            raise NoExchangeKeys("No exchange keys stored — add them via /auth/keys/exchange")
+        self.loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            entry = self._entries.get(user.id)
+            if entry is not None and entry.fingerprint == fingerprint:
+                entry.last_used = now
+                self._entries.move_to_end(user.id)
+                USER_CLIENTS.inc("hit")
+                return entry.client
+            if entry is not None:
+                self._drop(user.id)
+        try:
+            base_url = check_base_url(user.api_base_url)
+        except ValueError as exc:
+            raise NoExchangeKeys(f"{exc} — re-save your keys via /auth/keys/exchange")
+        USER_CLIENTS.inc("miss")
+        client = AsyncExchangeClient(decrypt(user.enc_api_key), decrypt(user.enc_api_secret),
+                                     base_url, limiter=WeightLimiter())
+        with self._lock:
+            if user.id in self._entries:
+                self._drop(user.id)         # a concurrent build won the race
+            self._entries[user.id] = _Entry(client, fingerprint)
+            self.built += 1
+            while len(self._entries) > self.max_clients:
+                self._drop(next(iter(self._entries)))
+        return client
+
+    def invalidate(self, user_id: int) -> None:
+        """Forget the user's client (keys changed). Safe from any thread."""
+        with self._lock:
+            if user_id in self._entries:
+                self._drop(user_id)
+
+    def _sweep(self, now: float) -> None:
+        for user_id, entry in list(self._entries.items()):
+            if now - entry.last_used > self.idle_seconds:
+                self._drop(user_id)
+
+    def _drop(self, user_id: int) -> None:
+        """Remove an entry and close its client after a grace period. Caller holds the lock."""
+        entry = self._entries.pop(user_id)
+        self.evicted += 1
+        if self.loop is None or self.loop.is_closed():
+            return
+        grace = settings.EXCHANGE_TIMEOUT_SECONDS * 2
+        try:
+            self.loop.call_soon_threadsafe(
+                self.loop.call_later, grace, lambda: asyncio.ensure_future(entry.client.aclose()))
+        except RuntimeError:
+            pass    # loop shutting down
+
+    async def close(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            await entry.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"clients": len(self._entries), "max_clients": self.max_clients,
+                "built": self.built, "evicted": self.evicted}
+
+
+user_clients = UserClientPool()
+
+registry.gauge("user_clients", "Warm per-user exchange clients", (), lambda: {(): len(user_clients._entries)})
@@ -0,0 +1,86 @@
+# tests/test_indicator_engine.py
+"""Incremental EMA / RSI must match the pandas + ta batch computation it replaces."""
+import numpy as np
+import pandas as pd
+import pytest
+from ta.momentum import RSIIndicator
+
+from backend.services.indicator_engine import IndicatorEngine, _rsi
+
+SPAN, WINDOW = 20, 14
+MINUTE = 60_000
+
+
+def _klines(n, seed=7):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return [[i * MINUTE, "0", "0", "0", f"{c:.8f}", "0", i * MINUTE + MINUTE - 1] for i, c in enumerate(closes)]
+
+
+def _reference(klines):
+    close = pd.Series([float(k[4]) for k in klines])
+    ema = close.ewm(span=SPAN, adjust=False).mean().to_numpy()
+    rsi = RSIIndicator(close, window=WINDOW).rsi().to_numpy()
+    return ema, rsi
+
+
+def _assert_state(state, klines):
+    """The committed state covers every kline but the forming last one."""
+    ema, rsi = _reference(klines[:-1])
+    assert state.last_open_time == klines[-2][0]
+    assert state.ema == pytest.approx(ema[-1], rel=1e-9)
+    assert _rsi(state.avg_gain, state.avg_loss) == pytest.approx(rsi[-1], rel=1e-9)
+
+
+@pytest.fixture
+def engine():
+    return IndicatorEngine(ema_span=SPAN, rsi_window=WINDOW)
+
+
+def test_incremental_appends_match_batch(engine):
+    klines = _klines(300)
+    for end in range(WINDOW + 2, len(klines) + 1):
+        state = engine.update("BTCUSDT", "1m", klines[:end])
+        _assert_state(state, klines[:end])
+
+
+def test_sliding_window_keeps_full_history_state(engine):
+    # A rolling buffer drops old rows; the state keeps folding from where it was
+    klines = _klines(300)
+    engine.update("BTCUSDT", "1m", klines[:100])
+    for end in range(101, len(klines) + 1):
+        state = engine.update("BTCUSDT", "1m", klines[max(0, end - 100):end])
+    _assert_state(state, klines)
+
+
+def test_provisional_signal_matches_batch_on_forming_candle(engine):
+    klines = _klines(200)
+    engine.update("BTCUSDT", "1m", klines[:150])
+    out = engine.get_signal("BTCUSDT", "1m", klines)
+    ema, rsi = _reference(klines)
+    assert out["price"] == pytest.approx(float(klines[-1][4]))
+    assert out["ema"] == pytest.approx(ema[-1], rel=1e-9)
+    assert out["rsi"] == pytest.approx(rsi[-1], rel=1e-9)
+
+
+def test_stale_batch_is_evaluated_standalone(engine):
+    klines = _klines(300)
+    live = engine.update("BTCUSDT", "1m", klines)
+    snapshot = (live.last_open_time, live.ema, live.avg_gain, live.avg_loss)
+
+    stale = klines[50:200]
+    state = engine.update("BTCUSDT", "1m", stale)
+    assert state is not live
+    _assert_state(state, stale)
+    # The live state is untouched and keeps advancing from where it was
+    assert (live.last_open_time, live.ema, live.avg_gain, live.avg_loss) == snapshot
+    more = _klines(301)  # same seed: the live series plus one new candle
+    _assert_state(engine.update("BTCUSDT", "1m", more), more)
+
+
+def test_gap_rebuilds_from_batch(engine):
+    klines = _klines(400)
+    engine.update("BTCUSDT", "1m", klines[:100])
+    later = klines[250:]
+    state = engine.update("BTCUSDT", "1m", later)
+    _assert_state(state, later)
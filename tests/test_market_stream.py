@@ -0,0 +1,108 @@
+# tests/test_market_stream.py
+"""MarketStream driven by a ReplayTransport: candle-close dispatch and stale/duplicate handling."""
+import asyncio
+import threading
+
+from backend.services.market_stream import MarketStream, ReplayTransport
+
+MINUTE = 60_000
+
+
+def _kline(open_time, close, closed=False, symbol="BTCUSDT", interval="1m"):
+    return {"e": "kline", "s": symbol, "k": {
+        "t": open_time, "T": open_time + MINUTE - 1, "i": interval,
+        "o": "1", "h": "1", "l": "1", "c": str(close), "v": "1", "x": closed,
+    }}
+
+
+class FakeClient:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    def get_klines(self, symbol, interval, limit):
+        return list(self.rows)
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+        self.threads = []
+
+    def __call__(self, symbol, interval, klines):
+        self.threads.append(threading.current_thread())
+        self.calls.append((symbol, interval, [k[0] for k in klines], klines[-1][4]))
+
+
+def _replay(payloads, on_candle_close, client=None):
+    stream = MarketStream(client or FakeClient(), ["BTCUSDT"], ["1m"],
+                          transport=ReplayTransport(payloads), on_candle_close=on_candle_close, buffer_size=50)
+    asyncio.run(stream.run_once())
+    return stream
+
+
+def test_closed_candle_fires_exactly_once():
+    rec = Recorder()
+    stream = _replay([
+        _kline(0, 10), _kline(0, 11), _kline(0, 12, closed=True),
+        _kline(0, 12, closed=True),        # duplicate close
+        _kline(MINUTE, 13),
+    ], rec)
+    assert rec.calls == [("BTCUSDT", "1m", [0], "12")]
+    assert [(k[0], k[4]) for k in stream.klines("BTCUSDT", "1m")] == [(0, "12"), (MINUTE, "13")]
+
+
+def test_stale_updates_are_dropped():
+    rec = Recorder()
+    stream = _replay([
+        _kline(0, 10, closed=True),
+        _kline(MINUTE, 20),
+        _kline(0, 99),                     # update for an older candle
+        _kline(0, 98, closed=True),        # late replay of an already-closed candle
+        _kline(MINUTE, 21, closed=True),
+    ], rec)
+    assert [c[2:] for c in rec.calls] == [([0], "10"), ([0, MINUTE], "21")]
+    assert [(k[0], k[4]) for k in stream.klines("BTCUSDT", "1m")] == [(0, "10"), (MINUTE, "21")]
+
+
+def test_unknown_streams_are_ignored():
+    rec = Recorder()
+    stream = _replay([_kline(0, 10, closed=True, symbol="ETHUSDT")], rec)
+    assert rec.calls == []
+    assert stream.klines("ETHUSDT", "1m") == []
+
+
+def test_backfill_merges_rest_rows_before_stream():
+    rest = [[0, "1", "1", "1", "5", "1", MINUTE - 1, "0", 0, "0", "0", "0"]]
+    rec = Recorder()
+    stream = _replay([_kline(MINUTE, 6, closed=True)], rec, client=FakeClient(rest))
+    assert rec.calls == [("BTCUSDT", "1m", [0, MINUTE], "6")]
+    assert stream.connected is False
+
+
+def test_sync_callback_runs_off_the_event_loop():
+    rec = Recorder()
+    _replay([_kline(0, 10, closed=True)], rec)
+    assert rec.threads and rec.threads[0] is not threading.main_thread()
+
+
+def test_async_callback_is_awaited_on_the_loop():
+    seen = []
+
+    async def on_close(symbol, interval, klines):
+        await asyncio.sleep(0)
+        seen.append(threading.current_thread())
+
+    _replay([_kline(0, 10, closed=True), _kline(0, 10, closed=True)], on_close)
+    assert seen == [threading.main_thread()]
+
+
+def test_callback_errors_do_not_stop_the_stream():
+    calls = []
+
+    def on_close(symbol, interval, klines):
+        calls.append(klines[-1][0])
+        raise RuntimeError("strategy blew up")
+
+    stream = _replay([_kline(0, 10, closed=True), _kline(MINUTE, 11, closed=True)], on_close)
+    assert calls == [0, MINUTE]
+    assert len(stream.klines("BTCUSDT", "1m")) == 2
@@ -0,0 +1,148 @@
+# tests/test_model_router.py
+"""Circuit breaking, half-open probing and hedging in ModelRouter, over a fake transport."""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from backend.config import settings
+from backend.services.model_router import AllModelsFailed, ModelRouter
+
+
+def _http_error(status):
+    request = httpx.Request("POST", "http://gemini.test/generate")
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=httpx.Response(status, request=request))
+
+
+class FakeTransport:
+    """Per-model scripted behaviour: a value, an exception, or an awaitable factory."""
+
+    def __init__(self, **behaviour):
+        self.behaviour = behaviour
+        self.calls = []
+        self.cancelled = []
+
+    async def __call__(self, model, contents, system):
+        self.calls.append(model)
+        action = self.behaviour[model]
+        try:
+            if callable(action):
+                return await action()
+            if isinstance(action, BaseException):
+                raise action
+            return action
+        except asyncio.CancelledError:
+            self.cancelled.append(model)
+            raise
+
+
+def _sleep(seconds, value="slow"):
+    async def run():
+        await asyncio.sleep(seconds)
+        return value
+    return run
+
+
+@pytest.fixture(autouse=True)
+def router_settings(monkeypatch):
+    monkeypatch.setattr(settings, "ROUTER_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "ROUTER_OPEN_SECONDS", 30.0)
+    monkeypatch.setattr(settings, "ROUTER_HEDGE", False)
+    monkeypatch.setattr(settings, "ROUTER_ATTEMPT_TIMEOUT", 5.0)
+    monkeypatch.setattr(settings, "ROUTER_DEADLINE_SECONDS", 10.0)
+
+
+def test_circuit_opens_after_threshold_failures():
+    transport = FakeTransport(a=RuntimeError("boom"))
+    router = ModelRouter(transport)
+    for _ in range(settings.ROUTER_FAILURE_THRESHOLD - 1):
+        with pytest.raises(AllModelsFailed):
+            asyncio.run(router.call(["a"], []))
+        assert router.health["a"].state(time.time()) == "closed"
+
+    with pytest.raises(AllModelsFailed):
+        asyncio.run(router.call(["a"], []))
+    assert router.health["a"].state(time.time()) == "open"
+    assert len(transport.calls) == settings.ROUTER_FAILURE_THRESHOLD
+
+
+def test_fails_fast_when_every_circuit_is_open():
+    transport = FakeTransport(a=RuntimeError("boom"), b=RuntimeError("boom"))
+    router = ModelRouter(transport)
+    for _ in range(settings.ROUTER_FAILURE_THRESHOLD):
+        with pytest.raises(AllModelsFailed):
+            asyncio.run(router.call(["a", "b"], []))
+    calls = len(transport.calls)
+
+    with pytest.raises(AllModelsFailed) as exc:
+        asyncio.run(router.call(["a", "b"], []))
+    assert len(transport.calls) == calls
+    assert [m for m, _ in exc.value.errors] == ["a", "b"]
+    assert all("circuit open" in e for _, e in exc.value.errors)
+
+
+def test_bad_request_does_not_count_towards_circuit():
+    transport = FakeTransport(a=_http_error(400))
+    router = ModelRouter(transport)
+    for _ in range(settings.ROUTER_FAILURE_THRESHOLD + 2):
+        with pytest.raises(AllModelsFailed):
+            asyncio.run(router.call(["a"], []))
+    h = router.health["a"]
+    assert h.state(time.time()) == "closed"
+    assert h.consecutive_failures == 0
+    assert len(transport.calls) == settings.ROUTER_FAILURE_THRESHOLD + 2
+
+
+def test_half_open_allows_a_single_probe():
+    transport = FakeTransport(a=_sleep(0.2, "ok"))
+    router = ModelRouter(transport)
+    h = router._health("a")
+    h.open_seconds, h.open_until = 30.0, time.time() - 1   # open period just ran out
+
+    async def scenario():
+        probe = asyncio.ensure_future(router.call(["a"], []))
+        await asyncio.sleep(0.05)
+        assert h.probing
+        with pytest.raises(AllModelsFailed):
+            await router.call(["a"], [])
+        return await probe
+
+    assert asyncio.run(scenario()) == ("ok", "a")
+    assert transport.calls == ["a"]
+    assert h.state(time.time()) == "closed" and not h.probing
+
+
+def test_failed_probe_reopens_circuit():
+    router = ModelRouter(FakeTransport(a=RuntimeError("still down")))
+    h = router._health("a")
+    h.open_seconds, h.open_until = 30.0, time.time() - 1
+    with pytest.raises(AllModelsFailed):
+        asyncio.run(router.call(["a"], []))
+    assert h.state(time.time()) == "open"
+    assert h.open_seconds == 60.0
+
+
+def test_hedge_fires_after_percentile_delay_and_cancels_loser(monkeypatch):
+    monkeypatch.setattr(settings, "ROUTER_HEDGE", True)
+    monkeypatch.setattr(settings, "ROUTER_HEDGE_PERCENTILE", 0.9)
+    transport = FakeTransport(a=_sleep(3.0), b=_sleep(0.05, "fast"))
+    router = ModelRouter(transport)
+    router._health("a").latencies.extend([0.3] * 10)
+    assert router.hedge_delay("a") == pytest.approx(0.3)
+
+    async def scenario():
+        started = time.monotonic()
+        result = await router.call(["a", "b"], [])
+        elapsed = time.monotonic() - started
+        await asyncio.sleep(0)   # let the cancelled loser unwind
+        return result, elapsed
+
+    result, elapsed = asyncio.run(scenario())
+    assert result == ("fast", "b")
+    assert 0.3 <= elapsed < 1.0
+    assert transport.calls == ["a", "b"]
+    assert transport.cancelled == ["a"]
+    assert router.hedges == 1
+    # A cancelled hedge loser is not a failure
+    assert router.health["a"].consecutive_failures == 0
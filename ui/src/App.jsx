@@ -44,8 +44,21 @@ export default function App() {
       try { setSignal(await api.signal("BTCUSDT", "1m")); } catch (_) {}
     }
     tick();
-    timerRef.current = setInterval(tick, 30000);
-    return () => clearInterval(timerRef.current);
+    // Poller signals are pushed as they happen; REST covers intervals with no push
+    // (the poller is stopped by default)
+    let pushedAt = 0;
+    timerRef.current = setInterval(async () => {
+      try { setHealth(await api.health()); } catch (_) {}
+      if (Date.now() - pushedAt < 30000) return;
+      try { setSignal(await api.signal("BTCUSDT", "1m")); } catch (_) {}
+    }, 30000);
+    const close = api.live(["signal:BTCUSDT"], (e) => {
+      if (e.kind === "signal" && e.data.interval === "1m") {
+        pushedAt = Date.now();
+        setSignal(e.data);
+      }
+    });
+    return () => { clearInterval(timerRef.current); close(); };
   }, [user]);
 
   // Show loading spinner while checking auth
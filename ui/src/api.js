@@ -121,7 +121,32 @@ const api = {
   aiAnalysis:         (symbol, interval) => req("/api/v1/automation/ai-analysis", { method:"POST", body:{symbol,interval,include_signal:true} }),
   riskCheck:          (payload)       => req("/api/v1/automation/risk-check", { method:"POST", body:payload }),
   automationSummary:  ()              => req("/api/v1/automation/summary"),
+
+  // ── Live push (WebSocket) ───────────────────────────────────────────────────
+  live: (topics, onEvent) => live(topics, onEvent),
 };
 
+// Subscribe to /live/ws topics ("ticker:BTCUSDT", "signal", "trade"); reconnects with backoff.
+// Returns a function that closes the subscription.
+function live(topics, onEvent) {
+  // Only trade topics are admin-gated; don't put the token in URLs that don't need it
+  const needsToken = topics.some((t) => t === "trade" || t.startsWith("trade:"));
+  const token = needsToken ? `&token=${encodeURIComponent(getAdminToken())}` : "";
+  const url = `${BASE.replace(/^http/, "ws")}/api/v1/live/ws?topics=${encodeURIComponent(topics.join(","))}${token}`;
+  let ws = null, closed = false, backoff = 1000, timer = null;
+  function connect() {
+    ws = new WebSocket(url);
+    ws.onopen = () => { backoff = 1000; };
+    ws.onmessage = (m) => { try { onEvent(JSON.parse(m.data)); } catch (_) {} };
+    ws.onclose = () => {
+      if (closed) return;
+      timer = setTimeout(connect, backoff);
+      backoff = Math.min(backoff * 2, 30000);
+    };
+  }
+  connect();
+  return () => { closed = true; clearTimeout(timer); if (ws) ws.close(); };
+}
+
 if (typeof window !== "undefined") window._api = api;
 export default api;
@@ -11,7 +11,7 @@ const SYMBOLS = [
 ];
 const INTERVALS = ["1m","5m","15m","30m","1h","4h","1d"];
 
-// Throttled watchlist — fetches sequentially with 150ms gap to avoid rate limits
+// Watchlist — one throttled REST pass for initial prices, then live ticker pushes
 function useWatchlistPrices() {
   const [prices, setPrices] = useState({});
   useEffect(() => {
@@ -27,8 +27,10 @@ function useWatchlistPrices() {
       }
     }
     fetchAll();
-    const interval = setInterval(fetchAll, 60000);
-    return () => { cancelled = true; clearInterval(interval); };
+    const close = api.live(SYMBOLS.map(s => `ticker:${s}`), (e) => {
+      if (e.kind === "ticker") setPrices(p => ({ ...p, [e.data.symbol]: e.data.price }));
+    });
+    return () => { cancelled = true; close(); };
   }, []);
   return prices;
 }
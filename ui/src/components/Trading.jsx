@@ -22,6 +22,7 @@ export default function Trading({ toast }) {
   const [bookLoad,   setBookLoad]   = useState(false);
   const [history,    setHistory]    = useState(null);
   const [histPage,   setHistPage]   = useState(1);
+  const [histCursors, setHistCursors] = useState([null]);   // cursor that starts each page
   const [histLoad,   setHistLoad]   = useState(false);
   const [poller,     setPoller]     = useState(null);
   const [pollerBusy, setPollerBusy] = useState(false);
@@ -60,10 +61,15 @@ export default function Trading({ toast }) {
 
   const loadHistory = useCallback(async (page = 1) => {
     setHistLoad(true);
-    try { const r = await api.tradeHistory({ symbol, page, page_size: 10 }); setHistory(r); setHistPage(page); }
+    try {
+      const cursor = page > 1 ? histCursors[page - 1] : null;
+      const r = await api.tradeHistory({ symbol, cursor, page, page_size: 10 });
+      setHistory(r); setHistPage(page);
+      setHistCursors(c => { const next = c.slice(0, page); next[page] = r.next_cursor; return next; });
+    }
     catch (e) { toast("err", e.message); }
     finally { setHistLoad(false); }
-  }, [symbol, toast]);
+  }, [symbol, toast, histCursors]);
 
   async function togglePoller() {
     setPollerBusy(true);
@@ -258,7 +264,7 @@ export default function Trading({ toast }) {
             <div style={{ display:"flex", gap:8, marginTop:10, alignItems:"center" }}>
               <button className="btn btn-sm" onClick={() => loadHistory(histPage-1)} disabled={histPage<=1||histLoad}>← Prev</button>
               <span style={{ fontSize:12, color:"var(--muted)" }}>Page {histPage} · {history.total} total</span>
-              <button className="btn btn-sm" onClick={() => loadHistory(histPage+1)} disabled={histPage*10>=history.total||histLoad}>Next →</button>
+              <button className="btn btn-sm" onClick={() => loadHistory(histPage+1)} disabled={!history.next_cursor||histLoad}>Next →</button>
             </div>
           </>
         ) : <div className="empty">Click Load to fetch trade history</div>}